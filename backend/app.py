@@ -1,6 +1,11 @@
+import argparse
+import os
 import subprocess
+import sys
 
-# List of applications and their respective ports
+import gateway
+
+# List of applications and their respective ports (legacy multi-process layout)
 apps = [
     {"file": "datedem.py", "port": 5001},
     {"file": "demanda.py", "port": 5002},
@@ -8,12 +13,35 @@ apps = [
     {"file": "score.py", "port": 5004},
 ]
 
-# Start each app in a separate subprocess
-processes = []
-for app in apps:
-    command = ["python", app["file"]]
-    processes.append(subprocess.Popen(command))
 
-# Wait for the processes to complete
-for process in processes:
-    process.wait()
+def run_legacy():
+    """Start each app in a separate subprocess"""
+    processes = []
+    for app in apps:
+        command = [sys.executable, app["file"]]
+        env = dict(os.environ, GRADIO_SERVER_PORT=str(app["port"]))
+        processes.append(subprocess.Popen(command, cwd=gateway.BACKEND_DIR, env=env))
+
+    # Wait for the processes to complete
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the CuliFlow backend")
+    parser.add_argument("--legacy", action="store_true",
+                        help="run each service as its own Gradio server on ports 5001-5004")
+    args, remaining = parser.parse_known_args()
+
+    if args.legacy:
+        run_legacy()
+    else:
+        # All services in one process, mounted under /datedem, /demanda, /senti and /score
+        sys.argv = [sys.argv[0]] + remaining
+        gateway.main()
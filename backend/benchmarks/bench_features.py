@@ -0,0 +1,88 @@
+"""Rows/sec of calendar feature extraction: per-row apply vs vectorized
+
+Holiday flags come from the bundled offline calendar (fixtures/holidays_IN.json).
+
+Usage: python benchmarks/bench_features.py [--rows N] [--repeat R]
+Run from the backend directory.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datedem import SeasonEncoder, get_indian_season  # noqa: E402
+from forecasting.features import add_calendar_features, holiday_flags, hour_of_day  # noqa: E402
+from forecasting.holiday_index import HolidayIndexStore  # noqa: E402
+from forecasting.ingest import parse_sales_dates  # noqa: E402
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'indian_restaurant_sales_data.csv')
+
+
+def offline_holidays():
+    store = HolidayIndexStore()
+    years = store.load_offline_calendar('IN', persist=False)
+    return sorted(date for year in years for date in store.get('IN', year).entries)
+
+
+HOLIDAYS = offline_holidays()
+HOLIDAY_SET = set(HOLIDAYS)
+
+
+def legacy_features(df):
+    """Feature extraction as demanda/score/datedem did it before features.py"""
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+    df['time'] = pd.to_datetime(df['time'], format='%H:%M:%S', errors='coerce').dt.time
+    df['hour'] = df['time'].apply(lambda x: x.hour if x else 0)
+    df['day_of_week'] = df['date'].dt.dayofweek
+    df['month'] = df['date'].dt.month
+    df['is_weekend'] = df['date'].dt.dayofweek.isin([5, 6]).astype(int)
+    df['season'] = df['month'].apply(get_indian_season)
+    df['season'] = [SeasonEncoder().season_mapping[season] for season in df['season']]
+    df['is_holiday'] = df['date'].apply(lambda d: d.strftime('%Y-%m-%d') in HOLIDAY_SET).astype(int)
+    return df
+
+
+def vectorized_features(df):
+    df['date'] = parse_sales_dates(df['date'])
+    df['hour'] = hour_of_day(df['time'])
+    add_calendar_features(df)
+    df['is_holiday'] = holiday_flags(df['date'], HOLIDAYS).astype('int8')
+    return df
+
+
+def bench(fn, base, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        df = base.copy()
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    sample = pd.read_csv(SAMPLE_CSV, usecols=['date', 'time'])
+    copies = max(1, args.rows // len(sample))
+    base = pd.concat([sample] * copies, ignore_index=True)
+
+    legacy = bench(legacy_features, base, args.repeat)
+    vectorized = bench(vectorized_features, base, args.repeat)
+    rows = len(base)
+    print(f"rows: {rows}")
+    print(f"legacy:     {legacy:.3f}s  {rows / legacy:,.0f} rows/sec")
+    print(f"vectorized: {vectorized:.3f}s  {rows / vectorized:,.0f} rows/sec")
+    print(f"speedup:    {legacy / vectorized:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Nightly refresh: full refit vs incremental update after one appended day
+
+Writes a synthetic POS export (see bench_aggregation.py) covering ``--days``
+of history plus one more day, trains the slot demand models on the history,
+then brings them up to date with the extra day both ways, serially so the
+numbers are comparable. Repeat with growing ``--days`` to see the full refit
+scale with the history and the update stay roughly flat.
+
+Usage: python benchmarks/bench_incremental.py [--orders-per-day N] [--items I] [--days D]
+Run from the backend directory.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_aggregation import synthetic_orders  # noqa: E402
+from forecasting import HOURLY_SPEC  # noqa: E402
+from forecasting.dataset_cache import DatasetCache  # noqa: E402
+from forecasting.model_registry import ModelRegistry  # noqa: E402
+from forecasting.pipeline import SalesPipeline  # noqa: E402
+
+
+def refresh(path, registry, datasets, incremental):
+    pipeline = SalesPipeline(path, registry=registry, dataset_cache=datasets, n_workers=1)
+    pipeline.table(HOURLY_SPEC.table)
+    start = time.perf_counter()
+    pipeline.models(HOURLY_SPEC, incremental=incremental)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders-per-day', type=int, default=1_500)
+    parser.add_argument('--items', type=int, default=40)
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        orders = synthetic_orders(args.orders_per_day * (args.days + 1), args.items, args.days + 1)
+        last_day = orders['date'].max()
+        history, current = os.path.join(tmp, 'history.csv'), os.path.join(tmp, 'current.csv')
+        orders[orders['date'] < last_day].to_csv(history, index=False)
+        orders.to_csv(current, index=False)
+
+        datasets = DatasetCache(os.path.join(tmp, 'datasets'))
+        full_registry = ModelRegistry(os.path.join(tmp, 'full'))
+        refresh(history, full_registry, datasets, incremental=False)
+        # Both runs start from the same trained history
+        shutil.copytree(full_registry.root, os.path.join(tmp, 'incremental'))
+        update_registry = ModelRegistry(os.path.join(tmp, 'incremental'))
+
+        full = refresh(current, full_registry, datasets, incremental=False)
+        update = refresh(current, update_registry, datasets, incremental=True)
+
+    print()
+    print(f"{args.days} days of history, {args.items} items, one appended day")
+    print(f"full refit {full:6.2f}s  incremental update {update:6.2f}s  ({full / update:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Per-request inference latency: per-item sklearn forests vs compiled arrays
+
+Trains (or loads) the slot demand and daily models for a sales CSV, then
+times the inference step of three request shapes many times each: one
+day for every item (datedem), a 30-day slot forecast (demanda) and a
+365-day daily range. The sklearn path is the per-item loop the services
+used (scaler.transform then predict for each item); the compiled path is
+one CompiledForests.predict call. Reports p50/p99 latency, throughput and
+the largest difference between the two outputs.
+
+Usage: python benchmarks/bench_inference.py [--csv PATH] [--repeats N]
+Run from the backend directory.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecasting import DAILY_SPEC, HOURLY_SPEC  # noqa: E402
+from forecasting.features import OPERATING_SLOTS, add_calendar_features, future_slot_grid  # noqa: E402
+from forecasting.pipeline import get_pipeline  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sklearn_predict(models, features):
+    return np.array([model_info['model'].predict(model_info['scaler'].transform(features))
+                     for model_info in models.values()])
+
+
+def measure(fn, repeats):
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv', default=os.path.join(BACKEND_DIR, 'indian_restaurant_sales_data.csv'))
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    pipeline = get_pipeline(args.csv)
+    daily_dates = pd.date_range(pipeline.last_date + pd.Timedelta(days=1), periods=365, freq='D')
+    daily = add_calendar_features(pd.DataFrame({'date': daily_dates}))[DAILY_SPEC.feature_columns]
+    slots = future_slot_grid(daily_dates[0], 30, tuple(OPERATING_SLOTS))[HOURLY_SPEC.feature_columns]
+    cases = [
+        ('1 day, daily models', DAILY_SPEC, daily.iloc[:1]),
+        ('30 days x slots', HOURLY_SPEC, slots),
+        ('365 days, daily models', DAILY_SPEC, daily),
+    ]
+
+    print()
+    for name, spec, features in cases:
+        models = dict(pipeline.models(spec))
+        engine = pipeline.compiled(spec)
+        difference = np.abs(sklearn_predict(models, features) - engine.predict(features)).max()
+        print(f"{name} ({len(models)} items, {engine.n_trees} trees, {len(features)} rows, "
+              f"max difference {difference:.1e})")
+        for path, fn in [('sklearn', lambda: sklearn_predict(models, features)),
+                         ('compiled', lambda: engine.predict(features))]:
+            repeats = args.repeats if path == 'compiled' else max(10, args.repeats // 10)
+            timings = measure(fn, repeats) * 1000
+            print(f"  {path:9s} p50 {np.percentile(timings, 50):8.2f} ms  "
+                  f"p99 {np.percentile(timings, 99):8.2f} ms  {1000 / timings.mean():8.1f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Resident model size: fitted sklearn forests vs compact compiled arrays
+
+Trains (or loads) the slot demand and daily models for a sales CSV, then
+compiles them at a few pruning tolerances and tree caps (the
+CULIFLOW_PRUNE_TOLERANCE and CULIFLOW_MAX_TREES settings). Reports the
+bytes of the sklearn node arrays and of the pickled forests, the compiled
+size in total and per item, and how far the compiled predictions move
+from sklearn's on a 30-day slot grid and a 365-day daily range.
+
+Usage: python benchmarks/bench_model_memory.py [--csv PATH]
+Run from the backend directory.
+"""
+import argparse
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecasting import DAILY_SPEC, HOURLY_SPEC  # noqa: E402
+from forecasting.compiled import CompiledForests  # noqa: E402
+from forecasting.features import OPERATING_SLOTS, add_calendar_features, future_slot_grid  # noqa: E402
+from forecasting.pipeline import get_pipeline  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# sklearn's node struct (56 bytes of fields, padded to 64) plus the 8-byte leaf value
+SKLEARN_NODE_BYTES = 72
+SETTINGS = [(0.0, 0), (0.25, 0), (0.0, 50), (0.25, 50)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv', default=os.path.join(BACKEND_DIR, 'indian_restaurant_sales_data.csv'))
+    args = parser.parse_args()
+
+    pipeline = get_pipeline(args.csv)
+    start = pipeline.last_date + pd.Timedelta(days=1)
+    daily_dates = pd.date_range(start, periods=365, freq='D')
+    cases = [
+        ('slot demand', HOURLY_SPEC, future_slot_grid(start, 30, tuple(OPERATING_SLOTS))),
+        ('daily', DAILY_SPEC, add_calendar_features(pd.DataFrame({'date': daily_dates}))),
+    ]
+
+    print()
+    for name, spec, features in cases:
+        models = dict(pipeline.models(spec))
+        features = features[spec.feature_columns]
+        forests = [model_info['model'] for model_info in models.values()]
+        nodes = sum(tree.tree_.node_count for forest in forests for tree in forest.estimators_)
+        pickled = sum(len(pickle.dumps(forest)) for forest in forests)
+        expected = np.array([model_info['model'].predict(model_info['scaler'].transform(features))
+                             for model_info in models.values()])
+        print(f"{name} models ({len(models)} items): sklearn nodes {nodes * SKLEARN_NODE_BYTES / 2**20:.1f} MiB, "
+              f"pickled {pickled / 2**20:.1f} MiB")
+        for tolerance, max_trees in SETTINGS:
+            compiled = CompiledForests.from_models(models, max_trees=max_trees, tolerance=tolerance)
+            predicted = compiled.predict(features)
+            print(f"  tolerance {tolerance:4.2f} trees {max_trees or 'all':>3}: "
+                  f"{compiled.nbytes / 2**20:6.2f} MiB  {compiled.nbytes / len(models) / 1024:5.0f} KiB per item  "
+                  f"max difference {np.abs(predicted - expected).max():.1e}  "
+                  f"total {abs(predicted.sum() - expected.sum()) / expected.sum():.1e} relative")
+
+
+if __name__ == '__main__':
+    main()
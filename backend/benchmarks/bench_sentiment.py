@@ -0,0 +1,91 @@
+"""Reviews/sec of sentiment scoring: row-by-row apply vs SentimentEngine
+
+Builds a synthetic review dump by recombining the sample reviews shipped
+with the frontend (so texts repeat the way real review exports do), then
+times the legacy per-row path and the engine on a cold and a warm cache.
+
+Usage: python benchmarks/bench_sentiment.py [--rows N] [--unique U] [--workers W]
+Run from the backend directory.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentiment import SentimentEngine, get_analyzer, summarize  # noqa: E402
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                          'frontend', 'public', 'food_reviews.csv')
+
+
+def synthetic_reviews(rows, unique, seed=42):
+    sample = pd.read_csv(SAMPLE_CSV)
+    rng = np.random.default_rng(seed)
+    sentences = sample['Review'].dropna().tolist()
+    # Triples of sample sentences give a pool of distinct texts to draw from
+    pool = [" ".join(sentences[k] for k in triple)
+            for triple in rng.integers(0, len(sentences), size=(unique, 3))]
+    return pd.DataFrame({
+        'Food Name': rng.choice(sample['Food Name'].unique(), size=rows),
+        'Review': np.asarray(pool, dtype=object)[rng.integers(0, unique, size=rows)]
+    })
+
+
+def legacy(df):
+    """senti.analyze_sentiments before the engine: apply + records + indent=4"""
+    sid = get_analyzer()
+
+    def get_sentiment(review_text):
+        if pd.isna(review_text):
+            return "Unknown"
+        compound_score = sid.polarity_scores(str(review_text))["compound"]
+        if compound_score >= 0.05:
+            return "Positive"
+        elif compound_score <= -0.05:
+            return "Negative"
+        return "Neutral"
+
+    df = df.copy()
+    df["Predicted_Sentiment"] = df["Review"].apply(get_sentiment)
+    json.dumps(df.to_dict(orient="records"), indent=4)
+    return df["Predicted_Sentiment"].to_numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--unique', type=int, default=20_000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    df = synthetic_reviews(args.rows, args.unique)
+    get_analyzer()
+
+    start = time.perf_counter()
+    expected = legacy(df)
+    legacy_time = time.perf_counter() - start
+
+    engine = SentimentEngine(n_workers=args.workers)
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        labels = engine.label(df['Review'])
+        summarize(labels, df['Food Name'])
+        timings.append(time.perf_counter() - start)
+
+    assert (labels == expected).all(), "engine labels differ from the legacy path"
+    rows = len(df)
+    print(f"rows: {rows}  unique texts: {df['Review'].nunique()}  workers: {engine.n_workers}")
+    print(f"legacy:        {legacy_time:.2f}s  {rows / legacy_time:,.0f} reviews/sec")
+    print(f"engine (cold): {timings[0]:.2f}s  {rows / timings[0]:,.0f} reviews/sec")
+    print(f"engine (warm): {timings[1]:.2f}s  {rows / timings[1]:,.0f} reviews/sec")
+
+
+if __name__ == '__main__':
+    main()
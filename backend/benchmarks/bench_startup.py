@@ -0,0 +1,138 @@
+"""Startup time and memory: four Gradio subprocesses vs the single gateway
+
+Starts each layout through app.py, waits until every service answers over
+HTTP, then reports seconds-to-ready and the summed RSS of the process tree.
+The ``warm`` layout is the gateway with --warm-start, which spends extra
+startup time preloading libraries and registry models. Reads /proc, so
+Linux only.
+
+Usage: python benchmarks/bench_startup.py [--layout legacy|gateway|warm|both|all] [--timeout S]
+Run from the backend directory.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GATEWAY_PORT = 7960
+SERVICES = ['datedem', 'demanda', 'senti', 'score']
+LEGACY_PORTS = [5001, 5002, 5003, 5004]
+
+
+def layout_command(layout):
+    if layout == 'legacy':
+        return [sys.executable, 'app.py', '--legacy']
+    command = [sys.executable, 'app.py', '--port', str(GATEWAY_PORT)]
+    if layout == 'warm':
+        command.append('--warm-start')
+    return command
+
+
+def layout_urls(layout):
+    if layout == 'legacy':
+        return [f"http://127.0.0.1:{port}/" for port in LEGACY_PORTS]
+    return [f"http://127.0.0.1:{GATEWAY_PORT}/{name}/" for name in SERVICES]
+
+
+def is_up(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def process_tree(root_pid):
+    """PIDs of root_pid and all of its descendants"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as fh:
+                # The command name may contain spaces; ppid follows the closing paren
+                ppid = int(fh.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def measure(layout, timeout):
+    process = subprocess.Popen(
+        layout_command(layout), cwd=BACKEND_DIR, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    start = time.perf_counter()
+    pending = layout_urls(layout)
+    try:
+        while pending:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"{layout}: not ready after {timeout}s: {pending}")
+            if process.poll() is not None:
+                raise RuntimeError(f"{layout}: exited with code {process.returncode}")
+            pending = [url for url in pending if not is_up(url)]
+            if pending:
+                time.sleep(0.2)
+        ready = time.perf_counter() - start
+
+        # Let import-time allocations settle before sampling memory
+        time.sleep(2)
+        pids = process_tree(process.pid)
+        return ready, sum(rss_bytes(pid) for pid in pids), len(pids)
+    finally:
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--layout', choices=['legacy', 'gateway', 'warm', 'both', 'all'], default='both')
+    parser.add_argument('--timeout', type=float, default=300)
+    args = parser.parse_args()
+
+    layouts = {
+        'both': ['legacy', 'gateway'],
+        'all': ['legacy', 'gateway', 'warm']
+    }.get(args.layout, [args.layout])
+    results = {}
+    for layout in layouts:
+        results[layout] = measure(layout, args.timeout)
+        ready, rss, processes = results[layout]
+        print(f"{layout:8s} ready in {ready:6.2f}s  RSS {rss / 2**20:8.1f} MiB  processes {processes}")
+
+    if 'legacy' in results and 'gateway' in results:
+        legacy, gateway = results['legacy'], results['gateway']
+        print(f"startup: {legacy[0] / gateway[0]:.1f}x faster, "
+              f"memory: {legacy[1] / gateway[1]:.1f}x smaller")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Time to first result and peak memory: one-shot JSON vs NDJSON streaming
+
+Writes a synthetic review dump (see bench_sentiment.py), then runs the
+sentiment service in 'columns' mode both ways and reports when the first
+bytes are available and the peak Python allocation (tracemalloc).
+
+Usage: python benchmarks/bench_streaming.py [--rows N] [--chunksize C]
+Run from the backend directory.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import senti  # noqa: E402
+from bench_sentiment import synthetic_reviews  # noqa: E402
+from sentiment import get_analyzer  # noqa: E402
+
+
+def run_one_shot(path):
+    start = time.perf_counter()
+    body = senti.analyze_sentiments(types.SimpleNamespace(name=path), output='columns')
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, len(body)
+
+
+def run_streaming(path, chunksize):
+    start = time.perf_counter()
+    first = None
+    size = 0
+    for line in senti.stream_sentiments(path, output='columns', chunksize=chunksize):
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(line)
+    return first, time.perf_counter() - start, size
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    first, total, size = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, total, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--chunksize', type=int, default=senti.STREAM_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    get_analyzer()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'reviews.csv')
+        synthetic_reviews(args.rows, 20_000).to_csv(path, index=False)
+        # Score once so both runs hit a warm cache and only output handling differs
+        run_one_shot(path)
+
+        for name, fn, fn_args in [('one-shot', run_one_shot, (path,)),
+                                  ('streaming', run_streaming, (path, args.chunksize))]:
+            first, total, size, peak = measure(fn, *fn_args)
+            print(f"{name:10s} first bytes {first:6.2f}s  total {total:6.2f}s  "
+                  f"output {size / 2**20:7.1f} MiB  peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Cost of the per-stage instrumentation, enabled and disabled
+
+Times an empty ``with stage(...)`` block with metrics on and with
+CULIFLOW_METRICS=0 behaviour (the shared no-op context manager), and a
+warm demanda request (models already trained, so the request is mostly
+the compiled prediction) with both settings. Disabling at runtime keeps
+the request wrapper, so the disabled request figure is an upper bound.
+
+Usage: python benchmarks/bench_telemetry.py [--csv PATH] [--repeats N]
+Run from the backend directory.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import demanda  # noqa: E402
+import telemetry  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def stage_cost(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        with telemetry.stage('bench'):
+            pass
+    return (time.perf_counter() - start) / n
+
+
+def request_timings(csv_path, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        demanda.run_prediction(csv_path, 30)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--csv', default=os.path.join(BACKEND_DIR, 'indian_restaurant_sales_data.csv'))
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    # Trains (or loads) the models once
+    demanda.run_prediction(args.csv, 30)
+
+    print()
+    for enabled in (True, False):
+        telemetry.METRICS_ENABLED = enabled
+        timings = request_timings(args.csv, args.repeats)
+        print(f"metrics {'on ' if enabled else 'off'}: stage block {stage_cost(200_000) * 1e9:6.0f} ns  "
+              f"warm 30-day request p50 {np.percentile(timings, 50):6.2f} ms  "
+              f"p99 {np.percentile(timings, 99):6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,18 @@
-import json
+import os
 import warnings
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Dict, Optional, Tuple
 
-import gradio as gr
 import numpy as np
 import pandas as pd
 import requests
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from forecasting import COMPILED_INFERENCE, DAILY_SPEC, INCREMENTAL_UPDATES, resolve_sales_csv
+from forecasting.compiled import CompiledForests
+from forecasting.features import SEASON_NAMES, add_calendar_features
+from forecasting.holiday_index import HolidayIndex, HolidayIndexStore, get_holiday_store
+from forecasting.weather_providers import WeatherProvider, get_weather_provider
+from telemetry import instrumented, launch_with_metrics, stage
 
 warnings.filterwarnings('ignore')
 
@@ -31,46 +33,77 @@ def get_indian_season(month: int) -> str:
     else:  # months 12, 1, 2
         return 'Winter'
 
+SEASON_FACTORS = {
+    'Summer': 1.1,
+    'Monsoon': 0.9,
+    'Post-Monsoon': 1.0,
+    'Winter': 1.05
+}
+WEEKEND_FACTOR = 1.2
+MAX_RANGE_DAYS = 365
+
 class WeatherService:
     """Service to handle weather data retrieval and processing"""
     
-    def __init__(self, api_key: str, city: str):
+    def __init__(self, api_key: str, city: str, provider: Optional[WeatherProvider] = None):
         self.api_key = api_key
         self.city = city
-        self.base_url = "http://api.openweathermap.org/data/2.5/forecast"
+        # Shared cached provider unless a specific one (e.g. a fixture) is injected
+        self.provider = provider or get_weather_provider(api_key)
+        
+    def _fetch_forecast(self) -> list:
+        return self.provider.get_forecast(self.city)
+    
+    @staticmethod
+    def _format_forecast(forecast: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'temperature': forecast['main']['temp'],
+            'humidity': forecast['main']['humidity'],
+            'weather_main': forecast['weather'][0]['main'],
+            'weather_description': forecast['weather'][0]['description']
+        }
+    
+    @staticmethod
+    def _empty_weather() -> Dict[str, Any]:
+        return {
+            'temperature': None,
+            'humidity': None,
+            'weather_main': None,
+            'weather_description': None
+        }
         
     def get_weather(self, date: datetime) -> Dict[str, Any]:
         """Get weather forecast for a specific date"""
         try:
-            params = {
-                'q': self.city,
-                'appid': self.api_key,
-                'units': 'metric'
-            }
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
+            closest_forecast = self.provider.get_closest(self.city, date.timestamp())
+            if closest_forecast is None:
+                return self._empty_weather()
             
-            weather_data = response.json()
-            target_timestamp = date.timestamp()
-            closest_forecast = min(
-                weather_data['list'],
-                key=lambda x: abs(x['dt'] - target_timestamp)
-            )
+            return self._format_forecast(closest_forecast)
+        except Exception as e:
+            print(f"Error fetching weather data: {str(e)}")
+            return self._empty_weather()
+    
+    def get_weather_for_dates(self, dates) -> list:
+        """Get the closest forecast for each date from a single API call"""
+        try:
+            forecasts = sorted(self._fetch_forecast(), key=lambda x: x['dt'])
+            if not forecasts:
+                return [self._empty_weather() for _ in dates]
             
-            return {
-                'temperature': closest_forecast['main']['temp'],
-                'humidity': closest_forecast['main']['humidity'],
-                'weather_main': closest_forecast['weather'][0]['main'],
-                'weather_description': closest_forecast['weather'][0]['description']
-            }
+            forecast_ts = np.array([f['dt'] for f in forecasts], dtype=float)
+            targets = np.array([pd.Timestamp(d).timestamp() for d in dates], dtype=float)
+            
+            # Nearest neighbour on the sorted timestamps
+            right = np.clip(np.searchsorted(forecast_ts, targets), 0, len(forecast_ts) - 1)
+            left = np.clip(right - 1, 0, len(forecast_ts) - 1)
+            use_left = np.abs(forecast_ts[left] - targets) <= np.abs(forecast_ts[right] - targets)
+            closest = np.where(use_left, left, right)
+            
+            return [self._format_forecast(forecasts[i]) for i in closest]
         except Exception as e:
             print(f"Error fetching weather data: {str(e)}")
-            return {
-                'temperature': None,
-                'humidity': None,
-                'weather_main': None,
-                'weather_description': None
-            }
+            return [self._empty_weather() for _ in dates]
 
     def get_weather_score(self, weather_data: Dict[str, Any]) -> float:
         """Calculate weather score based on conditions"""
@@ -92,44 +125,68 @@ class WeatherService:
 class HolidayService:
     """Service to handle holiday checking"""
     
-    def __init__(self, api_key: str, country: str):
+    def __init__(self, api_key: str, country: str, store: Optional[HolidayIndexStore] = None):
         self.api_key = api_key
         self.country = country
         self.base_url = "https://calendarific.com/api/v2/holidays"
-        self.holiday_cache = {}
+        # Indexes are shared across requests and persisted per (country, year)
+        self.store = store or get_holiday_store()
+        self.offline = os.environ.get('CULIFLOW_HOLIDAY_SOURCE') == 'offline'
         
-    def get_holidays(self, year: int) -> list:
-        """Get holidays for a specific year"""
-        if year in self.holiday_cache:
-            return self.holiday_cache[year]
-            
-        try:
-            params = {
-                'api_key': self.api_key,
-                'country': self.country,
-                'year': year
-            }
-            response = requests.get(self.base_url, params=params)
+    def _fetch_holidays(self, year: int) -> list:
+        params = {
+            'api_key': self.api_key,
+            'country': self.country,
+            'year': year
+        }
+        with stage('holiday_api'):
+            response = requests.get(self.base_url, params=params, timeout=10)
             response.raise_for_status()
-            
-            holidays = response.json()['response']['holidays']
-            self.holiday_cache[year] = holidays
-            return holidays
+            return response.json()['response']['holidays']
+        
+    def get_index(self, year: int) -> HolidayIndex:
+        """Get the holiday index for a year, building it on first use"""
+        index = self.store.get(self.country, year)
+        if index is not None:
+            return index
+        
+        try:
+            if self.offline:
+                raise RuntimeError("holiday API disabled (CULIFLOW_HOLIDAY_SOURCE=offline)")
+            index = HolidayIndex.from_calendarific(self._fetch_holidays(year))
+            self.store.put(self.country, year, index)
         except Exception as e:
             print(f"Error fetching holiday data: {str(e)}")
-            return []
+            # Fall back to the bundled calendar without persisting it, so the
+            # API is tried again after a restart
+            try:
+                self.store.load_offline_calendar(self.country, persist=False)
+            except (OSError, ValueError) as calendar_error:
+                print(f"Error loading offline holiday calendar: {str(calendar_error)}")
+            index = self.store.get(self.country, year)
+            if index is None:
+                index = HolidayIndex()
+                self.store.put(self.country, year, index, persist=False)
+        return index
     
     def is_holiday(self, date: datetime) -> Tuple[bool, Optional[str], float]:
         """Check if a specific date is a holiday and return importance factor"""
-        holidays = self.get_holidays(date.year)
-        date_str = date.strftime('%Y-%m-%d')
+        return self.get_index(date.year).lookup(date)
+    
+    def holidays_for_dates(self, dates) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized (is_holiday, names, factors) for a whole column of dates"""
+        dates = pd.DatetimeIndex(dates)
+        is_holiday = np.zeros(len(dates), dtype=bool)
+        names = np.full(len(dates), None, dtype=object)
+        factors = np.ones(len(dates), dtype=float)
         
-        for holiday in holidays:
-            if holiday['date']['iso'] == date_str:
-                if holiday.get('type', [''])[0] in ['National holiday', 'Major holiday']:
-                    return True, holiday['name'], 1.3  # Major holiday boost
-                return True, holiday['name'], 1.15  # Minor holiday boost
-        return False, None, 1.0
+        years = dates.year.to_numpy()
+        for year in np.unique(years):
+            mask = years == year
+            is_holiday[mask], names[mask], factors[mask] = self.get_index(int(year)).lookup_many(
+                dates[mask].to_numpy()
+            )
+        return is_holiday, names, factors
 
 class SeasonEncoder:
     """Custom encoder for handling seasons"""
@@ -142,7 +199,7 @@ class SeasonEncoder:
         }
         
     def transform(self, seasons):
-        return [self.season_mapping[season] for season in seasons]
+        return pd.Series(seasons).map(self.season_mapping).to_numpy()
     
     def inverse_transform(self, encoded_seasons):
         inverse_mapping = {v: k for k, v in self.season_mapping.items()}
@@ -151,91 +208,57 @@ class SeasonEncoder:
 class DailySalesPrediction:
     """Main class for sales prediction"""
     
-    def __init__(self, weather_service: WeatherService, holiday_service: HolidayService):
+    MODES = ('per_item', 'global')
+    FEATURE_COLUMNS = DAILY_SPEC.feature_columns
+    MODEL_PARAMS = DAILY_SPEC.model_params
+    
+    def __init__(self, weather_service: WeatherService, holiday_service: HolidayService,
+                 mode: str = 'per_item', tenant: Optional[str] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown model mode: {mode}")
         self.weather_service = weather_service
         self.holiday_service = holiday_service
+        self.mode = mode
+        self.spec = DAILY_SPEC.replace(mode=mode)
+        # Restaurant charged for the resident compiled models (see ModelMemory)
+        self.tenant = tenant
+        self.pipeline = None
         self.encoders = {'season': SeasonEncoder()}  # Use custom season encoder
-        self.scaler = StandardScaler()
         self.models = {}
+        self.engine = None
+        self.global_model = None
         
-    def preprocess_data(self, csv_path: str) -> pd.DataFrame:
+    def preprocess_data(self, csv_path: str, data_digest: Optional[str] = None) -> pd.DataFrame:
         """Preprocess the input data with enhanced features"""
-        df = pd.read_csv(csv_path)
-        
-        # Convert date
-        try:
-            df['date'] = pd.to_datetime(df['date'], format='%d-%m-%Y')
-        except ValueError:
-            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
-        
-        # Extract and encode time features
-        df['is_weekend'] = df['date'].dt.dayofweek.isin([5, 6]).astype(int)
-        df['month'] = df['date'].dt.month
-        df['day_of_week'] = df['date'].dt.dayofweek
-        
-        # Add season using custom encoder
-        df['season'] = df['month'].apply(get_indian_season)
-        df['season'] = self.encoders['season'].transform(df['season'])
-        
-        # Handle item encoding
-        if 'item_name' in df.columns:
-            df['item_name'] = df['item_name'].fillna('Unknown')
-            self.encoders['item_name'] = LabelEncoder()
-            df['item_name'] = self.encoders['item_name'].fit_transform(df['item_name'])
+        # Parsed once per upload and shared with the other forecasting services
+        from forecasting.pipeline import get_pipeline
         
+        self.pipeline = get_pipeline(csv_path, data_digest=data_digest)
+        df = self.pipeline.table(self.spec.table)
+        self.encoders.update(self.pipeline.encoders)
         return df
     
     def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Prepare enhanced feature matrix"""
-        feature_columns = [
-            'is_weekend',
-            'month',
-            'day_of_week',
-            'season'
-        ]
-        return df[feature_columns]
+        return df[self.FEATURE_COLUMNS]
     
     def train_models(self, df: pd.DataFrame) -> None:
         """Train prediction models with enhanced features"""
-        unique_items = df['item_name'].unique()
+        shared = df is self.pipeline.table(self.spec.table)
+        if shared:
+            # Reuse the model set any service already trained on this upload, or
+            # update the one trained on its previous version
+            models = self.pipeline.models(self.spec, incremental=INCREMENTAL_UPDATES)
+        else:
+            models = self.pipeline.train(self.spec, df)
         
-        print("\nTraining models for each item...")
-        for item_code in unique_items:
-            try:
-                item_name = self.encoders['item_name'].inverse_transform([item_code])[0]
-                print(f"Training model for: {item_name}")
-                
-                item_data = df[df['item_name'] == item_code].copy()
-                X = self.prepare_features(item_data)
-                y = item_data['quantity']
-                
-                if len(y) < 2:
-                    print(f"Skipping {item_name} - insufficient data")
-                    continue
-                
-                X_train, X_test, y_train, y_test = train_test_split(
-                    X, y, test_size=0.2, random_state=42
-                )
-                
-                X_train_scaled = self.scaler.fit_transform(X_train)
-                X_test_scaled = self.scaler.transform(X_test)
-                
-                model = RandomForestRegressor(
-                    n_estimators=200,
-                    max_depth=15,
-                    min_samples_split=5,
-                    min_samples_leaf=2,
-                    random_state=42
-                )
-                model.fit(X_train_scaled, y_train)
-                
-                self.models[str(item_code)] = {
-                    'model': model,
-                    'scaler': self.scaler,
-                    'metrics': self._evaluate_model(model, X_test_scaled, y_test)
-                }
-            except Exception as e:
-                print(f"Error training model for item {item_code}: {str(e)}")
+        if self.mode == 'global':
+            self.global_model = models['global']['model']
+        else:
+            self.models = models
+            if COMPILED_INFERENCE:
+                self.engine = (self.pipeline.compiled(self.spec, INCREMENTAL_UPDATES, self.tenant)
+                               if shared else CompiledForests.from_models(models, self.pipeline.item_names(list(models))))
     
     def predict_for_date(self, date: datetime) -> Dict[str, Any]:
         """Predict sales with enhanced seasonal and environmental factors"""
@@ -249,43 +272,68 @@ class DailySalesPrediction:
             season_encoded = self.encoders['season'].transform([season])[0]
             
             # Prepare features for prediction
-            features = pd.DataFrame({
-                'is_weekend': [1 if date.weekday() in [5, 6] else 0],
-                'month': [date.month],
-                'day_of_week': [date.weekday()],
-                'season': [season_encoded]
-            })
+            with stage('features'):
+                features = pd.DataFrame({
+                    'is_weekend': [1 if date.weekday() in [5, 6] else 0],
+                    'month': [date.month],
+                    'day_of_week': [date.weekday()],
+                    'season': [season_encoded]
+                })
+            
+            # Apply seasonal adjustments
+            season_factor = SEASON_FACTORS[season]
+            
+            # Weekend factor
+            weekend_factor = WEEKEND_FACTOR if date.weekday() in [5, 6] else 1.0
             
             predictions = {}
-            for item_code, model_info in self.models.items():
-                try:
-                    X_scaled = model_info['scaler'].transform(features)
-                    base_prediction = model_info['model'].predict(X_scaled)[0]
-                    
-                    # Apply seasonal adjustments
-                    season_factors = {
-                        'Summer': 1.1,
-                        'Monsoon': 0.9,
-                        'Post-Monsoon': 1.0,
-                        'Winter': 1.05
-                    }
-                    season_factor = season_factors[season]
-                    
-                    # Weekend factor
-                    weekend_factor = 1.2 if date.weekday() in [5, 6] else 1.0
+            if self.mode == 'global':
+                item_codes = self.global_model.item_codes
+                with stage('predict'):
+                    base_predictions = self.global_model.predict_items(features, item_codes)[:, 0]
+                final_predictions = base_predictions * (
+                    season_factor *
+                    weather_factor *
+                    holiday_factor *
+                    weekend_factor
+                )
+                item_names = self.encoders['item_name'].inverse_transform(item_codes)
+                predictions = {
+                    name: int(round(value)) for name, value in zip(item_names, final_predictions)
+                }
+            
+            if self.engine is not None:
+                with stage('predict'):
+                    base_predictions = self.engine.predict(features)[:, 0]
+                final_predictions = base_predictions * (
+                    season_factor *
+                    weather_factor *
+                    holiday_factor *
+                    weekend_factor
+                )
+                item_names = self.encoders['item_name'].inverse_transform(self.engine.keys.astype(int))
+                predictions.update({
+                    name: int(round(value)) for name, value in zip(item_names, final_predictions)
+                })
+            else:
+                for item_code, model_info in self.models.items():
+                    try:
+                        with stage('predict'):
+                            X_scaled = model_info['scaler'].transform(features)
+                            base_prediction = model_info['model'].predict(X_scaled)[0]
                     
-                    # Calculate final prediction with all factors
-                    final_prediction = base_prediction * (
-                        season_factor *
-                        weather_factor *
-                        holiday_factor *
-                        weekend_factor
-                    )
+                        # Calculate final prediction with all factors
+                        final_prediction = base_prediction * (
+                            season_factor *
+                            weather_factor *
+                            holiday_factor *
+                            weekend_factor
+                        )
                     
-                    item_name = self.encoders['item_name'].inverse_transform([int(item_code)])[0]
-                    predictions[item_name] = int(round(final_prediction))
-                except Exception as e:
-                    print(f"Error predicting for item {item_code}: {str(e)}")
+                        item_name = self.encoders['item_name'].inverse_transform([int(item_code)])[0]
+                        predictions[item_name] = int(round(final_prediction))
+                    except Exception as e:
+                        print(f"Error predicting for item {item_code}: {str(e)}")
             
             return {
                 "metadata": {
@@ -307,8 +355,93 @@ class DailySalesPrediction:
         except Exception as e:
             return {"error": str(e)}
     
+    def predict_for_date_range(self, start_date: datetime, num_days: int) -> Dict[str, Any]:
+        """Predict daily sales for a range of dates in one batched pass
+        
+        The feature matrix for every date is built at once, each model is
+        scored once over the whole matrix and the season, weekend, holiday
+        and weather adjustments are applied as per-date factor arrays.
+        """
+        try:
+            dates = pd.date_range(start=start_date, periods=num_days, freq='D')
+            with stage('features'):
+                calendar = add_calendar_features(pd.DataFrame({'date': dates}))
+            features = calendar[self.FEATURE_COLUMNS]
+            is_weekend = calendar['is_weekend'].to_numpy()
+            season_codes = calendar['season'].to_numpy()
+            season_names = SEASON_NAMES[season_codes]
+            
+            weather = self.weather_service.get_weather_for_dates(dates)
+            is_holiday, holiday_names, holiday_factor = self.holiday_service.holidays_for_dates(dates)
+            
+            season_factor = np.array([SEASON_FACTORS[name] for name in SEASON_NAMES])[season_codes]
+            weekend_factor = np.where(is_weekend == 1, WEEKEND_FACTOR, 1.0)
+            weather_factor = np.array([self.weather_service.get_weather_score(w) for w in weather])
+            combined_factor = season_factor * weekend_factor * weather_factor * holiday_factor
+            
+            if self.mode == 'global':
+                item_codes = self.global_model.item_codes
+                with stage('predict'):
+                    base_predictions = self.global_model.predict_items(features, item_codes)
+            elif self.engine is not None:
+                item_codes = self.engine.keys.astype(int)
+                with stage('predict'):
+                    base_predictions = self.engine.predict(features)
+            else:
+                item_codes = []
+                rows = []
+                for item_code, model_info in self.models.items():
+                    try:
+                        with stage('predict'):
+                            X_scaled = model_info['scaler'].transform(features)
+                            rows.append(model_info['model'].predict(X_scaled))
+                        item_codes.append(int(item_code))
+                    except Exception as e:
+                        print(f"Error predicting for item {item_code}: {str(e)}")
+                base_predictions = np.array(rows).reshape(len(rows), num_days)
+            
+            # Shape (items, dates); factors broadcast across items
+            final_predictions = np.rint(base_predictions * combined_factor).astype(int)
+            item_names = self.encoders['item_name'].inverse_transform(np.asarray(item_codes, dtype=int))
+            
+            daily = []
+            for i, date in enumerate(dates):
+                daily.append({
+                    "date": date.strftime('%Y-%m-%d'),
+                    "season": str(season_names[i]),
+                    "is_weekend": bool(is_weekend[i]),
+                    "is_holiday": bool(is_holiday[i]),
+                    "holiday_name": holiday_names[i],
+                    "weather": weather[i],
+                    "adjustment_factors": {
+                        "season_factor": float(season_factor[i]),
+                        "weather_factor": float(weather_factor[i]),
+                        "holiday_factor": float(holiday_factor[i]),
+                        "weekend_factor": float(weekend_factor[i])
+                    },
+                    "predictions": {
+                        str(name): int(value) for name, value in zip(item_names, final_predictions[:, i])
+                    }
+                })
+            
+            return {
+                "metadata": {
+                    "start_date": dates[0].strftime('%Y-%m-%d'),
+                    "end_date": dates[-1].strftime('%Y-%m-%d'),
+                    "num_days": num_days
+                },
+                "totals": {
+                    str(name): int(total) for name, total in zip(item_names, final_predictions.sum(axis=1))
+                },
+                "daily": daily
+            }
+        except Exception as e:
+            return {"error": str(e)}
+    
     def _evaluate_model(self, model, X_test, y_test):
         """Evaluate model performance"""
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
         try:
             predictions = model.predict(X_test)
             return {
@@ -320,15 +453,20 @@ class DailySalesPrediction:
             print(f"Error in model evaluation: {str(e)}")
             return {'mae': np.nan, 'rmse': np.nan, 'r2': np.nan}
 
-def predict_sales(csv_file, prediction_date):
+@instrumented('datedem')
+def predict_sales(csv_file, prediction_date, mode='per_item', dataset_id=None, tenant=None):
     try:
+        if mode not in DailySalesPrediction.MODES:
+            return {"error": f"Model mode must be one of: {', '.join(DailySalesPrediction.MODES)}"}
+        
         weather_service = WeatherService(OPENWEATHER_API_KEY, CITY)
         holiday_service = HolidayService(CALENDARIFIC_API_KEY, COUNTRY)
-        predictor = DailySalesPrediction(weather_service, holiday_service)
+        predictor = DailySalesPrediction(weather_service, holiday_service, mode=mode, tenant=tenant or None)
         
         pred_date = datetime.strptime(prediction_date, '%Y-%m-%d')
         
-        processed_data = predictor.preprocess_data(csv_file.name)
+        # A stored dataset id (see POST /datasets) replaces the upload
+        processed_data = predictor.preprocess_data(*resolve_sales_csv(csv_file, dataset_id))
         predictor.train_models(processed_data)
         
         predictions = predictor.predict_for_date(pred_date)
@@ -337,18 +475,94 @@ def predict_sales(csv_file, prediction_date):
     except Exception as e:
         return {"error": str(e)}
 
-# Gradio Interface
-iface = gr.Interface(
-    fn=predict_sales,
-    inputs=[
-        gr.File(label="Upload Sales History CSV"),
-        gr.Textbox(label="Prediction Date (YYYY-MM-DD)", 
-                  placeholder="2024-10-27")
-    ],
-    outputs=gr.JSON(label="Predictions"),
-    title="Daily Sales Prediction with Seasonal Factors",
-    description="Upload your sales history and select a date to get predictions considering Indian seasons, weather, holidays, and weekends."
-)
+@instrumented('datedem')
+def predict_sales_range(csv_file, start_date, num_days, mode='per_item', dataset_id=None, tenant=None):
+    try:
+        if mode not in DailySalesPrediction.MODES:
+            return {"error": f"Model mode must be one of: {', '.join(DailySalesPrediction.MODES)}"}
+        
+        try:
+            num_days = int(num_days)
+        except (TypeError, ValueError):
+            return {"error": "Invalid number of days. Please enter a valid number."}
+        if num_days <= 0:
+            return {"error": "Number of days must be greater than 0"}
+        if num_days > MAX_RANGE_DAYS:
+            return {"error": f"Prediction period cannot exceed {MAX_RANGE_DAYS} days"}
+        
+        weather_service = WeatherService(OPENWEATHER_API_KEY, CITY)
+        holiday_service = HolidayService(CALENDARIFIC_API_KEY, COUNTRY)
+        predictor = DailySalesPrediction(weather_service, holiday_service, mode=mode, tenant=tenant or None)
+        
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        
+        processed_data = predictor.preprocess_data(*resolve_sales_csv(csv_file, dataset_id))
+        predictor.train_models(processed_data)
+        
+        return predictor.predict_for_date_range(start, num_days)
+    except Exception as e:
+        return {"error": str(e)}
+
+def build_app():
+    """Build the tabbed Gradio UI; gradio is imported here so the module imports fast"""
+    import gradio as gr
+    
+    iface = gr.Interface(
+        fn=predict_sales,
+        inputs=[
+            gr.File(label="Upload Sales History CSV"),
+            gr.Textbox(label="Prediction Date (YYYY-MM-DD)", 
+                      placeholder="2024-10-27"),
+            gr.Radio(choices=list(DailySalesPrediction.MODES),
+                     value='per_item',
+                     label="Model Mode",
+                     info="per_item trains one forest per item; global trains a single forest across all items"),
+            gr.Textbox(label="Dataset ID",
+                       info="ID of a dataset stored with POST /datasets; used instead of the upload"),
+            gr.Textbox(label="Tenant",
+                       info="Restaurant whose model memory budget (CULIFLOW_TENANT_MODEL_MB) the models count against")
+        ],
+        outputs=gr.JSON(label="Predictions"),
+        title="Daily Sales Prediction with Seasonal Factors",
+        description="Upload your sales history and select a date to get predictions considering Indian seasons, weather, holidays, and weekends."
+    )
+    
+    range_iface = gr.Interface(
+        fn=predict_sales_range,
+        inputs=[
+            gr.File(label="Upload Sales History CSV"),
+            gr.Textbox(label="Start Date (YYYY-MM-DD)",
+                      placeholder="2024-10-27"),
+            gr.Number(label="Number of Days",
+                     value=90,
+                     minimum=1,
+                     maximum=MAX_RANGE_DAYS,
+                     step=1),
+            gr.Radio(choices=list(DailySalesPrediction.MODES),
+                     value='per_item',
+                     label="Model Mode"),
+            gr.Textbox(label="Dataset ID",
+                       info="ID of a dataset stored with POST /datasets; used instead of the upload"),
+            gr.Textbox(label="Tenant",
+                       info="Restaurant whose model memory budget (CULIFLOW_TENANT_MODEL_MB) the models count against")
+        ],
+        outputs=gr.JSON(label="Predictions"),
+        title="Daily Sales Prediction for a Date Range",
+        description="Upload your sales history and choose a start date and number of days to get per-day predictions for the whole range in one request.",
+        api_name="predict_range"
+    )
+    
+    return gr.TabbedInterface(
+        [iface, range_iface],
+        ["Single Date", "Date Range"]
+    )
+
+def __getattr__(name):
+    # Keep `from datedem import app` working without building the UI on import
+    if name == 'app':
+        globals()['app'] = build_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
-    iface.launch()
\ No newline at end of file
+    launch_with_metrics(build_app())
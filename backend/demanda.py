@@ -1,129 +1,119 @@
 import warnings
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-import gradio as gr
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from forecasting import (COMPILED_INFERENCE, HOURLY_SPEC, INCREMENTAL_UPDATES, future_slot_grid,
+                         outlet_slots, resolve_sales_csv)
+from forecasting.compiled import CompiledForests
+from telemetry import instrumented, launch_with_metrics, stage
 
 warnings.filterwarnings('ignore')
 
 class RestaurantSalesPrediction:
-    def __init__(self):
+    FEATURE_COLUMNS = HOURLY_SPEC.feature_columns
+    MODEL_PARAMS = HOURLY_SPEC.model_params
+
+    MODES = ('per_item', 'global')
+
+    def __init__(self, mode='per_item', n_workers=None, aggregate=True, outlet=None, tenant=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown model mode: {mode}")
+        self.mode = mode
+        # Slot start hours forecast for this outlet (CULIFLOW_OUTLET_HOURS)
+        self.slots = outlet_slots(outlet)
+        # aggregate=False trains on raw order lines instead of slot demand, as does
+        # aggregate=True when the slot table would not be smaller (see training_spec)
+        self.aggregate = aggregate
+        self.spec = HOURLY_SPEC.replace(mode=mode, table=HOURLY_SPEC.table if aggregate else 'orders')
+        self.n_workers = n_workers
+        # Restaurant charged for the resident compiled models (see ModelMemory)
+        self.tenant = tenant
+        self.pipeline = None
         self.encoders = {}
-        self.scaler = StandardScaler()
         self.models = {}
+        self.engine = None
+        self.global_model = None
         self.feature_columns = None
+        self.training_failures = {}
         
-    def preprocess_data(self, csv_path):
+    def preprocess_data(self, csv_path, data_digest=None):
         """Preprocess the data with minimal required features"""
-        df = pd.read_csv(csv_path)
-        
-        # Convert date with proper format and error handling
-        try:
-            df['date'] = pd.to_datetime(df['date'], format='%d-%m-%Y')
-        except ValueError:
-            print("Attempting alternative date format...")
-            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
-            
-        # Convert time to hour
-        df['time'] = pd.to_datetime(df['time'], format='%H:%M:%S', errors='coerce').dt.time
-        df['hour'] = df['time'].apply(lambda x: x.hour if x else 0)
-        
-        # Create basic temporal features
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['month'] = df['date'].dt.month
-        
-        # Handle item_name encoding
-        if 'item_name' in df.columns:
-            df['item_name'] = df['item_name'].fillna('Unknown')
-            self.encoders['item_name'] = LabelEncoder()
-            self.encoders['item_name'].fit(df['item_name'].unique())
-            df['item_name'] = self.encoders['item_name'].transform(df['item_name'])
+        from forecasting.pipeline import get_pipeline
         
+        # Parsed once per upload and shared with the other forecasting services
+        self.pipeline = get_pipeline(csv_path, self.n_workers, data_digest=data_digest)
+        if self.aggregate:
+            self.spec = self.pipeline.training_spec(self.spec)
+        df = self.pipeline.table(self.spec.table)
+        self.encoders = self.pipeline.encoders
         return df
     
     def prepare_features(self, df):
         """Prepare minimal feature matrix"""
         if self.feature_columns is None:
-            self.feature_columns = ['hour', 'day_of_week', 'month']
+            self.feature_columns = list(self.FEATURE_COLUMNS)
         
         return df[self.feature_columns]
     
     def train_models(self, df):
         """Train models for each item"""
-        unique_items = df['item_name'].unique()
-        
-        print("\nTraining models for each item...")
-        for item_code in unique_items:
-            try:
-                item_name = self.encoders['item_name'].inverse_transform([item_code])[0]
-                print(f"Training model for: {item_name}")
-                
-                item_data = df[df['item_name'] == item_code].copy()
-                X = self.prepare_features(item_data)
-                y = item_data['quantity']
-                
-                if len(y) < 2:
-                    print(f"Skipping {item_name} - insufficient data")
-                    continue
-                
-                X_train, X_test, y_train, y_test = train_test_split(
-                    X, y, test_size=0.2, random_state=42
-                )
-                
-                X_train_scaled = self.scaler.fit_transform(X_train)
-                X_test_scaled = self.scaler.transform(X_test)
-                
-                model = RandomForestRegressor(
-                    n_estimators=100,
-                    max_depth=10,
-                    random_state=42
-                )
-                model.fit(X_train_scaled, y_train)
-                
-                self.models[str(item_code)] = {
-                    'model': model,
-                    'scaler': StandardScaler().fit(X),
-                    'metrics': self.evaluate_model(model, X_test_scaled, y_test)
-                }
-            except Exception as e:
-                print(f"Error training model for item {item_code}: {str(e)}")
-                continue
+        self.prepare_features(df)
+        shared = df is self.pipeline.table(self.spec.table)
+        if shared:
+            # Reuse the model set any service already trained on this upload, or
+            # update the one trained on its previous version
+            models = self.pipeline.models(self.spec, incremental=INCREMENTAL_UPDATES)
+        else:
+            models = self.pipeline.train(self.spec, df)
+        self.training_failures = self.pipeline.training_failures
+
+        if self.mode == 'global':
+            self.global_model = models['global']['model']
+        else:
+            self.models = models
+            if COMPILED_INFERENCE:
+                self.engine = (self.pipeline.compiled(self.spec, INCREMENTAL_UPDATES, self.tenant)
+                               if shared else CompiledForests.from_models(models, self.pipeline.item_names(list(models))))
 
     def predict_future_sales(self, start_date, num_days):
         """Predict total sales for the specified number of days"""
         try:
-            # Generate basic future dates structure
-            dates = pd.date_range(start=start_date, periods=num_days, freq='D')
-            future_data = []
-            
-            for date in dates:
-                for hour in range(8, 23, 2):  # Operating hours
-                    future_data.append({
-                        'hour': hour,
-                        'day_of_week': date.dayofweek,
-                        'month': date.month
-                    })
-            
-            future_df = pd.DataFrame(future_data)
+            # Every (date, slot) in the outlet's operating hours, built once per key
+            with stage('features'):
+                future_df = future_slot_grid(pd.Timestamp(start_date), int(num_days), self.slots)
             predictions = {}
             
-            for item_code, model_info in self.models.items():
-                try:
-                    X_future = future_df[self.feature_columns]
-                    X_future_scaled = model_info['scaler'].transform(X_future)
-                    total_prediction = int(round(model_info['model'].predict(X_future_scaled).sum()))
-                    
-                    # Get the original item name
-                    item_name = self.encoders['item_name'].inverse_transform([int(item_code)])[0]
-                    predictions[item_name] = total_prediction
-                except Exception as e:
-                    print(f"Error predicting for item {item_code}: {str(e)}")
-                    continue
+            if self.mode == 'global':
+                item_codes = self.global_model.item_codes
+                with stage('predict'):
+                    totals = self.global_model.predict_items(future_df, item_codes).sum(axis=1)
+                item_names = self.encoders['item_name'].inverse_transform(item_codes)
+                predictions = {
+                    name: int(round(total)) for name, total in zip(item_names, totals)
+                }
+            
+            if self.engine is not None:
+                # Every item's forest over the grid in one vectorised traversal
+                with stage('predict'):
+                    totals = self.engine.predict(future_df[self.feature_columns]).sum(axis=1)
+                item_names = self.pipeline.item_names(self.engine.keys.astype(int))
+                predictions.update({
+                    name: int(round(total)) for name, total in zip(item_names, totals)
+                })
+            elif self.models:
+                X_future = future_df[self.feature_columns]
+                # Decode every item name in one call
+                item_names = self.encoders['item_name'].inverse_transform([int(code) for code in self.models])
+                for item_name, (item_code, model_info) in zip(item_names, self.models.items()):
+                    try:
+                        with stage('predict'):
+                            X_future_scaled = model_info['scaler'].transform(X_future)
+                            predictions[item_name] = int(round(model_info['model'].predict(X_future_scaled).sum()))
+                    except Exception as e:
+                        print(f"Error predicting for item {item_code}: {str(e)}")
+                        continue
             
             # Format the predictions with additional metadata
             formatted_predictions = {
@@ -144,6 +134,8 @@ class RestaurantSalesPrediction:
 
     def evaluate_model(self, model, X_test, y_test):
         """Evaluate model performance"""
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
         try:
             predictions = model.predict(X_test)
             return {
@@ -155,49 +147,76 @@ class RestaurantSalesPrediction:
             print(f"Error in model evaluation: {str(e)}")
             return {'mae': np.nan, 'rmse': np.nan, 'r2': np.nan}
 
-def run_prediction(csv_file, num_days):
+@instrumented('demanda')
+def run_prediction(csv_file, num_days, mode='per_item', outlet=None, dataset_id=None, tenant=None):
     try:
         # Validate input
-        num_days = int(num_days)
+        try:
+            num_days = int(num_days)
+        except (TypeError, ValueError):
+            return {"error": "Invalid number of days. Please enter a valid number."}
         if num_days <= 0:
             return {"error": "Number of days must be greater than 0"}
         if num_days > 365:
             return {"error": "Prediction period cannot exceed 365 days"}
+        if mode not in RestaurantSalesPrediction.MODES:
+            return {"error": f"Model mode must be one of: {', '.join(RestaurantSalesPrediction.MODES)}"}
             
-        predictor = RestaurantSalesPrediction()
+        # A stored dataset id (see POST /datasets) replaces the upload
+        csv_path, data_digest = resolve_sales_csv(csv_file, dataset_id)
+        predictor = RestaurantSalesPrediction(mode=mode, outlet=outlet or None, tenant=tenant or None)
         
         # Preprocess data
-        processed_data = predictor.preprocess_data(csv_file.name)
+        processed_data = predictor.preprocess_data(csv_path, data_digest)
         
-        # Train models
+        # Train models (or reuse the shared model set for this upload)
         predictor.train_models(processed_data)
         
+        last_date = predictor.pipeline.last_date
+        
         # Predict future sales
-        last_date = processed_data['date'].max()
         predictions = predictor.predict_future_sales(last_date + timedelta(days=1), num_days)
         
         return predictions
-    except ValueError:
-        return {"error": "Invalid number of days. Please enter a valid number."}
     except Exception as e:
         return {"error": str(e)}
 
-# Gradio Interface
-iface = gr.Interface(
-    fn=run_prediction,
-    inputs=[
-        gr.File(label="Upload CSV File"),
-        gr.Number(label="Number of Days to Predict", 
-                 value=30,  # Default value
-                 minimum=1,
-                 maximum=365,
-                 step=1,
-                 info="Enter the number of days (1-365) for prediction")
-    ],
-    outputs=gr.JSON(label="Predictions"),
-    title="Restaurant Sales Prediction",
-    description="Upload a CSV file containing restaurant sales data and specify the number of days to predict future sales."
-)
+def build_interface():
+    """Build the Gradio UI; gradio is imported here so the module imports fast"""
+    import gradio as gr
+    
+    return gr.Interface(
+        fn=run_prediction,
+        inputs=[
+            gr.File(label="Upload CSV File"),
+            gr.Number(label="Number of Days to Predict", 
+                     value=30,  # Default value
+                     minimum=1,
+                     maximum=365,
+                     step=1,
+                     info="Enter the number of days (1-365) for prediction"),
+            gr.Radio(choices=list(RestaurantSalesPrediction.MODES),
+                     value='per_item',
+                     label="Model Mode",
+                     info="per_item trains one forest per item; global trains a single forest across all items"),
+            gr.Textbox(label="Outlet",
+                       info="Outlet whose operating hours to forecast (CULIFLOW_OUTLET_HOURS); leave empty for the default hours"),
+            gr.Textbox(label="Dataset ID",
+                       info="ID of a dataset stored with POST /datasets; used instead of the upload"),
+            gr.Textbox(label="Tenant",
+                       info="Restaurant whose model memory budget (CULIFLOW_TENANT_MODEL_MB) the models count against")
+        ],
+        outputs=gr.JSON(label="Predictions"),
+        title="Restaurant Sales Prediction",
+        description="Upload a CSV file containing restaurant sales data and specify the number of days to predict future sales."
+    )
+
+def __getattr__(name):
+    # Keep `from demanda import iface` working without building the UI on import
+    if name == 'iface':
+        globals()['iface'] = build_interface()
+        return globals()['iface']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
-    iface.launch()
\ No newline at end of file
+    launch_with_metrics(build_interface())
@@ -0,0 +1,92 @@
+"""Shared forecasting engine used by the demanda, datedem and score services
+
+Submodules are imported on first attribute access so that importing the
+package (or a service that only needs the model specs) does not pull in
+sklearn, joblib and friends until a request actually trains or predicts.
+"""
+import importlib
+
+from .specs import COMPILED_INFERENCE, DAILY_SPEC, HOURLY_SPEC, INCREMENTAL_UPDATES, MODES, ModelSpec
+
+_LAZY_ATTRIBUTES = {
+    'Backtester': 'backtest',
+    'forecast_metrics': 'backtest',
+    'get_fold_cache': 'backtest',
+    'CompiledForests': 'compiled',
+    'DatasetCache': 'dataset_cache',
+    'get_dataset_cache': 'dataset_cache',
+    'SEASON_NAMES': 'features',
+    'add_calendar_features': 'features',
+    'future_slot_grid': 'features',
+    'holiday_flags': 'features',
+    'hour_of_day': 'features',
+    'outlet_slots': 'features',
+    'season_codes': 'features',
+    'GlobalItemModel': 'global_model',
+    'ModelUpdater': 'incremental',
+    'aggregate_sales_csv': 'ingest',
+    'parse_sales_dates': 'ingest',
+    'read_sales_csv': 'ingest',
+    'ModelMemory': 'memory',
+    'get_model_memory': 'memory',
+    'ModelRegistry': 'model_registry',
+    'file_digest': 'model_registry',
+    'get_registry': 'model_registry',
+    'TrainingScheduler': 'parallel_training',
+    'UploadStore': 'uploads',
+    'get_upload_store': 'uploads',
+    'resolve_sales_csv': 'uploads',
+    'fit_item_forest': 'parallel_training',
+    'SalesPipeline': 'pipeline',
+    'get_pipeline': 'pipeline',
+    'preprocess_sales_frame': 'pipeline',
+}
+
+__all__ = [
+    'Backtester',
+    'COMPILED_INFERENCE',
+    'CompiledForests',
+    'DAILY_SPEC',
+    'DatasetCache',
+    'GlobalItemModel',
+    'HOURLY_SPEC',
+    'INCREMENTAL_UPDATES',
+    'MODES',
+    'ModelMemory',
+    'ModelRegistry',
+    'ModelSpec',
+    'ModelUpdater',
+    'SEASON_NAMES',
+    'SalesPipeline',
+    'TrainingScheduler',
+    'UploadStore',
+    'add_calendar_features',
+    'aggregate_sales_csv',
+    'file_digest',
+    'fit_item_forest',
+    'forecast_metrics',
+    'future_slot_grid',
+    'get_dataset_cache',
+    'get_fold_cache',
+    'get_model_memory',
+    'get_pipeline',
+    'get_registry',
+    'get_upload_store',
+    'holiday_flags',
+    'hour_of_day',
+    'outlet_slots',
+    'parse_sales_dates',
+    'preprocess_sales_frame',
+    'read_sales_csv',
+    'resolve_sales_csv',
+    'season_codes',
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
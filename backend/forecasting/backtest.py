@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.preprocessing import StandardScaler
+
+from .dataset_cache import DEFAULT_DATASET_DIR
+from .parallel_training import TrainingScheduler
+from .specs import ModelSpec
+
+DEFAULT_HORIZON_DAYS = int(os.environ.get('CULIFLOW_BACKTEST_HORIZON_DAYS', '7'))
+DEFAULT_STEP_DAYS = int(os.environ.get('CULIFLOW_BACKTEST_STEP_DAYS', '7'))
+DEFAULT_FOLDS = int(os.environ.get('CULIFLOW_BACKTEST_FOLDS', '8'))
+DEFAULT_CACHE_ENTRIES = int(os.environ.get('CULIFLOW_BACKTEST_CACHE', '4096'))
+DEFAULT_DISK_ENTRIES = int(os.environ.get('CULIFLOW_BACKTEST_DISK_CACHE', '65536'))
+# A dot directory, so the dataset cache's eviction passes over it
+DEFAULT_FOLD_DIR = os.path.join(DEFAULT_DATASET_DIR, '.backtest')
+
+# Fold origins are whole steps from a Monday (1970-01-05, day 4 of the epoch),
+# so they stay on the same dates when newer data is appended
+ORIGIN_ANCHOR_DAY = 4
+
+
+def forecast_metrics(actual, predicted) -> Dict[str, float]:
+    """MAE, RMSE, R² and MAPE (zero actuals counted as 1) rounded to 3 places"""
+    actual = np.asarray(actual, dtype=np.float64)
+    predicted = np.asarray(predicted, dtype=np.float64)
+    metrics = {
+        'mae': float(mean_absolute_error(actual, predicted)),
+        'rmse': float(np.sqrt(mean_squared_error(actual, predicted))),
+        'r2': float(r2_score(actual, predicted)),
+        'mape': float(np.mean(np.abs((actual - predicted) / np.where(actual == 0, 1, actual))) * 100)
+    }
+    return {k: round(v, 3) for k, v in metrics.items()}
+
+
+def fold_origins(first_day, last_day, horizon_days: int, step_days: int, n_folds: int) -> np.ndarray:
+    """The last ``n_folds`` origins whose whole horizon lies inside the data
+
+    Each origin needs at least one earlier day to train on. Returned as
+    ascending datetime64[D] values.
+    """
+    first = np.datetime64(first_day, 'D').astype(np.int64)
+    last = np.datetime64(last_day, 'D').astype(np.int64)
+    latest = last - horizon_days + 1
+    latest -= (latest - ORIGIN_ANCHOR_DAY) % step_days
+    origins = latest - step_days * np.arange(n_folds - 1, -1, -1)
+    return origins[origins > first].astype('datetime64[D]')
+
+
+def fit_predict_fold(X_train, y_train, X_test, model_params: Dict[str, Any],
+                     n_jobs: Optional[int] = None) -> np.ndarray:
+    """Fit a forest on one fold's training window and predict its test window"""
+    scaler = StandardScaler()
+    model = RandomForestRegressor(**model_params, n_jobs=n_jobs)
+    model.fit(scaler.fit_transform(X_train), y_train)
+    return model.predict(scaler.transform(X_test))
+
+
+class FoldCache:
+    """Bounded LRU of fold predictions keyed by the digest of their inputs
+
+    Every fold is also written to ``root`` as ``<key>.npy``, so restarts and
+    other workers reuse fitted folds; a memory miss falls back to that file.
+    The directory keeps the ``max_disk_entries`` most recently used folds.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES, root: Optional[str] = DEFAULT_FOLD_DIR,
+                 max_disk_entries: int = DEFAULT_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.root = root
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_entries = 0
+        if root is not None:
+            os.makedirs(root, exist_ok=True)
+            self._disk_entries = sum(name.endswith('.npy') for name in os.listdir(root))
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        if self.root is None:
+            return None
+
+        path = os.path.join(self.root, f"{key}.npy")
+        try:
+            value = np.load(path)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        with suppress(FileNotFoundError):
+            os.utime(path)
+        self._remember(key, value)
+        return value
+
+    def put(self, key: str, predictions: np.ndarray) -> None:
+        self._remember(key, predictions)
+        if self.root is None:
+            return
+
+        path = os.path.join(self.root, f"{key}.npy")
+        tmp_path = os.path.join(self.root, f".{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'wb') as fh:
+                np.save(fh, np.asarray(predictions))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not persist backtest fold {key}: {str(e)}")
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._disk_entries += 1
+            if self._disk_entries <= self.max_disk_entries:
+                return
+        self._evict_disk()
+
+    def _remember(self, key: str, predictions: np.ndarray) -> None:
+        with self._lock:
+            self._entries[key] = predictions
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        # Drop the least recently used tenth beyond the bound in one pass
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith('.npy'):
+                with suppress(FileNotFoundError):
+                    entries.append((os.path.getmtime(os.path.join(self.root, name)), name))
+        keep = self.max_disk_entries - self.max_disk_entries // 10
+        for _, name in sorted(entries)[:max(0, len(entries) - keep)]:
+            with suppress(FileNotFoundError):
+                os.remove(os.path.join(self.root, name))
+        with self._lock:
+            self._disk_entries = min(len(entries), keep)
+
+
+class Backtester:
+    """Rolling-origin backtests of a model family with an expanding training window
+
+    Every fold trains on all rows dated before its origin and predicts the
+    ``horizon_days`` that follow, never looking at later data. Per-item
+    specs fit one forest per item and fold; global specs fit one forest per
+    fold across all items. Folds are spread over the TrainingScheduler pool.
+
+    A fold's predictions are cached under a digest of the spec, the fold
+    and every row up to the end of its test window, so when a newer upload
+    only appends rows the earlier folds are reused and only the new ones
+    are fitted. The cache is kept on disk (CULIFLOW_DATASET_DIR/.backtest),
+    so this holds across restarts and gateway workers.
+    """
+
+    def __init__(self, spec: ModelSpec, horizon_days: int = DEFAULT_HORIZON_DAYS,
+                 step_days: int = DEFAULT_STEP_DAYS, n_folds: int = DEFAULT_FOLDS,
+                 scheduler: Optional[TrainingScheduler] = None, cache: Optional[FoldCache] = None):
+        if min(horizon_days, step_days, n_folds) < 1:
+            raise ValueError("horizon_days, step_days and n_folds must be positive")
+        self.spec = spec
+        self.horizon_days = int(horizon_days)
+        self.step_days = int(step_days)
+        self.n_folds = int(n_folds)
+        self.scheduler = scheduler or TrainingScheduler()
+        self.cache = cache or get_fold_cache()
+
+    @property
+    def input_columns(self):
+        if self.spec.mode == 'global':
+            return self.spec.feature_columns + ['item_name']
+        return self.spec.feature_columns
+
+    def _scopes(self, df: pd.DataFrame, item_names):
+        # Per-item folds are keyed by name, which survives re-encoding
+        if self.spec.mode == 'global':
+            yield 'global', df
+        else:
+            for item_code, item_data in df.groupby('item_name', sort=True):
+                yield str(item_names[item_code]), item_data
+
+    def evaluate(self, df: pd.DataFrame, item_names, target: str = 'quantity') -> Dict[str, Any]:
+        """Run every fold (fitting only uncached ones) and report metrics per item and horizon"""
+        days = df['date'].to_numpy().astype('datetime64[D]')
+        origins = fold_origins(days.min(), days.max(), self.horizon_days, self.step_days, self.n_folds)
+        horizon = np.timedelta64(self.horizon_days, 'D')
+        columns = self.input_columns
+        seed = json.dumps([self.spec.config(), self.horizon_days], sort_keys=True, default=str)
+
+        folds = []
+        tasks = {}
+        for scope, frame in self._scopes(df, item_names):
+            frame = frame.iloc[np.argsort(frame['date'].to_numpy(), kind='stable')]
+            frame_days = frame['date'].to_numpy().astype('datetime64[D]')
+            X = frame[columns].to_numpy(dtype=np.float64)
+            y = frame[target].to_numpy(dtype=np.float64)
+            row_hashes = pd.util.hash_pandas_object(frame[['date', *columns, target]], index=False).to_numpy()
+
+            # Running digest of the rows each successive fold can see
+            hasher = hashlib.blake2b(f"{seed}|{scope}".encode('utf-8'), digest_size=20)
+            hashed = 0
+            for origin in origins:
+                start, end = np.searchsorted(frame_days, [origin, origin + horizon])
+                hasher.update(row_hashes[hashed:end].tobytes())
+                hashed = end
+                if start < 2 or end == start:
+                    continue
+
+                fold_hasher = hasher.copy()
+                fold_hasher.update(str(origin).encode('utf-8'))
+                key = fold_hasher.hexdigest()
+                folds.append({
+                    'key': key,
+                    'scope': scope,
+                    'origin': origin,
+                    'actual': y[start:end],
+                    'horizon': (frame_days[start:end] - origin).astype(np.int64) + 1,
+                    'item_codes': X[start:end, -1].astype(int) if self.spec.mode == 'global' else None,
+                    'predicted': self.cache.get(key)
+                })
+                if folds[-1]['predicted'] is None:
+                    tasks[key] = {'X_train': X[:start], 'y_train': y[:start], 'X_test': X[start:end]}
+
+        results, failures = self.scheduler.run(fit_predict_fold, tasks, model_params=self.spec.model_params)
+        for key, predictions in results.items():
+            self.cache.put(key, predictions)
+        for fold in folds:
+            if fold['predicted'] is None:
+                fold['predicted'] = results.get(fold['key'])
+
+        return {
+            'origins': [str(origin) for origin in origins],
+            'horizon_days': self.horizon_days,
+            'folds_evaluated': len(results),
+            'folds_cached': len(folds) - len(tasks),
+            'failures': failures,
+            'items': self._report([fold for fold in folds if fold['predicted'] is not None], item_names)
+        }
+
+    def _report(self, folds, item_names) -> Dict[str, Any]:
+        pooled = {}
+        for fold in folds:
+            if fold['item_codes'] is None:
+                parts = [(fold['scope'], slice(None))]
+            else:
+                parts = [(str(item_names[code]), fold['item_codes'] == code)
+                         for code in np.unique(fold['item_codes'])]
+            for item_name, rows in parts:
+                item = pooled.setdefault(item_name, {'actual': [], 'predicted': [], 'horizon': [], 'folds': 0})
+                item['actual'].append(fold['actual'][rows])
+                item['predicted'].append(fold['predicted'][rows])
+                item['horizon'].append(fold['horizon'][rows])
+                item['folds'] += 1
+
+        report = {}
+        for item_name in sorted(pooled):
+            item = pooled[item_name]
+            actual = np.concatenate(item['actual'])
+            predicted = np.concatenate(item['predicted'])
+            horizons = np.concatenate(item['horizon'])
+            if len(actual) < 2:
+                continue
+            # Metrics need at least two rows; sparse horizons are left out
+            report[item_name] = {
+                'horizon_metrics': {
+                    str(h): forecast_metrics(actual[horizons == h], predicted[horizons == h])
+                    for h in range(1, self.horizon_days + 1) if np.count_nonzero(horizons == h) >= 2
+                },
+                'overall_metrics': forecast_metrics(actual, predicted),
+                'folds': item['folds']
+            }
+        return report
+
+
+_fold_cache = None
+_fold_cache_lock = threading.Lock()
+
+
+def get_fold_cache() -> FoldCache:
+    """Return the process-wide fold cache so backtests share fitted folds"""
+    global _fold_cache
+    with _fold_cache_lock:
+        if _fold_cache is None:
+            _fold_cache = FoldCache()
+        return _fold_cache
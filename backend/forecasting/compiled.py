@@ -0,0 +1,230 @@
+import os
+import uuid
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+COMPILED_FORMAT_VERSION = 2
+
+# Upper bound on the (trees x rows) node indices held at once during traversal
+TRAVERSAL_BLOCK = 1 << 20
+# Splits whose two leaves predict within this of each other are merged into one
+# leaf; 0 only merges identical leaves, which leaves every prediction unchanged
+PRUNE_TOLERANCE = float(os.environ.get('CULIFLOW_PRUNE_TOLERANCE', '0'))
+# Trees kept per forest (0 keeps them all); forest trees are exchangeable, so
+# the first ones are an unbiased subsample
+MAX_TREES = int(os.environ.get('CULIFLOW_MAX_TREES', '0'))
+
+
+def _folded_thresholds(tree, scaler) -> np.ndarray:
+    # Splitting the scaled value (x - mean) / scale at t is splitting x at t * scale + mean
+    threshold = np.asarray(tree.threshold, dtype=np.float64).copy()
+    if scaler is None:
+        return threshold
+    internal = tree.children_left >= 0
+    feature = tree.feature[internal]
+    if getattr(scaler, 'scale_', None) is not None:
+        threshold[internal] *= scaler.scale_[feature]
+    if getattr(scaler, 'mean_', None) is not None:
+        threshold[internal] += scaler.mean_[feature]
+    return threshold
+
+
+def _round_down_float32(values: np.ndarray) -> np.ndarray:
+    # x <= t and x <= t32 agree for every float32 x when t32 is the largest float32 <= t
+    rounded = values.astype(np.float32)
+    return np.where(rounded > values, np.nextafter(rounded, np.float32(-np.inf)), rounded)
+
+
+def _prune(is_split, left, right, value, tolerance):
+    """Turn splits whose two leaves agree within ``tolerance`` into leaves, bottom-up"""
+    while True:
+        splits = np.flatnonzero(is_split)
+        lo, hi = left[splits], right[splits]
+        mergeable = ~is_split[lo] & ~is_split[hi] & (np.abs(value[lo] - value[hi]) <= tolerance)
+        merged = splits[mergeable]
+        if not len(merged):
+            return
+        # A split's own value is the mean of its samples, i.e. of its leaves
+        if tolerance == 0:
+            value[merged] = value[left[merged]]
+        is_split[merged] = False
+
+
+def _flatten(trees, forest_trees, tolerance=0.0):
+    """Concatenate (tree_, scaler) pairs, prune them and renumber nodes breadth-first"""
+    sizes = np.array([tree.node_count for tree, _ in trees], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    left = np.concatenate([tree.children_left for tree, _ in trees]).astype(np.int64)
+    right = np.concatenate([tree.children_right for tree, _ in trees]).astype(np.int64)
+    is_split = left >= 0
+    node_offsets = np.repeat(offsets, sizes)
+    left[is_split] += node_offsets[is_split]
+    right[is_split] += node_offsets[is_split]
+    feature = np.concatenate([tree.feature for tree, _ in trees])
+    threshold = np.concatenate([_folded_thresholds(tree, scaler) for tree, scaler in trees])
+    value = np.concatenate([tree.value[:, 0, 0] for tree, _ in trees]).astype(np.float64)
+    _prune(is_split, left, right, value, tolerance)
+
+    # Roots take ids 0..n_trees-1; each level's children are numbered in pairs
+    new_id = np.empty(len(left), dtype=np.int64)
+    child = np.empty(len(left), dtype=np.int64)
+    order = [offsets]
+    new_id[offsets] = np.arange(len(offsets))
+    next_id, depth, frontier = len(offsets), 0, offsets
+    while True:
+        splits = frontier[is_split[frontier]]
+        leaves = frontier[~is_split[frontier]]
+        child[new_id[leaves]] = new_id[leaves]
+        if not len(splits):
+            break
+        kids = np.stack([left[splits], right[splits]], axis=1).ravel()
+        new_id[kids] = np.arange(next_id, next_id + len(kids))
+        child[new_id[splits]] = new_id[kids[::2]]
+        next_id += len(kids)
+        order.append(kids)
+        frontier = kids
+        depth += 1
+
+    order = np.concatenate(order)
+    split = is_split[order]
+    tree_forest = np.repeat(np.arange(len(forest_trees)), forest_trees)
+    node_forest = tree_forest[np.repeat(np.arange(len(trees)), sizes)[order]]
+    return (
+        child.astype(np.int32),
+        np.where(split, feature[order], 0).astype(np.int16),
+        _round_down_float32(np.where(split, threshold[order], np.inf)),
+        value[order].astype(np.float32),
+        depth,
+        np.bincount(node_forest, minlength=len(forest_trees))
+    )
+
+
+class CompiledForests:
+    """Many regression forests flattened into one set of contiguous node arrays
+
+    Built once from fitted per-item models (each forest plus the scaler
+    applied before it) and then evaluated with numpy alone: every tree of
+    every forest walks a batch of feature rows together, one level per
+    step, and each forest predicts the mean of its trees' leaf values as
+    ``RandomForestRegressor.predict`` does.
+
+    Scalers are folded into their forest's split thresholds, so raw
+    features go straight in. Nodes are renumbered breadth-first with the
+    two children of a split stored next to each other, so a step is
+    ``node = child[node] + (x > threshold[node])``; leaves point to
+    themselves with an infinite threshold and stay put. Repeated feature
+    rows are evaluated once.
+
+    Nodes take 14 bytes (int32 child, int16 feature, float32 threshold and
+    leaf value) against 72 for a fitted sklearn tree, and splits whose
+    leaves predict the same value are merged away. Thresholds are rounded
+    down to float32 and features compared as float32, as sklearn itself
+    does, so predictions only move by the float32 rounding of leaf values.
+    """
+
+    def __init__(self, keys, child, feature, threshold, value, forest_trees, depth: int,
+                 forest_nodes=None, names=None):
+        self.keys = np.asarray(keys, dtype=str)
+        self.names = np.asarray(names if names is not None else keys, dtype=str)
+        self.child = child
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.forest_trees = np.asarray(forest_trees, dtype=np.int64)
+        self.depth = int(depth)
+        self.forest_nodes = np.asarray(forest_nodes if forest_nodes is not None
+                                       else np.zeros(len(self.keys)), dtype=np.int64)
+        # Trees are stored forest by forest; these are each forest's first tree
+        self.tree_offsets = np.concatenate([[0], np.cumsum(self.forest_trees)[:-1]]).astype(np.int64)
+
+    @classmethod
+    def from_models(cls, models: Mapping[str, Any], names=None, max_trees: int = MAX_TREES,
+                    tolerance: float = PRUNE_TOLERANCE) -> 'CompiledForests':
+        """Compile per-item {'model', 'scaler'} entries, keeping the keys of ``models``
+
+        ``names`` labels each forest (e.g. the decoded item names) in reports.
+        """
+        keys, trees, forest_trees = [], [], []
+        for key, model_info in models.items():
+            estimators = model_info['model'].estimators_[:max_trees or None]
+            keys.append(str(key))
+            forest_trees.append(len(estimators))
+            trees.extend((estimator.tree_, model_info.get('scaler')) for estimator in estimators)
+        if not trees:
+            return cls(keys, np.array([], dtype=np.int32), np.array([], dtype=np.int16),
+                       np.array([], dtype=np.float32), np.array([], dtype=np.float32),
+                       forest_trees, 0, names=names)
+        child, feature, threshold, value, depth, forest_nodes = _flatten(trees, forest_trees, tolerance)
+        return cls(keys, child, feature, threshold, value, forest_trees, depth, forest_nodes, names)
+
+    @property
+    def n_trees(self) -> int:
+        return int(self.forest_trees.sum())
+
+    @property
+    def node_bytes(self) -> int:
+        return sum(a.itemsize for a in (self.child, self.feature, self.threshold, self.value))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.child, self.feature, self.threshold, self.value))
+
+    def item_nbytes(self) -> Dict[str, int]:
+        """Bytes of each forest's nodes, keyed by forest name"""
+        return {str(name): int(nodes) * self.node_bytes for name, nodes in zip(self.names, self.forest_nodes)}
+
+    def predict(self, X) -> np.ndarray:
+        """Predictions of every forest for every row, shape (n_forests, n_rows)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        unique, inverse = np.unique(X, axis=0, return_inverse=True)
+        return self._predict_rows(unique)[:, inverse.reshape(-1)]
+
+    def _predict_rows(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        out = np.zeros((len(self.keys), n_rows))
+        if not self.n_trees:
+            return out
+
+        flat = np.ascontiguousarray(X).ravel()
+        roots = np.arange(self.n_trees, dtype=np.int32)[:, None]
+        block = max(1, TRAVERSAL_BLOCK // self.n_trees)
+        for start in range(0, n_rows, block):
+            stop = min(start + block, n_rows)
+            row_base = (np.arange(start, stop, dtype=np.int64) * n_features)[None, :]
+            node = np.repeat(roots, stop - start, axis=1)
+            for _ in range(self.depth):
+                x = flat[row_base + self.feature[node]]
+                node = self.child[node] + (x > self.threshold[node])
+            sums = np.add.reduceat(self.value[node], self.tree_offsets, axis=0, dtype=np.float64)
+            out[:, start:stop] = sums / self.forest_trees[:, None]
+        return out
+
+    def save(self, path: str) -> None:
+        """Write the arrays to an .npz file, atomically"""
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'wb') as fh:
+                np.savez(fh, version=COMPILED_FORMAT_VERSION, keys=self.keys, names=self.names,
+                         child=self.child, feature=self.feature, threshold=self.threshold,
+                         value=self.value, forest_trees=self.forest_trees,
+                         forest_nodes=self.forest_nodes, depth=self.depth)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['CompiledForests']:
+        """Read a saved set, or None if it is missing or from another format version"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version']) != COMPILED_FORMAT_VERSION:
+                    return None
+                return cls(data['keys'], data['child'], data['feature'], data['threshold'],
+                           data['value'], data['forest_trees'], int(data['depth']),
+                           data['forest_nodes'], data['names'])
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
@@ -0,0 +1,184 @@
+import json
+import os
+import pickle
+import shutil
+import time
+import uuid
+from contextlib import suppress
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from telemetry import stage
+
+from .model_registry import config_digest, file_digest
+
+DATASET_FORMAT_VERSION = 5
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATASET_DIR = os.environ.get(
+    'CULIFLOW_DATASET_DIR',
+    os.path.join(BACKEND_DIR, '.cache', 'datasets')
+)
+DEFAULT_MAX_BYTES = int(os.environ.get('CULIFLOW_DATASET_CACHE_MB', '1024')) * 1024 * 1024
+
+
+class DatasetCache:
+    """Columnar on-disk cache of preprocessed sales frames
+
+    Each cached frame is a directory holding one ``.npy`` file per column
+    (categoricals as integer codes plus their categories) and a manifest.
+    Loading memory-maps the column files, so a repeat request skips CSV
+    parsing, date conversion and encoder fitting entirely. Fitted encoders
+    and other small artifacts are stored next to the columns with joblib.
+    """
+
+    def __init__(self, root: str = DEFAULT_DATASET_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def make_key(self, csv_path: str, namespace: str, config: Optional[Dict[str, Any]] = None,
+                 data_digest: Optional[str] = None) -> str:
+        """Key a preprocessed frame by source file contents and preprocessing config"""
+        payload = dict(config or {})
+        # config_digest sets '_format' to the registry's version, so use a separate field
+        payload['_dataset_format'] = DATASET_FORMAT_VERSION
+        data_digest = data_digest or file_digest(csv_path)
+        return f"{namespace}-{data_digest[:32]}-{config_digest(payload)[:12]}"
+
+    def load(self, key: str, mmap_mode: Optional[str] = 'r') -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """Return (frame, artifacts) for ``key`` or None on a cache miss"""
+        path = os.path.join(self.root, key)
+        manifest_path = os.path.join(path, 'manifest.json')
+        try:
+            with open(manifest_path, 'r') as fh:
+                manifest = json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # Columns can vanish under a concurrent evict or be cut short by a crash mid-save;
+        # either way the entry is treated as a miss and rebuilt
+        try:
+            columns = {}
+            for column in manifest['columns']:
+                values = np.load(os.path.join(path, column['file']), mmap_mode=mmap_mode)
+                if column['kind'] == 'category':
+                    values = pd.Categorical.from_codes(values, categories=column['categories'])
+                columns[column['name']] = values
+            df = pd.DataFrame(columns, copy=False)
+
+            artifacts = {}
+            artifacts_path = os.path.join(path, 'artifacts.joblib')
+            if os.path.exists(artifacts_path):
+                artifacts = joblib.load(artifacts_path)
+        except (FileNotFoundError, ValueError, EOFError, pickle.UnpicklingError) as e:
+            print(f"Ignoring unreadable cached dataset {key}: {str(e)}")
+            return None
+
+        now = time.time()
+        with suppress(FileNotFoundError):
+            os.utime(manifest_path, (now, now))
+        return df, artifacts
+
+    def save(self, key: str, df: pd.DataFrame, artifacts: Optional[Dict[str, Any]] = None) -> str:
+        """Write ``df`` column by column under ``key``
+
+        Numeric and datetime columns are stored as-is; string columns are
+        stored as categoricals.
+        """
+        final_path = os.path.join(self.root, key)
+        tmp_path = os.path.join(self.root, f".tmp-{key}-{uuid.uuid4().hex}")
+        os.makedirs(tmp_path)
+
+        try:
+            columns = []
+            for i, name in enumerate(df.columns):
+                series = df[name]
+                file_name = f"col{i}.npy"
+                if isinstance(series.dtype, pd.CategoricalDtype) or not (
+                    pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_dtype(series)
+                ):
+                    categorical = pd.Categorical(series)
+                    np.save(os.path.join(tmp_path, file_name), categorical.codes)
+                    columns.append({
+                        'name': name,
+                        'file': file_name,
+                        'kind': 'category',
+                        'categories': categorical.categories.tolist()
+                    })
+                else:
+                    np.save(os.path.join(tmp_path, file_name), series.to_numpy())
+                    columns.append({'name': name, 'file': file_name, 'kind': 'array'})
+
+            if artifacts:
+                joblib.dump(artifacts, os.path.join(tmp_path, 'artifacts.joblib'))
+
+            with open(os.path.join(tmp_path, 'manifest.json'), 'w') as fh:
+                json.dump({'key': key, 'rows': len(df), 'columns': columns}, fh, default=str)
+
+            if os.path.exists(final_path):
+                shutil.rmtree(final_path, ignore_errors=True)
+            os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self.evict(keep=key)
+        return final_path
+
+    def load_or_build(self, csv_path: str, namespace: str,
+                      build: Callable[[], Tuple[pd.DataFrame, Dict[str, Any]]],
+                      config: Optional[Dict[str, Any]] = None,
+                      data_digest: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Return the cached frame for ``csv_path`` or build, store and return it"""
+        key = self.make_key(csv_path, namespace, config, data_digest)
+        with stage('dataset_load'):
+            cached = self.load(key)
+        if cached is not None:
+            return cached
+
+        df, artifacts = build()
+        try:
+            self.save(key, df, artifacts)
+        except OSError as e:
+            print(f"Error caching preprocessed dataset: {str(e)}")
+        return df, artifacts
+
+    def evict(self, keep: Optional[str] = None) -> list:
+        """Remove least recently used datasets until the cache fits max_bytes"""
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            manifest_path = os.path.join(path, 'manifest.json')
+            if name.startswith('.') or not os.path.exists(manifest_path):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(path, file_name)) for file_name in os.listdir(path)
+            )
+            entries.append((os.path.getmtime(manifest_path), name, size))
+
+        total = sum(size for _, _, size in entries)
+        evicted = []
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            total -= size
+            evicted.append(name)
+        return evicted
+
+
+_default_cache = None
+
+
+def get_dataset_cache() -> DatasetCache:
+    """Return the process-wide preprocessed dataset cache"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DatasetCache()
+    return _default_cache
@@ -0,0 +1,111 @@
+import json
+import os
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+SEASON_NAMES = np.array(['Summer', 'Monsoon', 'Post-Monsoon', 'Winter'])
+# Season code per month, indexed by month number (index 0 unused)
+SEASON_CODE_BY_MONTH = np.array([3, 3, 3, 0, 0, 0, 1, 1, 1, 1, 2, 2, 3], dtype='int8')
+SEASON_CODES = {name: code for code, name in enumerate(SEASON_NAMES)}
+
+# Forecasts are made per two-hour slot over the operating day; a slot is
+# identified by its starting hour
+SLOT_HOURS = 2
+# Opening and closing hour (exclusive) as "open-close", e.g. "8-23"
+DEFAULT_OPERATING_HOURS = os.environ.get('CULIFLOW_OPERATING_HOURS', '8-23')
+# Per-outlet overrides as JSON, e.g. '{"airport": "6-24", "mall": [10, 22]}'
+OUTLET_HOURS = os.environ.get('CULIFLOW_OUTLET_HOURS', '{}')
+
+
+def hour_of_day(times: pd.Series) -> np.ndarray:
+    """Hour from HH:MM:SS strings; unparseable values map to 0"""
+    hours = pd.to_datetime(times, format='%H:%M:%S', errors='coerce').dt.hour
+    return hours.fillna(0).to_numpy(dtype='int8')
+
+
+def season_codes(months) -> np.ndarray:
+    """Indian season code (SEASON_NAMES index) for each month number"""
+    return SEASON_CODE_BY_MONTH[np.asarray(months, dtype=int)]
+
+
+def add_calendar_features(df: pd.DataFrame, date_column: str = 'date') -> pd.DataFrame:
+    """Add day_of_week, month, is_weekend and season columns from a datetime column"""
+    dates = df[date_column].dt
+    day_of_week = dates.dayofweek.to_numpy(dtype='int8')
+    month = dates.month.to_numpy(dtype='int8')
+    df['day_of_week'] = day_of_week
+    df['month'] = month
+    df['is_weekend'] = (day_of_week >= 5).astype('int8')
+    df['season'] = SEASON_CODE_BY_MONTH[month]
+    return df
+
+
+def holiday_flags(dates, holiday_dates) -> np.ndarray:
+    """Whether each date is one of ``holiday_dates``, by np.isin on day ordinals"""
+    days = np.asarray(dates, dtype='datetime64[D]').view(np.int64)
+    holidays = np.asarray(holiday_dates, dtype='datetime64[D]').view(np.int64)
+    return np.isin(days, holidays)
+
+
+def parse_operating_hours(hours) -> Tuple[int, int]:
+    """(open, close) from "open-close" or a two-item sequence, close exclusive"""
+    if isinstance(hours, str):
+        hours = hours.split('-')
+    opening, closing = (int(hour) for hour in hours)
+    if not 0 <= opening < closing <= 24:
+        raise ValueError(f"Invalid operating hours: {opening}-{closing}")
+    return opening, closing
+
+
+def slot_of_hour(hours, slot_hours: int = SLOT_HOURS, origin: Optional[int] = None) -> np.ndarray:
+    """Starting hour of the slot each hour falls in
+
+    Slots start every ``slot_hours`` from ``origin`` (SLOT_ORIGIN by
+    default), wrapping past midnight, so training rows and forecast slots
+    share one grid.
+    """
+    origin = SLOT_ORIGIN if origin is None else origin
+    hours = np.asarray(hours, dtype=np.int64)
+    return (hours - (hours - origin) % slot_hours) % 24
+
+
+def operating_slots(opening: int, closing: int, slot_hours: int = SLOT_HOURS) -> Tuple[int, ...]:
+    """Starting hour of every slot between opening and closing
+
+    An opening hour off the slot grid is rounded down onto it (with a
+    two-hour grid on even hours, a 9 o'clock opening forecasts from the
+    8-10 slot), since the models only ever see slots on that grid. A slot
+    that would start before midnight is dropped instead.
+    """
+    first = opening - (opening - SLOT_ORIGIN) % slot_hours
+    return tuple(range(first if first >= 0 else first + slot_hours, closing, slot_hours))
+
+
+def outlet_slots(outlet: Optional[str] = None) -> Tuple[int, ...]:
+    """Forecast slots of an outlet from CULIFLOW_OUTLET_HOURS, else the default hours"""
+    hours = json.loads(OUTLET_HOURS).get(outlet) if outlet else None
+    return operating_slots(*parse_operating_hours(hours or DEFAULT_OPERATING_HOURS))
+
+
+# Slots are aligned on the default opening hour; outlets opening off this grid are rounded onto it
+SLOT_ORIGIN = parse_operating_hours(DEFAULT_OPERATING_HOURS)[0] % SLOT_HOURS
+OPERATING_SLOTS = operating_slots(*parse_operating_hours(DEFAULT_OPERATING_HOURS))
+
+
+@lru_cache(maxsize=64)
+def future_slot_grid(start_date: pd.Timestamp, num_days: int,
+                     slots: Tuple[int, ...] = OPERATING_SLOTS) -> pd.DataFrame:
+    """Feature rows for every (day, slot) from ``start_date``, day-major
+
+    Built as a Cartesian product of the dates and slots. Cached per
+    (start_date, num_days, slots), so callers must not modify the frame.
+    """
+    dates = pd.date_range(start=start_date, periods=num_days, freq='D')
+    grid = pd.DataFrame({
+        'date': np.repeat(dates.to_numpy(), len(slots)),
+        'hour': np.tile(np.asarray(slots, dtype='int8'), num_days)
+    })
+    return add_calendar_features(grid)
@@ -0,0 +1,109 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.preprocessing import StandardScaler
+
+from .parallel_training import recent_holdout
+
+ITEM_FEATURE = 'item_name'
+
+
+class GlobalItemModel:
+    """Single forest trained across all items with the item code as a feature
+
+    Replaces the per-item loop of separate forests: the whole frame is fitted
+    once and predictions for every item come from one batched ``predict``
+    call over the item x row grid.
+    """
+
+    def __init__(self, feature_columns: List[str], model_params: Dict[str, Any],
+                 holdout_days: Optional[int] = None):
+        self.feature_columns = list(feature_columns)
+        self.model_params = dict(model_params)
+        self.holdout_days = holdout_days
+        self.scaler = StandardScaler()
+        self.model = None
+        self.item_codes = np.array([], dtype=int)
+        self.metrics = {}
+        self.holdout = None
+
+    @property
+    def input_columns(self) -> List[str]:
+        return self.feature_columns + [ITEM_FEATURE]
+
+    def fit(self, df: pd.DataFrame, target: str = 'quantity') -> 'GlobalItemModel':
+        """Fit on all items at once
+
+        With ``holdout_days`` each item's last days are held out, as in the
+        per-item scorecard fits, and per-item holdout metrics are recorded;
+        otherwise every row is used for training.
+        """
+        X = df[self.input_columns].to_numpy(dtype=float)
+        y = df[target].to_numpy(dtype=float)
+        self.item_codes = np.sort(df[ITEM_FEATURE].unique())
+
+        if self.holdout_days is None:
+            self.model = RandomForestRegressor(**self.model_params)
+            self.model.fit(self.scaler.fit_transform(X), y)
+            return self
+
+        dates = df['date'].to_numpy()
+        test = np.zeros(len(df), dtype=bool)
+        for rows in df.groupby(ITEM_FEATURE, sort=False).indices.values():
+            test[rows] = recent_holdout(dates[rows], self.holdout_days)
+        X_train, X_test, y_train, y_test = X[~test], X[test], y[~test], y[test]
+        X_train_scaled = self.scaler.fit_transform(X_train)
+
+        self.model = RandomForestRegressor(**self.model_params)
+        self.model.fit(X_train_scaled, y_train)
+
+        y_pred = self.model.predict(self.scaler.transform(X_test))
+        # Holdout rows keep the source index so callers can join back dates
+        self.holdout = pd.DataFrame({
+            ITEM_FEATURE: X_test[:, -1].astype(int),
+            'actual': y_test,
+            'predicted': y_pred
+        }, index=df.index[test])
+        self.metrics = self._per_item_metrics(self.holdout)
+        return self
+
+    def predict_frame(self, df: pd.DataFrame) -> np.ndarray:
+        """Predict rows that already carry an item code column"""
+        X = df[self.input_columns].to_numpy(dtype=float)
+        return self.model.predict(self.scaler.transform(X))
+
+    def predict_items(self, features: pd.DataFrame,
+                      item_codes: Optional[np.ndarray] = None) -> np.ndarray:
+        """Score every item against the same feature rows in one call
+
+        Returns an array of shape (n_items, n_rows) ordered like ``item_codes``.
+        """
+        if item_codes is None:
+            item_codes = self.item_codes
+        item_codes = np.asarray(item_codes)
+        base = features[self.feature_columns].to_numpy(dtype=float)
+        n_rows = len(base)
+
+        grid = np.empty((len(item_codes) * n_rows, base.shape[1] + 1), dtype=float)
+        grid[:, :-1] = np.tile(base, (len(item_codes), 1))
+        grid[:, -1] = np.repeat(item_codes, n_rows)
+
+        predictions = self.model.predict(self.scaler.transform(grid))
+        return predictions.reshape(len(item_codes), n_rows)
+
+    def _per_item_metrics(self, holdout: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+        metrics = {}
+        for item_code, group in holdout.groupby(ITEM_FEATURE, sort=True):
+            try:
+                metrics[str(item_code)] = {
+                    'mae': float(mean_absolute_error(group['actual'], group['predicted'])),
+                    'rmse': float(np.sqrt(mean_squared_error(group['actual'], group['predicted']))),
+                    'r2': float(r2_score(group['actual'], group['predicted']))
+                }
+            except Exception as e:
+                print(f"Error in model evaluation for item {item_code}: {str(e)}")
+                metrics[str(item_code)] = {'mae': np.nan, 'rmse': np.nan, 'r2': np.nan}
+        return metrics
@@ -0,0 +1,152 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .features import holiday_flags
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_DIR = os.path.join(BACKEND_DIR, '.cache', 'holidays')
+DEFAULT_OFFLINE_CALENDAR = os.path.join(BACKEND_DIR, 'fixtures', 'holidays_{country}.json')
+
+MAJOR_HOLIDAY_TYPES = ('National holiday', 'Major holiday')
+MAJOR_HOLIDAY_FACTOR = 1.3
+MINOR_HOLIDAY_FACTOR = 1.15
+
+
+def holiday_factor(holiday: Dict) -> float:
+    """Demand factor for a Calendarific holiday record"""
+    if holiday.get('type', [''])[0] in MAJOR_HOLIDAY_TYPES:
+        return MAJOR_HOLIDAY_FACTOR
+    return MINOR_HOLIDAY_FACTOR
+
+
+class HolidayIndex:
+    """Date -> (name, factor) lookup backed by a sorted datetime64 array
+
+    Single dates resolve through a dict; whole date columns are flagged with
+    the shared ``holiday_flags`` and their names and factors found in one
+    ``np.searchsorted`` pass.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Tuple[str, float]]] = None):
+        self.entries = dict(entries or {})
+        ordered = sorted(self.entries.items())
+        self._dates = np.array([d for d, _ in ordered], dtype='datetime64[D]')
+        self._names = np.array([v[0] for _, v in ordered], dtype=object)
+        self._factors = np.array([v[1] for _, v in ordered], dtype=float)
+
+    @classmethod
+    def from_calendarific(cls, holidays: Iterable[Dict]) -> 'HolidayIndex':
+        """Build from Calendarific holiday records; first record per date wins"""
+        entries = {}
+        for holiday in holidays:
+            date_str = holiday['date']['iso'][:10]
+            if date_str not in entries:
+                entries[date_str] = (holiday['name'], holiday_factor(holiday))
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, date) -> Tuple[bool, Optional[str], float]:
+        """Return (is_holiday, name, factor) for a single date"""
+        entry = self.entries.get(date.strftime('%Y-%m-%d'))
+        if entry is None:
+            return False, None, 1.0
+        return True, entry[0], entry[1]
+
+    def lookup_many(self, dates) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized lookup returning (is_holiday, names, factors) arrays"""
+        targets = np.asarray(dates, dtype='datetime64[D]')
+        if len(self._dates) == 0:
+            return (np.zeros(targets.shape, dtype=bool),
+                    np.full(targets.shape, None, dtype=object),
+                    np.ones(targets.shape, dtype=float))
+
+        is_holiday = holiday_flags(targets, self._dates)
+        positions = np.clip(np.searchsorted(self._dates, targets), 0, len(self._dates) - 1)
+        names = np.where(is_holiday, self._names[positions], None)
+        factors = np.where(is_holiday, self._factors[positions], 1.0)
+        return is_holiday, names, factors
+
+    def to_json(self) -> Dict[str, List]:
+        return {date: [name, factor] for date, (name, factor) in self.entries.items()}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, List]) -> 'HolidayIndex':
+        return cls({date: (value[0], float(value[1])) for date, value in data.items()})
+
+
+class HolidayIndexStore:
+    """Holiday indexes per (country, year), cached in memory and on disk"""
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR):
+        self.index_dir = index_dir
+        self._indexes = {}
+
+    def _path(self, country: str, year: int) -> str:
+        return os.path.join(self.index_dir, f"{country}-{year}.json")
+
+    def get(self, country: str, year: int) -> Optional[HolidayIndex]:
+        """Return the index from memory or disk, or None if it was never built"""
+        key = (country, year)
+        if key in self._indexes:
+            return self._indexes[key]
+
+        path = self._path(country, year)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as fh:
+                index = HolidayIndex.from_json(json.load(fh))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable holiday index {path}: {str(e)}")
+            return None
+        self._indexes[key] = index
+        return index
+
+    def put(self, country: str, year: int, index: HolidayIndex, persist: bool = True) -> None:
+        self._indexes[(country, year)] = index
+        if not persist:
+            return
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            path = self._path(country, year)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as fh:
+                json.dump(index.to_json(), fh)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error persisting holiday index: {str(e)}")
+
+    def load_offline_calendar(self, country: str, path: Optional[str] = None,
+                              persist: bool = True) -> List[int]:
+        """Bulk load a bundled Calendarific-format calendar, one index per year
+
+        Returns the years that were loaded.
+        """
+        path = path or DEFAULT_OFFLINE_CALENDAR.format(country=country)
+        with open(path, 'r') as fh:
+            data = json.load(fh)
+
+        by_year = {}
+        for holiday in data.get('holidays', []):
+            year = int(holiday['date']['iso'][:4])
+            by_year.setdefault(year, []).append(holiday)
+
+        for year, holidays in by_year.items():
+            self.put(country, year, HolidayIndex.from_calendarific(holidays), persist=persist)
+        return sorted(by_year)
+
+
+_default_store = None
+
+
+def get_holiday_store() -> HolidayIndexStore:
+    """Return the process-wide holiday index store"""
+    global _default_store
+    if _default_store is None:
+        _default_store = HolidayIndexStore(os.environ.get('CULIFLOW_HOLIDAY_DIR', DEFAULT_INDEX_DIR))
+    return _default_store
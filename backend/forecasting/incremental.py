@@ -0,0 +1,245 @@
+import copy
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from .global_model import ITEM_FEATURE
+from .parallel_training import TrainingScheduler, fit_item_forest
+from .specs import ModelSpec
+
+REFRESH_WINDOW_DAYS = int(os.environ.get('CULIFLOW_REFRESH_WINDOW_DAYS', '28'))
+REFRESH_TREES = int(os.environ.get('CULIFLOW_REFRESH_TREES', '10'))
+# Forests are refitted from scratch once refreshes have grown them by this fraction
+MAX_FOREST_GROWTH = float(os.environ.get('CULIFLOW_MAX_FOREST_GROWTH', '0.5'))
+# Most recent registry entries of a spec considered as the base of an update
+PARENT_CANDIDATES = int(os.environ.get('CULIFLOW_UPDATE_CANDIDATES', '8'))
+
+
+def _regression_metrics(actual, predicted) -> Dict[str, float]:
+    return {
+        'mae': float(mean_absolute_error(actual, predicted)),
+        'rmse': float(np.sqrt(mean_squared_error(actual, predicted))),
+        'r2': float(r2_score(actual, predicted))
+    }
+
+
+def _grown_forest(model, n_trees: int):
+    # Shallow copy with its own tree list, so the stored forest is never mutated
+    grown = copy.copy(model)
+    grown.estimators_ = list(model.estimators_)
+    grown.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees)
+    return grown
+
+
+def extend_item_forest(model_info: Dict[str, Any], X_recent, y_recent, X_new, y_new,
+                       n_trees: int, n_jobs: Optional[int] = None) -> Dict[str, Any]:
+    """Copy of an item's forest with ``n_trees`` more trees fitted on recent rows
+
+    The item's stored scaler is kept, so new trees see features scaled as
+    at prediction time. Metrics are the old forest's errors on the appended
+    rows, an out-of-sample check of the model being updated.
+    """
+    scaler = model_info['scaler']
+    metrics = model_info.get('metrics', {})
+    if len(y_new) >= 2:
+        metrics = _regression_metrics(y_new, model_info['model'].predict(scaler.transform(X_new)))
+
+    model = _grown_forest(model_info['model'], n_trees)
+    model.set_params(n_jobs=n_jobs)
+    model.fit(scaler.transform(X_recent), y_recent)
+    model.set_params(warm_start=False, n_jobs=None)
+    return {'model': model, 'scaler': scaler, 'metrics': metrics}
+
+
+def extend_global_model(global_model, recent: pd.DataFrame, new: pd.DataFrame,
+                        n_trees: int, target: str = 'quantity'):
+    """Copy of a GlobalItemModel with ``n_trees`` more trees fitted on recent rows"""
+    updated = copy.copy(global_model)
+    if len(new) >= 2:
+        predicted = global_model.predict_frame(new)
+        updated.metrics = global_model._per_item_metrics(pd.DataFrame({
+            ITEM_FEATURE: new[ITEM_FEATURE].to_numpy(),
+            'actual': new[target].to_numpy(),
+            'predicted': predicted
+        }))
+    # Holdout row labels refer to the table the base model was fitted on
+    updated.holdout = None
+
+    updated.model = _grown_forest(global_model.model, n_trees)
+    X = recent[global_model.input_columns].to_numpy(dtype=float)
+    updated.model.fit(global_model.scaler.transform(X), recent[target].to_numpy(dtype=float))
+    updated.model.set_params(warm_start=False)
+    return updated
+
+
+class ModelUpdater:
+    """Brings a trained model set up to date with rows appended since its fit
+
+    A model set is stored with a snapshot of its training table: the last
+    date (the watermark) and, per item, the row count and a wrapping sum of
+    row hashes, which does not depend on row order. On a newer upload each
+    item's rows up to the old watermark are digested the same way, so an
+    item is
+
+    - reused when it has no rows past the watermark,
+    - extended with ``REFRESH_TREES`` warm-started trees fitted on its last
+      ``REFRESH_WINDOW_DAYS`` (or all of its new rows if that is longer),
+    - refitted from scratch when it is new, its history changed, or its
+      forest has already grown by ``MAX_FOREST_GROWTH``.
+
+    Global specs are extended as a whole when every item qualifies and the
+    item set is unchanged (item codes are a model feature), otherwise they
+    are refitted. A nightly refresh therefore costs a few small forests per
+    changed item instead of a full retrain of the history.
+    """
+
+    def __init__(self, spec: ModelSpec, df: pd.DataFrame, item_names,
+                 scheduler: Optional[TrainingScheduler] = None, target: str = 'quantity'):
+        self.spec = spec
+        self.df = df
+        self.item_names = np.asarray(item_names)
+        self.target = target
+        self.scheduler = scheduler or TrainingScheduler()
+        self.failures = {}
+        self.summary = {}
+        self.codes = df['item_name'].to_numpy(dtype=np.int64)
+        self.days = df['date'].to_numpy().astype('datetime64[D]')
+        self.hashes = pd.util.hash_pandas_object(
+            df[['date', *spec.feature_columns, target]], index=False
+        ).to_numpy()
+
+    def _digests(self, rows) -> Tuple[np.ndarray, np.ndarray]:
+        n_items = len(self.item_names)
+        counts = np.bincount(self.codes[rows], minlength=n_items)
+        sums = np.zeros(n_items, dtype=np.uint64)
+        np.add.at(sums, self.codes[rows], self.hashes[rows])
+        return counts, sums
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Watermark and per-item digests of the table, stored with its model set"""
+        counts, sums = self._digests(slice(None))
+        return {
+            'watermark': str(self.days.max()) if len(self.days) else None,
+            'items': {str(self.item_names[code]): [int(counts[code]), int(sums[code])]
+                      for code in np.flatnonzero(counts)}
+        }
+
+    def plan(self, parent_snapshot: Dict[str, Any]) -> Dict[str, str]:
+        """'reuse', 'extend' or 'refit' for every item of the table"""
+        watermark = np.datetime64(parent_snapshot['watermark'], 'D')
+        old = self.days <= watermark
+        counts, sums = self._digests(old)
+        total = np.bincount(self.codes, minlength=len(self.item_names))
+        appended = total - counts
+
+        actions = {}
+        for code in np.flatnonzero(total):
+            name = str(self.item_names[code])
+            if parent_snapshot['items'].get(name) != [int(counts[code]), int(sums[code])]:
+                actions[name] = 'refit'
+            else:
+                actions[name] = 'extend' if appended[code] else 'reuse'
+        return actions
+
+    def find_parent(self, registry, exclude=()) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Registry key of the best base for an update and its plan, if any"""
+        config = json.loads(json.dumps(self.spec.config(), default=str))
+        manifests = registry.find(
+            lambda manifest: manifest.get('metadata', {}).get('spec') == config
+            and 'snapshot' in manifest['metadata'] and manifest['key'] not in exclude,
+            limit=PARENT_CANDIDATES
+        )
+
+        best = None
+        for manifest in manifests:
+            key, snapshot = manifest['key'], manifest['metadata']['snapshot']
+            actions = self.plan(snapshot)
+            kept = sum(action != 'refit' for action in actions.values())
+            if self.spec.mode == 'global' and (kept < len(actions) or set(actions) != set(snapshot['items'])):
+                continue
+            if kept and (best is None or kept > best[0]):
+                best = (kept, key, actions)
+        return None if best is None else best[1:]
+
+    def _recent_rows(self, watermark) -> np.ndarray:
+        last = self.days.max()
+        start = min(watermark, last - np.timedelta64(REFRESH_WINDOW_DAYS, 'D'))
+        return self.days > start
+
+    def _outgrown(self, model) -> bool:
+        base = self.spec.model_params.get('n_estimators', 100)
+        return len(model.estimators_) + REFRESH_TREES > base * (1 + MAX_FOREST_GROWTH)
+
+    def update(self, parent, actions: Dict[str, str]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Update a parent RegistryEntry, or return None to refit everything
+
+        Returns the new and changed models plus registry links (item code to
+        the parent's model file and metrics) for the items reused as they are.
+        """
+        watermark = np.datetime64(parent.metadata['snapshot']['watermark'], 'D')
+        recent = self._recent_rows(watermark)
+        new = self.days > watermark
+
+        if self.spec.mode == 'global':
+            global_model = parent.models['global']['model']
+            if self._outgrown(global_model.model):
+                return None
+            if not new.any():
+                self.summary = {'reused': 1}
+                return {}, {'global': (parent.models.path('global'), parent.models.metrics.get('global', {}))}
+            updated = extend_global_model(global_model, self.df[recent], self.df[new],
+                                          REFRESH_TREES, self.target)
+            self.summary = {'extended': 1}
+            return {'global': {'model': updated, 'metrics': updated.metrics}}, {}
+
+        parent_codes = {str(name): str(code) for code, name in
+                        enumerate(parent.encoders['item_name'].classes_)}
+        columns = self.spec.feature_columns
+        links, refit, extend = {}, {}, {}
+        for item_code, rows in self.df.groupby('item_name', sort=False).indices.items():
+            name = str(self.item_names[item_code])
+            action = actions.get(name, 'refit')
+            parent_code = parent_codes.get(name)
+            if parent_code not in parent.models:
+                action = 'refit'
+            if action == 'reuse':
+                links[str(item_code)] = (parent.models.path(parent_code),
+                                         parent.models.metrics.get(parent_code, {}))
+                continue
+
+            model_info = parent.models[parent_code] if action == 'extend' else None
+            if model_info is not None and self._outgrown(model_info['model']):
+                action = 'refit'
+            if action == 'refit' and len(rows) < 2:
+                print(f"Skipping {name} - insufficient data")
+                continue
+
+            item_data = self.df.iloc[rows]
+            if action == 'extend':
+                item_recent, item_new = recent[rows], new[rows]
+                extend[str(item_code)] = {
+                    'model_info': {k: v for k, v in model_info.items() if k != 'holdout'},
+                    'X_recent': item_data.loc[item_recent, columns],
+                    'y_recent': item_data.loc[item_recent, self.target],
+                    'X_new': item_data.loc[item_new, columns],
+                    'y_new': item_data.loc[item_new, self.target]
+                }
+            else:
+                refit[str(item_code)] = {'X': item_data[columns], 'y': item_data[self.target]}
+
+        self.summary = {'reused': len(links), 'extended': len(extend), 'refitted': len(refit)}
+        print(f"Updating {self.spec.name} models from the {watermark} snapshot: "
+              f"{len(links)} reused, {len(extend)} extended, {len(refit)} refitted")
+        extended, failures = self.scheduler.run(extend_item_forest, extend, n_trees=REFRESH_TREES)
+        refitted, refit_failures = self.scheduler.run(fit_item_forest, refit,
+                                                      model_params=self.spec.model_params)
+        failures.update(refit_failures)
+        self.failures = failures
+        for item_code, error in failures.items():
+            print(f"Error updating model for item {item_code}: {error}")
+
+        return {**extended, **refitted}, links
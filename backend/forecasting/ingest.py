@@ -0,0 +1,165 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .features import OPERATING_SLOTS, SLOT_HOURS, add_calendar_features, hour_of_day, slot_of_hour
+
+DEFAULT_CHUNKSIZE = 250_000
+
+# Compact dtypes for the POS export columns; anything not listed is read as-is
+CATEGORY_COLUMNS = [
+    'item_name', 'item_type', 'spice_level', 'transaction_type',
+    'received_by', 'season', 'weather'
+]
+SALES_DTYPES = {column: 'category' for column in CATEGORY_COLUMNS}
+SALES_DTYPES.update({
+    'item_price': 'float32',
+    'transaction_amount': 'float32'
+})
+
+AGGREGATE_KEYS = ['item_name', 'date', 'hour']
+
+
+def parse_sales_dates(dates: pd.Series) -> pd.Series:
+    """Parse the ``date`` column, accepting DD-MM-YYYY or YYYY-MM-DD"""
+    try:
+        return pd.to_datetime(dates, format='%d-%m-%Y')
+    except ValueError:
+        return pd.to_datetime(dates, format='%Y-%m-%d')
+
+
+def _check_columns(csv_path: str, required: Sequence[str]) -> List[str]:
+    header = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    missing = [column for column in required if column not in header]
+    if missing:
+        raise ValueError(f"CSV must contain columns: {', '.join(required)}")
+    return header
+
+
+def _compact_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    if 'item_name' in chunk.columns:
+        item_name = chunk['item_name']
+        if item_name.isna().any():
+            item_name = item_name.cat.add_categories(['Unknown']).fillna('Unknown')
+        chunk['item_name'] = item_name
+    if 'quantity' in chunk.columns:
+        quantity = pd.to_numeric(chunk['quantity'], errors='coerce').fillna(0)
+        chunk['quantity'] = quantity.astype('int16')
+    return chunk
+
+
+def read_sales_csv(csv_path: str, usecols: Optional[Sequence[str]] = None,
+                   chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """Read a sales export in chunks with compact dtypes
+
+    Only ``usecols`` are parsed. String dimensions become categoricals (merged
+    across chunks with union_categoricals) and ``quantity`` is stored as int16,
+    with missing item names mapped to 'Unknown' and missing quantities to 0.
+    """
+    header = _check_columns(csv_path, usecols or [])
+    columns = list(usecols) if usecols else header
+    dtypes = {column: dtype for column, dtype in SALES_DTYPES.items() if column in columns}
+
+    chunks = [
+        _compact_chunk(chunk)
+        for chunk in pd.read_csv(csv_path, usecols=columns, dtype=dtypes, chunksize=chunksize)
+    ]
+    if not chunks:
+        return pd.read_csv(csv_path, usecols=columns, dtype=dtypes)
+
+    category_columns = [column for column in columns if column in dtypes and dtypes[column] == 'category']
+    df = pd.concat([chunk.drop(columns=category_columns) for chunk in chunks], ignore_index=True)
+    for column in category_columns:
+        df[column] = pd.Categorical(union_categoricals([chunk[column] for chunk in chunks]))
+    return df[columns]
+
+
+def _combine_partials(partials: List[pd.DataFrame]) -> pd.DataFrame:
+    combined = pd.concat(partials)
+    return combined.groupby(level=list(range(combined.index.nlevels)), observed=True).sum()
+
+
+def aggregate_sales_csv(csv_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                        max_partials: int = 8) -> pd.DataFrame:
+    """Stream a sales export into per-(item, date, hour) quantity and order counts
+
+    Each chunk is reduced to per-(item, date, hour) sums before the next one
+    is read, and partial aggregates are folded together every
+    ``max_partials`` chunks, so peak memory is bounded by the chunk size
+    plus the size of the aggregated table rather than by the file size.
+    Item names are left as strings; exports without a ``time`` column land
+    in hour 0.
+    """
+    header = _check_columns(csv_path, ['date', 'item_name', 'quantity'])
+    usecols = ['date', 'item_name', 'quantity'] + (['time'] if 'time' in header else [])
+
+    partials = []
+    reader = pd.read_csv(
+        csv_path,
+        usecols=usecols,
+        dtype={'item_name': 'string', 'time': 'string'},
+        chunksize=chunksize
+    )
+    for chunk in reader:
+        chunk['item_name'] = chunk['item_name'].fillna('Unknown')
+        chunk['quantity'] = pd.to_numeric(chunk['quantity'], errors='coerce').fillna(0).astype('int32')
+        chunk['date'] = parse_sales_dates(chunk['date'])
+        chunk['hour'] = hour_of_day(chunk['time']) if 'time' in chunk.columns else 0
+        chunk['orders'] = 1
+
+        partial = chunk.groupby(AGGREGATE_KEYS, observed=True)[['quantity', 'orders']].sum()
+        partials.append(partial)
+        if len(partials) >= max_partials:
+            partials = [_combine_partials(partials)]
+
+    if not partials:
+        return pd.DataFrame(columns=AGGREGATE_KEYS + ['quantity', 'orders'])
+
+    table = _combine_partials(partials).reset_index()
+    table['quantity'] = table['quantity'].astype('int32')
+    table['orders'] = table['orders'].astype('int32')
+    return table.sort_values(AGGREGATE_KEYS, ignore_index=True)
+
+
+def aggregate_slot_demand(orders: pd.DataFrame, slot_hours: int = SLOT_HOURS,
+                          slot_starts: Sequence[int] = OPERATING_SLOTS) -> pd.DataFrame:
+    """Roll encoded order lines up to an item x date x slot demand table
+
+    Each item gets a row for every slot of every day it sold anything, with
+    0 quantity in the slots it did not sell in, so models learn the
+    per-slot demand that is forecast rather than the size of individual
+    order lines. The slots are ``slot_starts`` plus any other slot the item
+    has ever sold in; days it did not trade at all are left out. Rows are
+    bucketed with one integer key per cell and summed with bincount instead
+    of a multi-column groupby. Rows that are already partial sums (an
+    ``orders`` column, as returned by aggregate_sales_csv) count as that
+    many orders.
+    """
+    item_codes = orders['item_name'].to_numpy(dtype=np.int64)
+    day_codes, days = pd.factorize(orders['date'], sort=True)
+    row_slots = slot_of_hour(orders['hour'].to_numpy(dtype=np.int64), slot_hours)
+    slots = np.union1d(np.asarray(slot_starts, dtype=np.int64), row_slots)
+
+    n_items = int(item_codes.max()) + 1 if len(item_codes) else 0
+    n_days, n_slots = len(days), len(slots)
+    keys = (item_codes * n_days + day_codes) * n_slots + np.searchsorted(slots, row_slots)
+    n_cells = n_items * n_days * n_slots
+
+    quantity = np.bincount(keys, weights=orders['quantity'], minlength=n_cells)
+    counts = np.bincount(keys, weights=orders.get('orders'), minlength=n_cells).reshape(n_items, n_days, n_slots)
+    # Zero-filled only over the days each item traded and the slots it trades in
+    traded_days = counts.any(axis=2)
+    traded_slots = counts.any(axis=1) | np.isin(slots, slot_starts)
+    keep = (traded_days[:, :, None] & traded_slots[:, None, :]).ravel()
+
+    table = pd.DataFrame({
+        'item_name': np.repeat(np.arange(n_items, dtype=np.int32), n_days * n_slots)[keep],
+        'date': np.tile(np.repeat(days.to_numpy(), n_slots), n_items)[keep],
+        'hour': np.tile(slots.astype('int8'), n_items * n_days)[keep],
+        'quantity': quantity[keep].astype('int32'),
+        'orders': counts.ravel()[keep].astype('int32')
+    })
+    add_calendar_features(table)
+    return table
@@ -0,0 +1,98 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_TENANT = 'default'
+DEFAULT_TENANT_BUDGET = int(os.environ.get('CULIFLOW_TENANT_MODEL_MB', '256')) * 1024 * 1024
+DEFAULT_TOTAL_BUDGET = int(os.environ.get('CULIFLOW_MODEL_MEMORY_MB', '1024')) * 1024 * 1024
+
+
+class ModelMemory:
+    """Compiled model sets resident in memory, bounded per tenant and overall
+
+    A tenant is one restaurant (any label the caller passes; requests
+    without one share DEFAULT_TENANT). Each set is charged the bytes of its
+    node arrays. When a tenant goes over its budget its least recently used
+    sets are dropped, and when all tenants together go over the total
+    budget the least recently used sets of any tenant are. A set that alone
+    exceeds the budget is still served. Dropped sets stay on disk as
+    compiled.npz in their registry entry, so the next request for one
+    reloads its arrays instead of unpickling or refitting forests.
+    """
+
+    def __init__(self, tenant_budget: int = DEFAULT_TENANT_BUDGET, total_budget: int = DEFAULT_TOTAL_BUDGET):
+        self.tenant_budget = tenant_budget
+        self.total_budget = total_budget
+        self.evictions = 0
+        self._sets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tenant: str, key: str):
+        with self._lock:
+            forests = self._sets.get((tenant, key))
+            if forests is not None:
+                self._sets.move_to_end((tenant, key))
+            return forests
+
+    def put(self, tenant: str, key: str, forests) -> list:
+        """Make a set resident for ``tenant`` and evict down to the budgets"""
+        with self._lock:
+            self._sets[(tenant, key)] = forests
+            self._sets.move_to_end((tenant, key))
+            evicted = self._evict(lambda owner: owner == tenant, self.tenant_budget, keep=(tenant, key))
+            evicted += self._evict(lambda owner: True, self.total_budget, keep=(tenant, key))
+            self.evictions += len(evicted)
+            return evicted
+
+    def _evict(self, owned_by, budget: int, keep) -> list:
+        resident = sum(forests.nbytes for (owner, _), forests in self._sets.items() if owned_by(owner))
+        evicted = []
+        for name in list(self._sets):
+            if resident <= budget:
+                break
+            if name == keep or not owned_by(name[0]):
+                continue
+            resident -= self._sets.pop(name).nbytes
+            evicted.append(name)
+        return evicted
+
+    def usage(self, tenant: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(forests.nbytes for (owner, _), forests in self._sets.items()
+                       if tenant is None or owner == tenant)
+
+    def report(self) -> Dict[str, Any]:
+        """Resident bytes per tenant and per model set, with the bytes of each item's model"""
+        with self._lock:
+            tenants = {}
+            for (tenant, key), forests in self._sets.items():
+                usage = tenants.setdefault(tenant, {'resident_bytes': 0, 'model_sets': []})
+                usage['resident_bytes'] += forests.nbytes
+                usage['model_sets'].append({
+                    'key': key,
+                    'bytes': forests.nbytes,
+                    'items': len(forests.keys),
+                    'trees': forests.n_trees,
+                    'bytes_per_item': forests.item_nbytes()
+                })
+            return {
+                'tenant_budget_bytes': self.tenant_budget,
+                'total_budget_bytes': self.total_budget,
+                'resident_bytes': sum(usage['resident_bytes'] for usage in tenants.values()),
+                'evictions': self.evictions,
+                'tenants': tenants
+            }
+
+
+_model_memory = None
+_model_memory_lock = threading.Lock()
+
+
+def get_model_memory() -> ModelMemory:
+    """Return the process-wide resident model memory (CULIFLOW_TENANT_MODEL_MB budget)"""
+    global _model_memory
+    with _model_memory_lock:
+        if _model_memory is None:
+            _model_memory = ModelMemory()
+        return _model_memory
@@ -0,0 +1,359 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from collections.abc import Mapping
+from contextlib import suppress
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+import sklearn
+
+from .compiled import CompiledForests
+
+REGISTRY_FORMAT_VERSION = 4
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REGISTRY_DIR = os.environ.get(
+    'CULIFLOW_MODEL_DIR',
+    os.path.join(BACKEND_DIR, '.model_registry')
+)
+DEFAULT_MAX_BYTES = int(os.environ.get('CULIFLOW_MODEL_CACHE_MB', '512')) * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = int(os.environ.get('CULIFLOW_MODEL_MEMORY_ENTRIES', '8'))
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_digest(config: Dict[str, Any]) -> str:
+    """Return a stable digest of a JSON-serialisable training config"""
+    payload = dict(config)
+    payload['_format'] = REGISTRY_FORMAT_VERSION
+    payload['_sklearn'] = sklearn.__version__
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LazyModelMap(Mapping):
+    """Read-only mapping that loads each item's model file on first access"""
+
+    def __init__(self, model_dir: str, item_codes, mmap_mode: Optional[str] = None,
+                 metrics: Optional[Dict[str, Any]] = None):
+        self.model_dir = model_dir
+        self.item_codes = list(item_codes)
+        self.mmap_mode = mmap_mode
+        self.metrics = metrics or {}
+        self._loaded = {}
+
+    def path(self, item_code) -> str:
+        return os.path.join(self.model_dir, f"{item_code}.joblib")
+
+    def __getitem__(self, item_code):
+        item_code = str(item_code)
+        if item_code not in self._loaded:
+            if item_code not in self.item_codes:
+                raise KeyError(item_code)
+            model_info = joblib.load(self.path(item_code), mmap_mode=self.mmap_mode)
+            # Metrics live in the manifest rather than the model file
+            model_info.setdefault('metrics', self.metrics.get(item_code, {}))
+            self._loaded[item_code] = model_info
+        return self._loaded[item_code]
+
+    def __iter__(self):
+        return iter(self.item_codes)
+
+    def __len__(self):
+        return len(self.item_codes)
+
+
+class RegistryEntry:
+    """Artifacts of one trained model set as stored in the registry"""
+
+    def __init__(self, path: str, manifest: Dict[str, Any], mmap_mode: Optional[str] = None):
+        self.path = path
+        self.manifest = manifest
+        self.metadata = manifest.get('metadata', {})
+        self.models = LazyModelMap(os.path.join(path, 'models'), manifest['items'], mmap_mode,
+                                   manifest.get('metrics'))
+        self._encoders = None
+
+    @property
+    def encoders(self) -> Dict[str, Any]:
+        if self._encoders is None:
+            self._encoders = joblib.load(os.path.join(self.path, 'encoders.joblib'))
+        return self._encoders
+
+    def compiled(self, models: Optional[Mapping] = None, names=None) -> CompiledForests:
+        """Array-encoded forests of this per-item model set, compiled on first use
+
+        The compiled arrays are stored next to the models, so later loads read
+        one .npz file instead of unpickling every item's forest. Pass the
+        fitted ``models`` when they are already in memory.
+        """
+        path = os.path.join(self.path, 'compiled.npz')
+        forests = CompiledForests.load(path)
+        if forests is None:
+            forests = CompiledForests.from_models(models if models is not None else self.models, names)
+            print(f"Compiled {len(forests.keys)} forests into {forests.nbytes / 2**20:.1f} MiB "
+                  f"({forests.nbytes / max(len(forests.keys), 1) / 1024:.0f} KiB per item)")
+            if os.path.isdir(self.path):
+                forests.save(path)
+        return forests
+
+
+class ModelRegistry:
+    """Content-addressed on-disk store of fitted models with LRU size bound
+
+    Entries are keyed by a hash of the training data plus the feature and
+    hyperparameter config. Each item model is written to its own joblib file
+    so a forecast only loads the forests it actually scores; pass
+    ``mmap_mode='r'`` to memory-map the tree arrays instead of copying them.
+    Recently loaded entries are also kept in memory so repeat requests in
+    the same process skip deserialisation. Once the registry grows past
+    ``max_bytes`` the least recently used entries are removed from disk.
+    """
+
+    def __init__(self, root: str = DEFAULT_REGISTRY_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        # Request threads share one registry
+        self._memory_lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def make_key(self, data_path: str, config: Dict[str, Any]) -> str:
+        """Build the registry key for a data file and training config"""
+        return self.digest_key(file_digest(data_path), config)
+
+    def digest_key(self, data_digest: str, config: Dict[str, Any]) -> str:
+        """Build the registry key from an already computed data digest"""
+        return f"{data_digest[:32]}-{config_digest(config)[:16]}"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self._entry_path(key), 'manifest.json'))
+
+    def load(self, key: str, mmap_mode: Optional[str] = None) -> Optional[RegistryEntry]:
+        """Return the stored entry for ``key`` or None if it is not cached
+
+        Entries stay in memory per ``mmap_mode``, so a memory-mapped load
+        never hands back models an earlier load copied into memory.
+        """
+        path = self._entry_path(key)
+        manifest_path = os.path.join(path, 'manifest.json')
+        with self._memory_lock:
+            entry = self._memory.get((key, mmap_mode))
+            if entry is not None and not os.path.exists(manifest_path):
+                # Evicted from disk by another worker
+                self._memory.pop((key, mmap_mode), None)
+                entry = None
+            elif entry is not None:
+                self._memory.move_to_end((key, mmap_mode))
+
+        if entry is None:
+            try:
+                with open(manifest_path, 'r') as fh:
+                    manifest = json.load(fh)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+            entry = RegistryEntry(path, manifest, mmap_mode)
+            self._remember((key, mmap_mode), entry)
+
+        # Touch the manifest so eviction sees this entry as recently used; the
+        # entry may have been evicted by another process since it was read
+        now = time.time()
+        with suppress(FileNotFoundError):
+            os.utime(manifest_path, (now, now))
+        return entry
+
+    def find(self, predicate, limit: Optional[int] = None) -> list:
+        """Manifests matching ``predicate``, most recently used first
+
+        Only reads manifests; unlike ``load`` it does not mark entries as used.
+        """
+        entries = []
+        for name in os.listdir(self.root):
+            manifest_path = os.path.join(self.root, name, 'manifest.json')
+            if name.startswith('.'):
+                continue
+            try:
+                entries.append((os.path.getmtime(manifest_path), manifest_path))
+            except OSError:
+                continue
+
+        found = []
+        for _, manifest_path in sorted(entries, reverse=True):
+            try:
+                with open(manifest_path, 'r') as fh:
+                    manifest = json.load(fh)
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            if predicate(manifest):
+                found.append(manifest)
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def _remember(self, memory_key: Tuple[str, Optional[str]], entry: RegistryEntry) -> None:
+        with self._memory_lock:
+            self._memory[memory_key] = entry
+            self._memory.move_to_end(memory_key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        with self._memory_lock:
+            for memory_key in [memory_key for memory_key in self._memory if memory_key[0] == key]:
+                del self._memory[memory_key]
+
+    def save(self, key: str, models: Dict[str, Any], encoders: Dict[str, Any],
+             metadata: Optional[Dict[str, Any]] = None,
+             links: Optional[Dict[str, Tuple[str, Dict[str, Any]]]] = None) -> str:
+        """Persist fitted models and encoders under ``key``
+
+        ``models`` maps item codes to the per-item dict kept by the predictors
+        (model, scaler, metrics). Metrics go into the manifest; the fitted
+        objects are written uncompressed so they can be memory-mapped.
+        ``links`` maps item codes to (model file, metrics) of models already
+        stored in another entry; those files are hard-linked rather than
+        loaded and written again.
+        """
+        final_path = self._entry_path(key)
+        tmp_path = os.path.join(self.root, f".tmp-{key}-{uuid.uuid4().hex}")
+        model_dir = os.path.join(tmp_path, 'models')
+        os.makedirs(model_dir)
+
+        try:
+            items = []
+            metrics = {}
+            for item_code, model_info in models.items():
+                item_code = str(item_code)
+                artifacts = {k: v for k, v in model_info.items() if k != 'metrics'}
+                joblib.dump(artifacts, os.path.join(model_dir, f"{item_code}.joblib"))
+                items.append(item_code)
+                metrics[item_code] = model_info.get('metrics', {})
+            for item_code, (source, item_metrics) in (links or {}).items():
+                target = os.path.join(model_dir, f"{item_code}.joblib")
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copyfile(source, target)
+                items.append(str(item_code))
+                metrics[str(item_code)] = item_metrics
+
+            joblib.dump(encoders, os.path.join(tmp_path, 'encoders.joblib'))
+
+            manifest = {
+                'key': key,
+                'created_at': time.time(),
+                'items': items,
+                'metrics': metrics,
+                'metadata': metadata or {}
+            }
+            with open(os.path.join(tmp_path, 'manifest.json'), 'w') as fh:
+                json.dump(manifest, fh, default=str)
+
+            self._forget(key)
+            if os.path.exists(final_path):
+                shutil.rmtree(final_path, ignore_errors=True)
+            os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self.evict(keep=key)
+        return final_path
+
+    def warm(self, max_entries: Optional[int] = None) -> list:
+        """Load the most recently used entries and their item models into memory
+
+        Called before a server starts accepting requests so the first
+        forecast after a restart is served from memory instead of disk.
+        """
+        entries = []
+        for name in os.listdir(self.root):
+            manifest_path = os.path.join(self.root, name, 'manifest.json')
+            if name.startswith('.') or not os.path.exists(manifest_path):
+                continue
+            entries.append((os.path.getmtime(manifest_path), name))
+
+        recent = sorted(entries, reverse=True)[:max_entries or self.memory_entries]
+        warmed = []
+        # Oldest first so the recency order on disk and in memory is preserved
+        for _, key in reversed(recent):
+            entry = self.load(key)
+            if entry is None:
+                continue
+            for item_code in entry.models:
+                entry.models[item_code]
+            warmed.append(key)
+        return warmed
+
+    def _entry_files(self, path: str) -> Dict[Tuple[int, int], int]:
+        """Size of each file in an entry, keyed by (device, inode)"""
+        files = {}
+        for dirpath, _, filenames in os.walk(path):
+            for name in filenames:
+                try:
+                    stat = os.stat(os.path.join(dirpath, name))
+                except OSError:
+                    continue
+                files[(stat.st_dev, stat.st_ino)] = stat.st_size
+        return files
+
+    def evict(self, keep: Optional[str] = None) -> list:
+        """Remove least recently used entries until the registry fits max_bytes
+
+        Model files hard-linked between entries (incremental updates) are
+        counted once and only freed with the last entry that links them.
+        """
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            manifest_path = os.path.join(path, 'manifest.json')
+            if name.startswith('.') or not os.path.exists(manifest_path):
+                continue
+            entries.append((os.path.getmtime(manifest_path), name, self._entry_files(path)))
+
+        links = Counter(inode for _, _, files in entries for inode in files)
+        sizes = {inode: size for _, _, files in entries for inode, size in files.items()}
+        total = sum(sizes.values())
+        evicted = []
+        for _, name, files in sorted(entries, key=lambda e: e[:2]):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            self._forget(name)
+            for inode, size in files.items():
+                links[inode] -= 1
+                if not links[inode]:
+                    total -= size
+            evicted.append(name)
+        return evicted
+
+
+_default_registry = None
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide registry rooted at DEFAULT_REGISTRY_DIR"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ModelRegistry()
+    return _default_registry
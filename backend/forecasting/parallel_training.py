@@ -0,0 +1,153 @@
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.preprocessing import StandardScaler
+
+from telemetry import record_stage
+
+# Trailing days per item held out for the scorecard metrics
+DEFAULT_HOLDOUT_DAYS = int(os.environ.get('CULIFLOW_HOLDOUT_DAYS', '28'))
+
+
+def default_worker_budget() -> int:
+    """Core budget from CULIFLOW_TRAIN_WORKERS, falling back to all CPUs"""
+    configured = os.environ.get('CULIFLOW_TRAIN_WORKERS')
+    if configured:
+        return max(1, int(configured))
+    return os.cpu_count() or 1
+
+
+def split_core_budget(n_tasks: int, budget: int) -> Tuple[int, int]:
+    """Split a core budget into (parallel tasks, threads per forest)
+
+    Items are spread across processes first since each forest is small;
+    cores left over once every item has a worker go to the forests.
+    """
+    budget = max(1, budget)
+    outer = max(1, min(n_tasks, budget))
+    inner = max(1, budget // outer)
+    return outer, inner
+
+
+def recent_holdout(dates, holdout_days: int = DEFAULT_HOLDOUT_DAYS) -> np.ndarray:
+    """Mask of the rows dated in the last ``holdout_days`` days
+
+    Like a backtest fold, the holdout is always later than every training
+    row. With less history than that the last day is held out instead, and
+    with a single day the last row.
+    """
+    days = np.asarray(dates, dtype='datetime64[D]')
+    mask = days > days.max() - np.timedelta64(holdout_days, 'D')
+    if mask.all():
+        mask = days == days.max()
+    if mask.all():
+        mask = np.zeros(len(days), dtype=bool)
+        mask[-1] = True
+    return mask
+
+
+def fit_item_forest(X, y, model_params: Dict[str, Any], n_jobs: Optional[int] = None,
+                    dates=None, holdout_days: Optional[int] = None) -> Dict[str, Any]:
+    """Fit one item's forest, on its full history or as a scorecard holdout fit
+
+    Without ``holdout_days`` the forest and its scaler are fitted on every
+    row; this is the model forecasts are served from. With it, both are
+    fitted on the rows before the item's last ``holdout_days`` days (see
+    recent_holdout), which are then predicted for the holdout metrics and
+    kept as the holdout the scorecard plots.
+    """
+    if holdout_days is None:
+        scaler = StandardScaler()
+        model = RandomForestRegressor(**model_params, n_jobs=n_jobs)
+        model.fit(scaler.fit_transform(X), y)
+        # Forests are stored single-threaded; serving sets its own parallelism
+        model.set_params(n_jobs=None)
+        return {'model': model, 'scaler': scaler, 'metrics': {}}
+
+    test = recent_holdout(dates, holdout_days)
+    X_train, X_test, y_train, y_test = X[~test], X[test], y[~test], y[test]
+
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    model = RandomForestRegressor(**model_params, n_jobs=n_jobs)
+    model.fit(X_train_scaled, y_train)
+
+    holdout = None
+    try:
+        predictions = model.predict(X_test_scaled)
+        metrics = {
+            'mae': float(mean_absolute_error(y_test, predictions)),
+            'rmse': float(np.sqrt(mean_squared_error(y_test, predictions))),
+            'r2': float(r2_score(y_test, predictions))
+        }
+        holdout = {
+            'index': np.asarray(getattr(X_test, 'index', np.arange(len(X_test)))),
+            'actual': np.asarray(y_test),
+            'predicted': predictions
+        }
+    except Exception as e:
+        print(f"Error in model evaluation: {str(e)}")
+        metrics = {'mae': np.nan, 'rmse': np.nan, 'r2': np.nan}
+
+    model.set_params(n_jobs=None)
+    # The scaler the forest was trained with, so the pair stays consistent
+    result = {'model': model, 'scaler': scaler, 'metrics': metrics}
+    if holdout is not None:
+        result['holdout'] = holdout
+    return result
+
+
+def _run_task(key, fn, kwargs):
+    # Timed here because worker processes do not share the parent's metrics
+    start = time.perf_counter()
+    try:
+        return key, fn(**kwargs), None, time.perf_counter() - start
+    except Exception as e:
+        return key, None, str(e), time.perf_counter() - start
+
+
+class TrainingScheduler:
+    """Spreads independent per-item training tasks over a joblib process pool
+
+    The core budget is shared between inter-item parallelism (worker
+    processes) and intra-forest parallelism (``n_jobs`` passed to each
+    task). A failing task is reported in the failures dict and does not
+    abort the rest of the batch.
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, backend: str = 'loky'):
+        self.n_workers = n_workers or default_worker_budget()
+        self.backend = backend
+
+    def run(self, fn: Callable[..., Any], tasks: Dict[str, Dict[str, Any]],
+            **shared_kwargs) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Run ``fn(**task_kwargs, **shared_kwargs, n_jobs=inner)`` for each task"""
+        outer, inner = split_core_budget(len(tasks), self.n_workers)
+        calls = [
+            (key, fn, {**task_kwargs, **shared_kwargs, 'n_jobs': inner})
+            for key, task_kwargs in tasks.items()
+        ]
+
+        if outer == 1:
+            outcomes = [_run_task(*call) for call in calls]
+        else:
+            outcomes = Parallel(n_jobs=outer, backend=self.backend)(
+                delayed(_run_task)(*call) for call in calls
+            )
+
+        results = {}
+        failures = {}
+        for key, result, error, seconds in outcomes:
+            record_stage('train_item', seconds, failed=error is not None)
+            if error is None:
+                results[key] = result
+            else:
+                failures[key] = error
+        return results, failures
@@ -0,0 +1,324 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from telemetry import stage
+
+from .backtest import Backtester
+from .compiled import CompiledForests
+from .dataset_cache import DatasetCache, get_dataset_cache
+from .features import OPERATING_SLOTS, add_calendar_features, hour_of_day
+from .global_model import GlobalItemModel
+from .incremental import ModelUpdater
+from .ingest import aggregate_sales_csv, aggregate_slot_demand, parse_sales_dates, read_sales_csv
+from .memory import DEFAULT_TENANT, get_model_memory
+from .model_registry import LazyModelMap, ModelRegistry, file_digest, get_registry
+from .parallel_training import TrainingScheduler, fit_item_forest
+from .specs import TABLES, ModelSpec
+
+REQUIRED_COLUMNS = ['date', 'item_name', 'quantity']
+
+DEFAULT_PIPELINE_ENTRIES = int(os.environ.get('CULIFLOW_PIPELINE_ENTRIES', '4'))
+
+
+def preprocess_sales_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, LabelEncoder]:
+    """Parse dates, add calendar features and encode item names in place"""
+    df['date'] = parse_sales_dates(df['date'])
+    if 'time' in df.columns:
+        df['hour'] = hour_of_day(df['time'])
+        df = df.drop(columns=['time'])
+    else:
+        df['hour'] = np.zeros(len(df), dtype='int8')
+    add_calendar_features(df)
+
+    df['item_name'] = df['item_name'].fillna('Unknown')
+    encoder = LabelEncoder()
+    encoder.fit(df['item_name'].unique())
+    df['item_name'] = encoder.transform(df['item_name'])
+    return df, encoder
+
+
+class SalesPipeline:
+    """Parsed data, encoders and trained model sets for one sales upload
+
+    One pipeline exists per distinct CSV (see ``get_pipeline``) and is shared
+    by the forecast, daily prediction and scorecard services, so the upload
+    is parsed once, item names are encoded once, and a model family trained
+    for one service is reused by any other service that asks for the same
+    ``ModelSpec``. Tables come from the dataset cache and model sets from
+    the model registry, so separate processes share the work too.
+    """
+
+    def __init__(self, csv_path: str, registry: Optional[ModelRegistry] = None,
+                 dataset_cache: Optional[DatasetCache] = None, n_workers: Optional[int] = None,
+                 data_digest: Optional[str] = None):
+        self.csv_path = csv_path
+        self.data_digest = data_digest or file_digest(csv_path)
+        self.registry = registry or get_registry()
+        self.dataset_cache = dataset_cache or get_dataset_cache()
+        self.scheduler = TrainingScheduler(n_workers)
+        self.encoders = {}
+        self.training_failures = {}
+        self._tables = {}
+        self._model_sets = {}
+        self._lock = threading.RLock()
+
+    def table(self, name: str = 'orders') -> pd.DataFrame:
+        """Typed, feature-engineered training table ('orders' or 'slots')"""
+        if name not in TABLES:
+            raise ValueError(f"Unknown training table: {name}")
+        with self._lock:
+            if name not in self._tables:
+                builder = getattr(self, f"_build_{name}")
+                # The slot table is zero-filled over the configured operating slots
+                config = {'slots': list(OPERATING_SLOTS)} if name == 'slots' else None
+                df, artifacts = self.dataset_cache.load_or_build(
+                    self.csv_path, f"sales-{name}", builder, config=config, data_digest=self.data_digest
+                )
+                self.encoders.update(artifacts)
+                self._tables[name] = df
+            return self._tables[name]
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        return self.table('orders')
+
+    def _build_orders(self) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        header = pd.read_csv(self.csv_path, nrows=0).columns
+        usecols = REQUIRED_COLUMNS + (['time'] if 'time' in header else [])
+        with stage('parse'):
+            orders = read_sales_csv(self.csv_path, usecols=usecols)
+        with stage('preprocess'):
+            df, encoder = preprocess_sales_frame(orders)
+        return df, {'item_name': encoder}
+
+    def _build_slots(self) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        # Streamed from the CSV in chunks, so the order-level table is never materialized
+        with stage('parse'):
+            hourly = aggregate_sales_csv(self.csv_path)
+        # Same encoding as the order-level table: LabelEncoder sorts the names
+        encoder = self.encoders.get('item_name')
+        if encoder is None:
+            encoder = LabelEncoder().fit(hourly['item_name'].unique())
+        hourly['item_name'] = encoder.transform(hourly['item_name'])
+        with stage('preprocess'):
+            df = aggregate_slot_demand(hourly)
+        n_lines = int(hourly['orders'].sum())
+        ratio = (f"{n_lines / len(df):.2f}:1 row compression" if n_lines > len(df)
+                 else f"{len(df) / max(n_lines, 1):.2f}x more rows; order lines are trained on instead")
+        print(f"Aggregated {n_lines} order lines into {len(df)} item x date x slot rows ({ratio})")
+        # Stored with the table so a cached load restores the encoder too
+        return df, {'item_name': encoder}
+
+    def slot_compression(self) -> float:
+        """Order lines per row of the slot table; at or below 1 aggregating saves nothing"""
+        slots = self.table('slots')
+        return float(slots['orders'].sum()) / max(len(slots), 1)
+
+    def training_spec(self, spec: ModelSpec) -> ModelSpec:
+        """``spec``, moved from the slot table to order lines when the slot table is not smaller
+
+        Sparse sales (few orders per item and day) zero-fill into more slot
+        rows than there are order lines, which would cost fit time instead
+        of saving it.
+        """
+        if spec.table != 'slots' or self.slot_compression() > 1:
+            return spec
+        return spec.replace(table='orders')
+
+    def item_names(self, item_codes) -> np.ndarray:
+        """Decode item codes in one batch"""
+        if 'item_name' not in self.encoders:
+            self.table('orders')
+        return self.encoders['item_name'].inverse_transform(np.asarray(item_codes, dtype=int))
+
+    @property
+    def last_date(self) -> pd.Timestamp:
+        # Both tables end on the last trading day; avoid loading orders just for it
+        table = self._tables.get('slots')
+        return (self.frame if table is None else table)['date'].max()
+
+    def models(self, spec: ModelSpec, incremental: bool = False,
+               holdout_days: Optional[int] = None) -> Dict[str, Any]:
+        """Trained model set for ``spec`` on this upload, fitting it on first use
+
+        Per-item specs map item codes to {'model', 'scaler', 'metrics'};
+        global specs hold a single 'global' entry whose model is a
+        GlobalItemModel. These are fitted on the full history and serve the
+        forecasts.
+
+        With ``holdout_days`` the set is the scorecard's instead: every item
+        is fitted without its last ``holdout_days`` days, which are kept as
+        its 'holdout'. It is stored under its own key and never served.
+
+        With ``incremental``, an upload that only appends to one already
+        trained is served by updating that model set (see ModelUpdater)
+        instead of refitting the full history. Updated sets are stored under
+        their own key too.
+        """
+        return self._model_set(spec, incremental, holdout_days)[1]
+
+    def compiled(self, spec: ModelSpec, incremental: bool = False,
+                 tenant: Optional[str] = None) -> CompiledForests:
+        """Per-item model set for ``spec`` flattened for numpy-only inference
+
+        Resident sets are charged to ``tenant`` (DEFAULT_TENANT if None) in
+        the shared ModelMemory; an evicted set is reloaded from its registry
+        entry.
+        """
+        key, models = self._model_set(spec, incremental)
+        tenant = tenant or DEFAULT_TENANT
+        memory = get_model_memory()
+        forests = memory.get(tenant, key)
+        if forests is None:
+            with self._lock:
+                entry = self.registry.load(key)
+                in_memory = None if isinstance(models, LazyModelMap) else models
+                names = self.item_names([int(item_code) for item_code in models])
+                with stage('compile'):
+                    forests = (entry.compiled(in_memory, names) if entry is not None
+                               else CompiledForests.from_models(models, names))
+            memory.put(tenant, key, forests)
+        return forests
+
+    def _model_set(self, spec: ModelSpec, incremental: bool,
+                   holdout_days: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        if holdout_days is not None:
+            return self._holdout_set(spec, holdout_days)
+        key = self.registry.digest_key(self.data_digest, spec.config())
+        keys = [key]
+        if incremental:
+            update_config = {**spec.config(), 'update': 'incremental'}
+            keys.append(self.registry.digest_key(self.data_digest, update_config))
+        with self._lock:
+            for candidate in keys:
+                if candidate in self._model_sets:
+                    return candidate, self._model_sets[candidate]
+            for candidate in keys:
+                with stage('model_load'):
+                    entry = self.registry.load(candidate)
+                if entry is not None:
+                    self._model_sets[candidate] = entry.models
+                    return candidate, entry.models
+
+            df = self.table(spec.table)
+            updater = ModelUpdater(spec, df, self.encoders['item_name'].classes_, self.scheduler)
+            metadata = {'spec': spec.config(), 'snapshot': updater.snapshot()}
+            parent = updater.find_parent(self.registry) if incremental else None
+            entry = self.registry.load(parent[0]) if parent is not None else None
+            updated = None
+            if entry is not None:
+                with stage('update'):
+                    updated = updater.update(entry, parent[1])
+            if updated is None:
+                models = self.train(spec, df)
+                with stage('model_save'):
+                    self.registry.save(key, models, self.encoders, metadata=metadata)
+                # Fitted forests are not kept resident; they reload from the registry on demand
+                entry = self.registry.load(key)
+                self._model_sets[key] = entry.models if entry is not None else models
+                return key, models
+
+            # Reused models are only linked on disk, so serve the set from the registry
+            changed, links = updated
+            self.training_failures = updater.failures
+            metadata.update(parent=parent[0], update=updater.summary)
+            with stage('model_save'):
+                self.registry.save(keys[1], changed, self.encoders, metadata=metadata, links=links)
+            self._model_sets[keys[1]] = self.registry.load(keys[1]).models
+            return keys[1], self._model_sets[keys[1]]
+
+    def _holdout_set(self, spec: ModelSpec, holdout_days: int) -> Tuple[str, Dict[str, Any]]:
+        # No snapshot in the metadata, so ModelUpdater never picks it as a parent
+        config = {**spec.config(), 'holdout_days': int(holdout_days)}
+        key = self.registry.digest_key(self.data_digest, config)
+        with self._lock:
+            if key not in self._model_sets:
+                with stage('model_load'):
+                    entry = self.registry.load(key)
+                if entry is None:
+                    models = self.train(spec, self.table(spec.table), holdout_days)
+                    with stage('model_save'):
+                        self.registry.save(key, models, self.encoders, metadata={'spec': config})
+                    self._model_sets[key] = models
+                else:
+                    self._model_sets[key] = entry.models
+            return key, self._model_sets[key]
+
+    def backtest(self, spec: ModelSpec, **options) -> Dict[str, Any]:
+        """Rolling-origin backtest of ``spec`` on this upload (see Backtester)"""
+        backtester = Backtester(spec, scheduler=self.scheduler, **options)
+        return backtester.evaluate(self.table(spec.table), self.encoders['item_name'].classes_)
+
+    def train(self, spec: ModelSpec, df: pd.DataFrame, holdout_days: Optional[int] = None) -> Dict[str, Any]:
+        """Fit ``spec`` on an arbitrary frame without caching the result
+
+        ``holdout_days`` makes it a scorecard fit (see ``models``).
+        """
+        if spec.mode == 'global':
+            print(f"\nTraining global {spec.name} model across all items...")
+            global_model = GlobalItemModel(spec.feature_columns, spec.model_params, holdout_days)
+            with stage('train'):
+                global_model.fit(df)
+            return {'global': {'model': global_model, 'metrics': global_model.metrics}}
+
+        item_names = self.encoders['item_name'].classes_
+        tasks = {}
+        # One groupby pass instead of re-masking the full frame per item
+        for item_code, item_data in df.groupby('item_name', sort=False):
+            item_name = item_names[item_code]
+            y = item_data['quantity']
+            if len(y) < 2:
+                print(f"Skipping {item_name} - insufficient data")
+                continue
+            print(f"Training model for: {item_name}")
+            tasks[str(item_code)] = {'X': item_data[spec.feature_columns], 'y': y}
+            if holdout_days is not None:
+                tasks[str(item_code)].update(dates=item_data['date'], holdout_days=holdout_days)
+
+        print(f"\nTraining {spec.name} models for {len(tasks)} items with a budget of "
+              f"{self.scheduler.n_workers} cores...")
+        with stage('train'):
+            results, failures = self.scheduler.run(fit_item_forest, tasks, model_params=spec.model_params)
+        self.training_failures = failures
+
+        # Keep the item order of the serial loop regardless of completion order
+        models = {}
+        for item_code in tasks:
+            if item_code in results:
+                models[item_code] = results[item_code]
+            else:
+                print(f"Error training model for item {item_code}: {failures[item_code]}")
+        return models
+
+
+_pipelines = OrderedDict()
+_pipelines_lock = threading.Lock()
+
+
+def get_pipeline(csv_path: str, n_workers: Optional[int] = None,
+                 data_digest: Optional[str] = None) -> SalesPipeline:
+    """Return the shared pipeline for a CSV, keyed by its contents
+
+    Uploads with identical bytes map to the same pipeline even when they
+    arrive under different temporary file names. Pass ``data_digest`` when
+    the SHA-256 of the file is already known (e.g. a stored dataset id).
+    """
+    digest = data_digest or file_digest(csv_path)
+    with _pipelines_lock:
+        pipeline = _pipelines.get(digest)
+        if pipeline is None:
+            pipeline = SalesPipeline(csv_path, n_workers=n_workers, data_digest=digest)
+            _pipelines[digest] = pipeline
+            while len(_pipelines) > DEFAULT_PIPELINE_ENTRIES:
+                _pipelines.popitem(last=False)
+        else:
+            # Same bytes under a newer path; earlier upload files may be gone
+            pipeline.csv_path = csv_path
+            _pipelines.move_to_end(digest)
+        return pipeline
@@ -0,0 +1,68 @@
+import os
+from typing import Any, Dict, List
+
+MODES = ('per_item', 'global')
+TABLES = ('orders', 'slots')
+
+# Prediction services update the model set of an upload's previous version
+# instead of refitting the whole history (see forecasting.incremental)
+INCREMENTAL_UPDATES = os.environ.get('CULIFLOW_INCREMENTAL_UPDATES', '1') != '0'
+
+# Per-item forests are served from their compiled arrays (forecasting.compiled);
+# set CULIFLOW_INFERENCE=sklearn to predict with the fitted estimators instead
+COMPILED_INFERENCE = os.environ.get('CULIFLOW_INFERENCE', 'compiled') != 'sklearn'
+
+
+class ModelSpec:
+    """Feature set, estimator settings and training table of one model family"""
+
+    def __init__(self, name: str, feature_columns: List[str], model_params: Dict[str, Any],
+                 mode: str = 'per_item', table: str = 'orders'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown model mode: {mode}")
+        if table not in TABLES:
+            raise ValueError(f"Unknown training table: {table}")
+        self.name = name
+        self.feature_columns = list(feature_columns)
+        self.model_params = dict(model_params)
+        self.mode = mode
+        self.table = table
+
+    def replace(self, **changes) -> 'ModelSpec':
+        """Copy of this spec with some settings changed"""
+        settings = {
+            'name': self.name,
+            'feature_columns': self.feature_columns,
+            'model_params': self.model_params,
+            'mode': self.mode,
+            'table': self.table
+        }
+        settings.update(changes)
+        return ModelSpec(**settings)
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'feature_columns': self.feature_columns,
+            'model_params': self.model_params,
+            'mode': self.mode,
+            'table': self.table
+        }
+
+
+# Two-hour slot demand models used by the forecast (demanda) and scorecard (score),
+# trained on the zero-filled item x date x slot table
+HOURLY_SPEC = ModelSpec(
+    'hourly',
+    ['hour', 'day_of_week', 'month'],
+    {'n_estimators': 100, 'max_depth': 10, 'random_state': 42},
+    table='slots'
+)
+
+# Calendar-day models used by the daily prediction service (datedem)
+DAILY_SPEC = ModelSpec(
+    'daily',
+    ['is_weekend', 'month', 'day_of_week', 'season'],
+    {'n_estimators': 200, 'max_depth': 15, 'min_samples_split': 5,
+     'min_samples_leaf': 2, 'random_state': 42}
+)
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import uuid
+from typing import BinaryIO, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_UPLOAD_DIR = os.environ.get(
+    'CULIFLOW_UPLOAD_DIR',
+    os.path.join(BACKEND_DIR, '.cache', 'uploads')
+)
+DEFAULT_MAX_BYTES = int(os.environ.get('CULIFLOW_UPLOAD_CACHE_MB', '2048')) * 1024 * 1024
+
+DATASET_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UnknownDatasetError(KeyError):
+    """Raised for a dataset id that was never uploaded or has been evicted"""
+
+    def __str__(self):
+        return f"Unknown dataset: {self.args[0]}"
+
+
+class UploadStore:
+    """Content-addressed store of uploaded sales CSVs
+
+    A dataset id is the SHA-256 of the file's bytes, the same digest the
+    forecasting pipeline, dataset cache and model registry are keyed by, so
+    a request naming a stored dataset reuses the parsed tables and trained
+    models without re-sending, re-hashing or re-parsing the file. Least
+    recently used files are evicted once the store exceeds ``max_bytes``.
+    """
+
+    def __init__(self, root: str = DEFAULT_UPLOAD_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, dataset_id: str) -> str:
+        return os.path.join(self.root, f"{dataset_id}.csv")
+
+    def put(self, source: BinaryIO, chunk_size: int = 1 << 20) -> str:
+        """Store the bytes of a file object and return their dataset id"""
+        digest = hashlib.sha256()
+        tmp_path = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        try:
+            with open(tmp_path, 'wb') as fh:
+                for chunk in iter(lambda: source.read(chunk_size), b''):
+                    digest.update(chunk)
+                    fh.write(chunk)
+            dataset_id = digest.hexdigest()
+            # Identical bytes always land on the same name, so a concurrent
+            # upload of the same file is harmless
+            os.replace(tmp_path, self._path(dataset_id))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.evict(keep=dataset_id)
+        return dataset_id
+
+    def put_file(self, path: str) -> str:
+        with open(path, 'rb') as fh:
+            return self.put(fh)
+
+    def path(self, dataset_id: str) -> str:
+        """Path of a stored dataset, marking it recently used"""
+        if not isinstance(dataset_id, str) or not DATASET_ID_PATTERN.match(dataset_id):
+            raise UnknownDatasetError(dataset_id)
+        path = self._path(dataset_id)
+        try:
+            now = time.time()
+            os.utime(path, (now, now))
+        except FileNotFoundError:
+            raise UnknownDatasetError(dataset_id) from None
+        return path
+
+    def size(self, dataset_id: str) -> int:
+        return os.path.getsize(self.path(dataset_id))
+
+    def evict(self, keep: Optional[str] = None) -> list:
+        """Remove least recently used datasets until the store fits max_bytes"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                if not name.endswith('.csv'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.root, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name[:-len('.csv')]))
+
+            total = sum(size for _, size, _ in entries)
+            removed = []
+            for _, size, dataset_id in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if dataset_id == keep:
+                    continue
+                try:
+                    os.remove(self._path(dataset_id))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed.append(dataset_id)
+            return removed
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_upload_store() -> UploadStore:
+    """Return the process-wide store backed by CULIFLOW_UPLOAD_DIR"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = UploadStore()
+        return _default_store
+
+
+def resolve_sales_csv(csv_file=None, dataset_id: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """(csv path, known digest) for a request carrying an upload or a dataset id
+
+    The digest is returned for stored datasets so callers can skip hashing.
+    """
+    if dataset_id:
+        return get_upload_store().path(dataset_id), dataset_id
+    if csv_file is None:
+        raise ValueError("Upload a sales CSV or pass a dataset_id")
+    return getattr(csv_file, 'name', csv_file), None
@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from telemetry import stage
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURE_PATH = os.path.join(BACKEND_DIR, 'fixtures', 'weather_forecast.json')
+DEFAULT_CACHE_PATH = os.path.join(BACKEND_DIR, '.cache', 'weather_cache.json')
+DEFAULT_TTL_SECONDS = 30 * 60
+
+
+def closest_forecast(forecasts: List[Dict[str, Any]], timestamp: float) -> Optional[Dict[str, Any]]:
+    """Return the forecast entry whose ``dt`` is nearest to ``timestamp``"""
+    if not forecasts:
+        return None
+    return min(forecasts, key=lambda x: abs(x['dt'] - timestamp))
+
+
+class WeatherProvider(ABC):
+    """Source of OpenWeatherMap-style 3-hourly forecast entries"""
+
+    @abstractmethod
+    def get_forecast(self, city: str) -> List[Dict[str, Any]]:
+        """Forecast entries for ``city``, each with a ``dt`` timestamp"""
+
+    def get_closest(self, city: str, timestamp: float) -> Optional[Dict[str, Any]]:
+        """Forecast entry closest to ``timestamp`` for ``city``"""
+        return closest_forecast(self.get_forecast(city), timestamp)
+
+
+class OpenWeatherProvider(WeatherProvider):
+    """Fetches forecasts from the OpenWeatherMap API over a pooled session"""
+
+    def __init__(self, api_key: str, base_url: str = "http://api.openweathermap.org/data/2.5/forecast",
+                 timeout: float = 5.0, pool_size: int = 10):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get_forecast(self, city: str) -> List[Dict[str, Any]]:
+        params = {
+            'q': city,
+            'appid': self.api_key,
+            'units': 'metric'
+        }
+        with stage('weather_api'):
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()['list']
+
+
+class FixtureWeatherProvider(WeatherProvider):
+    """Serves forecasts from a local JSON file for air-gapped runs and tests
+
+    The file holds either a single OpenWeatherMap forecast response
+    (``{"list": [...]}``) used for every city, or a mapping of city name to
+    such a response.
+    """
+
+    def __init__(self, path: str = DEFAULT_FIXTURE_PATH):
+        self.path = path
+        with open(path, 'r') as fh:
+            self.data = json.load(fh)
+
+    def get_forecast(self, city: str) -> List[Dict[str, Any]]:
+        if 'list' in self.data:
+            return self.data['list']
+        if city in self.data:
+            return self.data[city]['list']
+        raise KeyError(f"No weather fixture for city: {city}")
+
+
+class CachedWeatherProvider(WeatherProvider):
+    """TTL cache in front of another provider, persisted to a JSON file
+
+    Forecast lists are cached per city and resolved entries per
+    (city, forecast-hour bucket), so repeated lookups for the same hour
+    neither hit the network nor rescan the forecast list. The cache is
+    reloaded from disk on start so a restarted service is warm immediately.
+    It is written once per upstream fetch, with expired entries dropped, so
+    per-hour lookups never rewrite the file and neither it nor the
+    in-memory dict outgrows the TTL window.
+    """
+
+    def __init__(self, provider: WeatherProvider, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._cache = self._load()
+
+    def _load(self) -> Dict[str, list]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r') as fh:
+                cache = json.load(fh)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable weather cache: {str(e)}")
+            return {}
+        now = time.time()
+        return {key: entry for key, entry in cache.items() if entry[0] > now}
+
+    def _prune(self) -> None:
+        now = time.time()
+        for key in [key for key, entry in self._cache.items() if entry[0] <= now]:
+            del self._cache[key]
+
+    def _persist(self) -> None:
+        self._prune()
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as fh:
+                json.dump(self._cache, fh)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Error persisting weather cache: {str(e)}")
+
+    def _get(self, key: str):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._cache.pop(key, None)
+            return None
+        return entry[1]
+
+    def _set(self, key: str, value) -> None:
+        self._cache[key] = [time.time() + self.ttl_seconds, value]
+
+    def get_forecast(self, city: str) -> List[Dict[str, Any]]:
+        key = f"forecast|{city}"
+        with self._lock:
+            forecasts = self._get(key)
+        if forecasts is None:
+            forecasts = self.provider.get_forecast(city)
+            with self._lock:
+                self._set(key, forecasts)
+                self._persist()
+        return forecasts
+
+    def get_closest(self, city: str, timestamp: float) -> Optional[Dict[str, Any]]:
+        key = f"closest|{city}|{int(timestamp // 3600)}"
+        with self._lock:
+            entry = self._get(key)
+        if entry is None:
+            entry = closest_forecast(self.get_forecast(city), timestamp)
+            with self._lock:
+                self._set(key, entry)
+        return entry
+
+
+_default_provider = None
+
+
+def build_weather_provider(api_key: str) -> WeatherProvider:
+    """Build the provider selected by CULIFLOW_WEATHER_PROVIDER
+
+    ``openweather`` (default) calls the live API, ``fixture`` reads
+    CULIFLOW_WEATHER_FIXTURE. Both sit behind the persistent TTL cache.
+    """
+    kind = os.environ.get('CULIFLOW_WEATHER_PROVIDER', 'openweather')
+    if kind == 'fixture':
+        provider = FixtureWeatherProvider(os.environ.get('CULIFLOW_WEATHER_FIXTURE', DEFAULT_FIXTURE_PATH))
+    elif kind == 'openweather':
+        provider = OpenWeatherProvider(api_key)
+    else:
+        raise ValueError(f"Unknown weather provider: {kind}")
+
+    ttl = float(os.environ.get('CULIFLOW_WEATHER_TTL', DEFAULT_TTL_SECONDS))
+    cache_path = os.environ.get('CULIFLOW_WEATHER_CACHE', DEFAULT_CACHE_PATH)
+    return CachedWeatherProvider(provider, ttl_seconds=ttl, cache_path=cache_path)
+
+
+def get_weather_provider(api_key: str) -> WeatherProvider:
+    """Return the process-wide provider so every request shares one cache"""
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = build_weather_provider(api_key)
+    return _default_provider
@@ -0,0 +1,349 @@
+"""Single-process ASGI gateway serving every CuliFlow service
+
+All four Gradio apps are mounted on one FastAPI application, so gradio,
+pandas and sklearn are imported once and the in-memory caches (sales
+pipelines, registry entries, weather and holiday lookups) are shared by
+every service instead of being duplicated per process.
+
+With --warm-start (or CULIFLOW_WARM_START=1) the heavy libraries, the
+VADER lexicon and the most recently used registry models are loaded before
+the port opens, so the first request after a restart does not pay for them.
+
+Besides the Gradio apps, POST /stream/senti and /stream/score take a CSV
+upload and stream results back as newline-delimited JSON while they are
+being computed. POST /sentiment/reviews appends a CSV of reviews to the
+incremental sentiment store and GET /sentiment/summary returns its per-dish
+aggregates. POST /plots/score?item=... returns one item's scorecard figure
+as a Plotly JSON spec, rendered on demand and cached.
+
+POST /datasets stores a sales CSV under a content-addressed id (its
+SHA-256); every sales endpoint, Gradio ones included, accepts that
+dataset_id in place of a file so dashboards upload their history once.
+
+GET /metrics serves per-stage latency histograms and request counters for
+every service in the Prometheus text format; GET /<service>/metrics serves
+one service's series (see telemetry.py).
+
+The gateway's own routes send CORS headers for the origins listed in
+CULIFLOW_CORS_ORIGINS (comma-separated; the Vite dev server by default),
+so the frontend can call them from the browser. The mounted Gradio apps
+answer CORS requests themselves.
+
+GET /models/memory reports the compiled forecasting models resident in
+memory per tenant (the optional "tenant" input of the forecast apps) and
+the bytes of every item's model, against the CULIFLOW_TENANT_MODEL_MB and
+CULIFLOW_MODEL_MEMORY_MB budgets.
+
+Usage: python gateway.py [--host HOST] [--port PORT] [--workers N] [--warm-start]
+"""
+import argparse
+import importlib
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
+
+import anyio.to_thread
+import uvicorn
+from fastapi import FastAPI, File, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Mount path -> (module, function building its Gradio Blocks)
+SERVICES = {
+    'datedem': ('datedem', 'build_app'),
+    'demanda': ('demanda', 'build_interface'),
+    'senti': ('senti', 'build_interface'),
+    'score': ('score', 'build_interface'),
+}
+
+DEFAULT_HOST = os.environ.get('CULIFLOW_GATEWAY_HOST', '127.0.0.1')
+DEFAULT_PORT = int(os.environ.get('CULIFLOW_GATEWAY_PORT', '7860'))
+DEFAULT_WORKERS = int(os.environ.get('CULIFLOW_GATEWAY_WORKERS', '1'))
+DEFAULT_THREADS = int(os.environ.get('CULIFLOW_GATEWAY_THREADS', '8'))
+DEFAULT_SHUTDOWN_TIMEOUT = int(os.environ.get('CULIFLOW_GATEWAY_SHUTDOWN_TIMEOUT', '30'))
+
+DEFAULT_CORS_ORIGINS = os.environ.get('CULIFLOW_CORS_ORIGINS', 'http://localhost:5173,http://127.0.0.1:5173')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Gradio runs handlers on anyio's default thread limiter, so sizing it
+    # here gives all mounted services one shared worker pool
+    anyio.to_thread.current_default_thread_limiter().total_tokens = app.state.threads
+    if app.state.warm_start:
+        # Runs before uvicorn opens the port
+        await anyio.to_thread.run_sync(warm_start)
+    yield
+    shutdown_training_pool()
+
+
+def shutdown_training_pool() -> None:
+    """Stop the reusable process pool used by TrainingScheduler, if started"""
+    try:
+        from joblib.externals.loky import get_reusable_executor
+        get_reusable_executor().shutdown(wait=True)
+    except Exception as e:
+        print(f"Error stopping training workers: {str(e)}")
+
+
+def warm_start() -> None:
+    """Import the libraries services defer and preload recent registry models"""
+    import plotly.graph_objects  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+
+    import forecasting.pipeline  # noqa: F401
+    from forecasting import get_registry
+    from sentiment import get_analyzer
+
+    get_analyzer()
+    try:
+        warmed = get_registry().warm()
+        print(f"Warm start: loaded {len(warmed)} model sets from the registry")
+    except Exception as e:
+        print(f"Error warming model registry: {str(e)}")
+
+
+class GatewayCORSMiddleware(CORSMiddleware):
+    """CORS for the gateway's own routes, leaving the mounted Gradio apps alone
+
+    Gradio already adds CORS headers to its responses; adding them again
+    would send duplicate Access-Control-Allow-Origin values, which browsers
+    reject.
+    """
+
+    def __init__(self, app, mounts=(), **options):
+        super().__init__(app, **options)
+        self.mounts = tuple(f"/{name}/" for name in mounts)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get('path', '')
+        if scope['type'] == 'http' and path.startswith(self.mounts) and not path.endswith('/metrics'):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+def load_service(name: str):
+    module_name, builder = SERVICES[name]
+    return getattr(importlib.import_module(module_name), builder)()
+
+
+def metrics_response(service: Optional[str] = None):
+    from fastapi.responses import PlainTextResponse
+    from telemetry import PROMETHEUS_MEDIA_TYPE, render_metrics
+
+    return PlainTextResponse(render_metrics(service), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
+def service_metrics(name: str):
+    """GET handler serving one service's metrics"""
+    def endpoint():
+        return metrics_response(name)
+    return endpoint
+
+
+def spool_upload(upload: UploadFile) -> str:
+    """Copy an uploaded CSV to a temporary file and return its path"""
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            shutil.copyfileobj(upload.file, fh)
+    except BaseException:
+        remove_file(path)
+        raise
+    return path
+
+
+def remove_file(path: str) -> None:
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def error_response(result: dict, status_code: int = 400) -> JSONResponse:
+    """A service's {"error": ...} result with a 4xx status"""
+    return JSONResponse(result, status_code=status_code)
+
+
+def dataset_path(dataset_id: Optional[str]) -> str:
+    """Path of a stored dataset; raises for a missing or unknown id"""
+    from forecasting import get_upload_store
+
+    if not dataset_id:
+        raise ValueError("Upload a sales CSV or pass a dataset_id")
+    return get_upload_store().path(dataset_id)
+
+
+def stream_upload(upload: UploadFile, stream_fn, **kwargs) -> StreamingResponse:
+    """Spool an upload to disk and stream ``stream_fn(path, **kwargs)`` as NDJSON"""
+    from streaming import NDJSON_MEDIA_TYPE
+
+    path = spool_upload(upload)
+
+    def body():
+        try:
+            yield from stream_fn(path, **kwargs)
+        finally:
+            remove_file(path)
+
+    # The background task also covers a client that disconnects before the
+    # body is iterated, when the generator's finally never runs
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE,
+                             background=BackgroundTask(remove_file, path))
+
+
+def create_app(services=None, threads: int = DEFAULT_THREADS, warm: Optional[bool] = None,
+               cors_origins: str = DEFAULT_CORS_ORIGINS) -> FastAPI:
+    """Build the gateway with each service mounted under /<name>/"""
+    import gradio as gr
+
+    if warm is None:
+        warm = os.environ.get('CULIFLOW_WARM_START', '0') == '1'
+    services = list(services or SERVICES)
+    app = FastAPI(title="CuliFlow", lifespan=lifespan)
+    app.state.threads = threads
+    app.state.warm_start = warm
+    app.add_middleware(
+        GatewayCORSMiddleware,
+        mounts=services,
+        allow_origins=[origin.strip() for origin in cors_origins.split(',') if origin.strip()],
+        allow_methods=['GET', 'POST'],
+        allow_headers=['*']
+    )
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok", "services": services}
+
+    @app.get("/metrics")
+    def prometheus_metrics(service: Optional[str] = None):
+        return metrics_response(service)
+
+    for name in services:
+        # Registered before the Gradio apps are mounted under the same prefix
+        app.add_api_route(f"/{name}/metrics", service_metrics(name), methods=["GET"])
+
+    @app.post("/stream/senti")
+    def stream_senti(file: UploadFile = File(...), output: str = 'summary'):
+        from senti import stream_sentiments
+        return stream_upload(file, stream_sentiments, output=output)
+
+    @app.post("/stream/score")
+    def stream_score(file: Optional[UploadFile] = File(None), mode: str = 'per_item',
+                     dataset_id: Optional[str] = None):
+        from score import stream_sales_performance
+        from streaming import NDJSON_MEDIA_TYPE
+
+        if file is not None:
+            return stream_upload(file, stream_sales_performance, mode=mode)
+        try:
+            path = dataset_path(dataset_id)
+        except KeyError as e:
+            return error_response({"error": str(e)}, status_code=404)
+        except ValueError as e:
+            return error_response({"error": str(e)})
+        return StreamingResponse(stream_sales_performance(path, mode=mode, data_digest=dataset_id),
+                                 media_type=NDJSON_MEDIA_TYPE)
+
+    @app.post("/plots/score")
+    def score_plot(item: str, file: Optional[UploadFile] = File(None), mode: str = 'per_item',
+                   dataset_id: Optional[str] = None):
+        from fastapi.responses import Response
+        from score import performance_plot
+
+        if file is not None:
+            path = spool_upload(file)
+            try:
+                spec = performance_plot(path, item, mode=mode)
+            finally:
+                remove_file(path)
+        else:
+            try:
+                path = dataset_path(dataset_id)
+            except KeyError as e:
+                return error_response({"error": str(e)}, status_code=404)
+            except ValueError as e:
+                return error_response({"error": str(e)})
+            spec = performance_plot(path, item, mode=mode, data_digest=dataset_id)
+        if isinstance(spec, dict):
+            return error_response(spec)
+        # Already serialized; skip re-encoding through FastAPI
+        return Response(spec, media_type='application/json')
+
+    @app.post("/datasets")
+    def upload_dataset(file: UploadFile = File(...)):
+        from forecasting import get_upload_store
+
+        store = get_upload_store()
+        dataset_id = store.put(file.file)
+        return {"dataset_id": dataset_id, "bytes": store.size(dataset_id)}
+
+    @app.get("/datasets/{dataset_id}")
+    def dataset_info(dataset_id: str):
+        from forecasting import get_upload_store
+
+        try:
+            return {"dataset_id": dataset_id, "bytes": get_upload_store().size(dataset_id)}
+        except KeyError as e:
+            return error_response({"error": str(e)}, status_code=404)
+
+    @app.get("/models/memory")
+    def model_memory():
+        from forecasting import get_model_memory
+
+        return get_model_memory().report()
+
+    @app.post("/sentiment/reviews")
+    def sentiment_reviews(file: UploadFile = File(...), batch_id: Optional[str] = None):
+        from senti import append_reviews
+
+        path = spool_upload(file)
+        try:
+            result = append_reviews(path, batch_id=batch_id)
+        finally:
+            remove_file(path)
+        return error_response(result) if 'error' in result else result
+
+    @app.get("/sentiment/summary")
+    def sentiment_summary():
+        from senti import sentiment_dashboard
+
+        summary = sentiment_dashboard()
+        # Only a failing store produces an error here
+        return error_response(summary, status_code=500) if 'error' in summary else summary
+
+    for name in services:
+        app = gr.mount_gradio_app(app, load_service(name), path=f"/{name}")
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve all CuliFlow services from one process")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="uvicorn worker processes; in-memory caches are per worker")
+    parser.add_argument('--warm-start', action='store_true',
+                        help="preload libraries and registry models before accepting requests")
+    args = parser.parse_args()
+    if args.warm_start:
+        # Read by create_app in every worker process
+        os.environ['CULIFLOW_WARM_START'] = '1'
+
+    uvicorn.run(
+        'gateway:create_app',
+        factory=True,
+        app_dir=BACKEND_DIR,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=DEFAULT_SHUTDOWN_TIMEOUT
+    )
+
+
+if __name__ == '__main__':
+    main()
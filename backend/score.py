@@ -1,46 +1,54 @@
-import json
+import os
+import threading
 import warnings
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from datetime import datetime
 
-import gradio as gr
 import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from forecasting import HOURLY_SPEC, resolve_sales_csv
+from streaming import ndjson_line
+from telemetry import instrumented, launch_with_metrics, stage
 
 warnings.filterwarnings('ignore')
 
+# Rendered plot specs kept per (dataset digest, mode, item)
+PLOT_CACHE_ENTRIES = int(os.environ.get('CULIFLOW_PLOT_CACHE_ENTRIES', '256'))
+_plot_specs = OrderedDict()
+_plot_specs_lock = threading.Lock()
+
 class EnhancedSalesPrediction:
-    def __init__(self):
+    MODES = ('per_item', 'global')
+    MODEL_PARAMS = HOURLY_SPEC.model_params
+
+    def __init__(self, mode='per_item'):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown model mode: {mode}")
+        self.mode = mode
+        self.spec = HOURLY_SPEC.replace(mode=mode)
+        self.pipeline = None
         self.encoders = {}
-        self.scaler = StandardScaler()
         self.models = {}
         self.feature_columns = None
         self.performance_metrics = {}
         
+    def load_data(self, csv_path, data_digest=None):
+        """Read and preprocess a sales CSV through the shared forecasting pipeline"""
+        from forecasting.pipeline import get_pipeline
+        
+        self.pipeline = get_pipeline(csv_path, data_digest=data_digest)
+        # Scores the table the forecast service trains on
+        self.spec = self.pipeline.training_spec(self.spec)
+        df = self.pipeline.table(self.spec.table)
+        self.encoders.update(self.pipeline.encoders)
+        return df
+    
     def preprocess_data(self, df):
         """Preprocess the data with minimal required features"""
-        try:
-            df['date'] = pd.to_datetime(df['date'], format='%d-%m-%Y')
-        except ValueError:
-            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
-            
-        df['time'] = pd.to_datetime(df['time'], format='%H:%M:%S', errors='coerce').dt.time
-        df['hour'] = df['time'].apply(lambda x: x.hour if x else 0)
-        
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['month'] = df['date'].dt.month
-        
-        if 'item_name' in df.columns:
-            df['item_name'] = df['item_name'].fillna('Unknown')
-            self.encoders['item_name'] = LabelEncoder()
-            self.encoders['item_name'].fit(df['item_name'].unique())
-            df['item_name'] = self.encoders['item_name'].transform(df['item_name'])
+        from forecasting.pipeline import preprocess_sales_frame
         
+        df, self.encoders['item_name'] = preprocess_sales_frame(df)
         return df
     
     def prepare_features(self, df):
@@ -48,60 +56,68 @@ class EnhancedSalesPrediction:
             self.feature_columns = ['hour', 'day_of_week', 'month']
         return df[self.feature_columns]
     
-    def calculate_time_based_metrics(self, actual, predicted, dates):
-        """Calculate metrics for different time periods"""
-        df = pd.DataFrame({
-            'date': pd.to_datetime(dates),
-            'actual': actual,
-            'predicted': predicted
-        })
+    def aggregate_periods(self, actual, predicted, dates):
+        """Daily, weekly and monthly actual/predicted sums, computed in one pass
+
+        Rows are bucketed by integer day number once; weeks and months are
+        then rolled up from the daily sums. Week keys follow strftime('%Y-%W')
+        (Monday-based, days before the first Monday are week 00) so the
+        buckets match the labels shown in the plots.
+        """
+        days, day_index = np.unique(np.asarray(dates, dtype='datetime64[D]'), return_inverse=True)
+        daily_actual = np.bincount(day_index, weights=np.asarray(actual, dtype=np.float64),
+                                   minlength=len(days))
+        daily_predicted = np.bincount(day_index, weights=np.asarray(predicted, dtype=np.float64),
+                                      minlength=len(days))
         
-        # Daily aggregation
-        daily = df.groupby(df['date'].dt.strftime('%Y-%m-%d')).agg({
-            'actual': 'sum',
-            'predicted': 'sum'
-        })
+        years = days.astype('datetime64[Y]')
+        day_of_year = (days - years.astype('datetime64[D]')).astype(np.int64)
+        weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday; Monday is 0
+        week_keys = (years.astype(np.int64) + 1970) * 100 + (day_of_year + 7 - weekday) // 7
+        month_keys = days.astype('datetime64[M]')
         
-        # Weekly aggregation
-        df['week'] = df['date'].dt.strftime('%Y-%W')
-        weekly = df.groupby('week').agg({
-            'actual': 'sum',
-            'predicted': 'sum'
-        })
+        aggregates = {
+            'daily': pd.DataFrame({'actual': daily_actual, 'predicted': daily_predicted},
+                                  index=np.datetime_as_string(days, unit='D'))
+        }
+        for period, keys, label in (
+            ('weekly', week_keys, lambda k: [f"{key // 100}-{key % 100:02d}" for key in k]),
+            ('monthly', month_keys, lambda k: np.datetime_as_string(k, unit='M'))
+        ):
+            periods, period_index = np.unique(keys, return_inverse=True)
+            aggregates[period] = pd.DataFrame({
+                'actual': np.bincount(period_index, weights=daily_actual, minlength=len(periods)),
+                'predicted': np.bincount(period_index, weights=daily_predicted, minlength=len(periods))
+            }, index=label(periods))
         
-        # Monthly aggregation
-        df['month'] = df['date'].dt.strftime('%Y-%m')
-        monthly = df.groupby('month').agg({
-            'actual': 'sum',
-            'predicted': 'sum'
-        })
+        return aggregates
+    
+    def calculate_time_based_metrics(self, actual, predicted, dates, aggregates=None):
+        """Calculate metrics for different time periods"""
+        if aggregates is None:
+            aggregates = self.aggregate_periods(actual, predicted, dates)
         
         metrics = {
-            'daily': self.calculate_metrics(daily['actual'], daily['predicted']),
-            'weekly': self.calculate_metrics(weekly['actual'], weekly['predicted']),
-            'monthly': self.calculate_metrics(monthly['actual'], monthly['predicted']),
-            'overall': self.calculate_metrics(actual, predicted)
+            period: self.calculate_metrics(totals['actual'], totals['predicted'])
+            for period, totals in aggregates.items()
         }
+        metrics['overall'] = self.calculate_metrics(actual, predicted)
         
         return metrics
     
     def calculate_metrics(self, actual, predicted):
         """Calculate performance metrics"""
-        metrics = {
-            'mae': float(mean_absolute_error(actual, predicted)),
-            'rmse': float(np.sqrt(mean_squared_error(actual, predicted))),
-            'r2': float(r2_score(actual, predicted)),
-            'mape': float(np.mean(np.abs((actual - predicted) / np.where(actual == 0, 1, actual))) * 100)
-        }
-        return {k: round(v, 3) for k, v in metrics.items()}
+        from forecasting.backtest import forecast_metrics
+        
+        return forecast_metrics(actual, predicted)
     
-    def create_performance_plots(self, actual, predicted, dates):
+    def create_performance_plots(self, actual, predicted, dates, aggregates=None):
         """Create performance visualization"""
-        df = pd.DataFrame({
-            'date': pd.to_datetime(dates),
-            'actual': actual,
-            'predicted': predicted
-        })
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        
+        if aggregates is None:
+            aggregates = self.aggregate_periods(actual, predicted, dates)
         
         # Create subplots
         fig = make_subplots(
@@ -111,55 +127,19 @@ class EnhancedSalesPrediction:
             vertical_spacing=0.12
         )
         
-        # Daily plot
-        daily = df.groupby(df['date'].dt.strftime('%Y-%m-%d')).agg({
-            'actual': 'sum',
-            'predicted': 'sum'
-        })
-        fig.add_trace(
-            go.Scatter(x=daily.index, y=daily['actual'],
-                      name='Actual (Daily)', line=dict(color='blue')),
-            row=1, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=daily.index, y=daily['predicted'],
-                      name='Predicted (Daily)', line=dict(color='red')),
-            row=1, col=1
-        )
-        
-        # Weekly plot
-        df['week'] = df['date'].dt.strftime('%Y-%W')
-        weekly = df.groupby('week').agg({
-            'actual': 'sum',
-            'predicted': 'sum'
-        })
-        fig.add_trace(
-            go.Scatter(x=weekly.index, y=weekly['actual'],
-                      name='Actual (Weekly)', line=dict(color='blue')),
-            row=1, col=2
-        )
-        fig.add_trace(
-            go.Scatter(x=weekly.index, y=weekly['predicted'],
-                      name='Predicted (Weekly)', line=dict(color='red')),
-            row=1, col=2
-        )
-        
-        # Monthly plot
-        df['month'] = df['date'].dt.strftime('%Y-%m')
-        monthly = df.groupby('month').agg({
-            'actual': 'sum',
-            'predicted': 'sum'
-        })
-        fig.add_trace(
-            go.Scatter(x=monthly.index, y=monthly['actual'],
-                      name='Actual (Monthly)', line=dict(color='blue')),
-            row=2, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=monthly.index, y=monthly['predicted'],
-                      name='Predicted (Monthly)', line=dict(color='red')),
-            row=2, col=1
-        )
+        # Daily, weekly and monthly comparisons
+        for period, (row, col) in zip(('daily', 'weekly', 'monthly'), ((1, 1), (1, 2), (2, 1))):
+            totals = aggregates[period]
+            fig.add_trace(
+                go.Scatter(x=totals.index, y=totals['actual'],
+                          name=f'Actual ({period.title()})', line=dict(color='blue')),
+                row=row, col=col
+            )
+            fig.add_trace(
+                go.Scatter(x=totals.index, y=totals['predicted'],
+                          name=f'Predicted ({period.title()})', line=dict(color='red')),
+                row=row, col=col
+            )
         
         # Scatter plot
         fig.add_trace(
@@ -180,68 +160,146 @@ class EnhancedSalesPrediction:
         fig.update_layout(height=800, showlegend=True, title_text="Performance Analysis")
         return fig
     
-    def train_and_evaluate(self, df):
-        """Train models and evaluate performance"""
-        results = {}
+    def iter_item_holdouts(self, df):
+        """Fit (or reuse) the models, then yield (item_name, actual, predicted, dates) per item"""
+        from forecasting.parallel_training import DEFAULT_HOLDOUT_DAYS
         
-        for item_code in df['item_name'].unique():
-            item_data = df[df['item_name'] == item_code].copy()
-            X = self.prepare_features(item_data)
-            y = item_data['quantity']
-            
-            if len(y) < 2:
+        self.prepare_features(df)
+        if self.pipeline is None:
+            raise ValueError("Call load_data before train_and_evaluate")
+        # Holdout fits leave out each item's last days; forecasts use full-history fits
+        if df is self.pipeline.table(self.spec.table):
+            self.models = self.pipeline.models(self.spec, holdout_days=DEFAULT_HOLDOUT_DAYS)
+        else:
+            self.models = self.pipeline.train(self.spec, df, holdout_days=DEFAULT_HOLDOUT_DAYS)
+        
+        if self.mode == 'global':
+            yield from self.iter_global_holdouts(df)
+            return
+        
+        for item_code, model_info in self.models.items():
+            holdout = model_info.get('holdout')
+            if holdout is None:
                 continue
-                
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
-            
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-            
-            model = RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42)
-            model.fit(X_train_scaled, y_train)
-            
-            y_pred = model.predict(X_test_scaled)
             
-            item_name = self.encoders['item_name'].inverse_transform([item_code])[0]
-            
-            test_dates = item_data.iloc[len(y_train):]['date'].values
-            
-            # Calculate performance metrics
-            metrics = self.calculate_time_based_metrics(
-                y_test, 
-                y_pred,
-                test_dates
-            )
+            item_name = self.encoders['item_name'].inverse_transform([int(item_code)])[0]
+            # The holdout rows are the item's last days; look their dates up by row label
+            test_dates = df.loc[holdout['index'], 'date'].values
+            yield item_name, holdout['actual'], holdout['predicted'], test_dates
+    
+    def iter_global_holdouts(self, df):
+        """Per-item holdout rows of the shared global model"""
+        global_model = self.models['global']['model']
+        holdout = global_model.holdout.join(df['date'])
+        item_names = self.encoders['item_name'].classes_
+        
+        for item_code, item_holdout in holdout.groupby('item_name', sort=True):
+            if len(item_holdout) < 2:
+                continue
             
-            # Create performance plots
-            plots = self.create_performance_plots(
-                y_test,
-                y_pred,
-                test_dates
+            yield (
+                item_names[item_code],
+                item_holdout['actual'].to_numpy(),
+                item_holdout['predicted'].to_numpy(),
+                item_holdout['date'].values
             )
-            
+    
+    def train_and_evaluate(self, df):
+        """Train models and evaluate performance
+
+        Figures are not built here; pass an item's 'holdout' and 'aggregates'
+        to create_performance_plots when its plot is actually wanted.
+        """
+        results = {}
+        
+        for item_name, y_test, y_pred, test_dates in self.iter_item_holdouts(df):
+            with stage('evaluate'):
+                aggregates = self.aggregate_periods(y_test, y_pred, test_dates)
+                metrics = self.calculate_time_based_metrics(y_test, y_pred, test_dates, aggregates)
             results[item_name] = {
                 'metrics': metrics,
-                'plots': plots
+                'holdout': (y_test, y_pred, test_dates),
+                'aggregates': aggregates
             }
             
         return results
+    
+    def plot_item(self, results, item_name):
+        """Build the performance figure for one item of train_and_evaluate's results"""
+        item_results = results[item_name]
+        with stage('plot'):
+            return self.create_performance_plots(*item_results['holdout'], item_results['aggregates'])
 
-def analyze_sales_performance(csv_file):
+REQUIRED_COLUMNS = ['date', 'time', 'item_name', 'quantity']
+
+def format_item_metrics(metrics):
+    """Per-item metrics in the shape returned to clients"""
+    return {
+        "daily_metrics": metrics["daily"],
+        "weekly_metrics": metrics["weekly"],
+        "monthly_metrics": metrics["monthly"],
+        "overall_metrics": metrics["overall"]
+    }
+
+@instrumented('score')
+def backtest_sales_performance(csv_file, mode='per_item', horizon_days=7, n_folds=8, dataset_id=None):
+    """
+    Rolling-origin backtest: weekly expanding-window folds, metrics per day ahead
+
+    Folds already evaluated for an earlier upload with the same history are
+    reused, so appending a week of sales only fits the newest fold.
+    """
     try:
-        # Read and validate CSV file
-        df = pd.read_csv(csv_file.name)
-        required_columns = ['date', 'time', 'item_name', 'quantity']
-        if not all(col in df.columns for col in required_columns):
+        if mode not in EnhancedSalesPrediction.MODES:
+            return {"error": f"Model mode must be one of: {', '.join(EnhancedSalesPrediction.MODES)}"}
+        
+        csv_path, data_digest = resolve_sales_csv(csv_file, dataset_id)
+        header = pd.read_csv(csv_path, nrows=0).columns
+        if not all(col in header for col in REQUIRED_COLUMNS):
+            return {"error": f"CSV must contain columns: {', '.join(REQUIRED_COLUMNS)}"}
+        
+        analyzer = EnhancedSalesPrediction(mode=mode)
+        analyzer.load_data(csv_path, data_digest)
+        with stage('backtest'):
+            backtest = analyzer.pipeline.backtest(analyzer.spec, horizon_days=int(horizon_days),
+                                                  n_folds=int(n_folds))
+        
+        return {
+            "analysis_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "fold_origins": backtest["origins"],
+            "horizon_days": backtest["horizon_days"],
+            "folds_evaluated": backtest["folds_evaluated"],
+            "folds_cached": backtest["folds_cached"],
+            "item_backtests": backtest["items"]
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+def figure_spec(fig):
+    """Compact JSON spec of a figure: data and layout without the theme template"""
+    with stage('serialize'):
+        fig.update_layout(template=None)
+        return fig.to_json()
+
+@instrumented('score')
+def analyze_sales_performance(csv_file, mode='per_item', plot_item=None, dataset_id=None):
+    try:
+        if mode not in EnhancedSalesPrediction.MODES:
+            return {"error": f"Model mode must be one of: {', '.join(EnhancedSalesPrediction.MODES)}"}, None
+        
+        # A stored dataset id (see POST /datasets) replaces the upload
+        csv_path, data_digest = resolve_sales_csv(csv_file, dataset_id)
+        
+        # Validate the header, then read only the needed columns
+        header = pd.read_csv(csv_path, nrows=0).columns
+        if not all(col in header for col in REQUIRED_COLUMNS):
             return {
-                "error": f"CSV must contain columns: {', '.join(required_columns)}"
-            }
+                "error": f"CSV must contain columns: {', '.join(REQUIRED_COLUMNS)}"
+            }, None
         
         # Initialize and run analysis
-        analyzer = EnhancedSalesPrediction()
-        processed_data = analyzer.preprocess_data(df)
+        analyzer = EnhancedSalesPrediction(mode=mode)
+        processed_data = analyzer.load_data(csv_path, data_digest)
         results = analyzer.train_and_evaluate(processed_data)
         
         # Format results for display
@@ -252,31 +310,145 @@ def analyze_sales_performance(csv_file):
         }
         
         for item_name, item_results in results.items():
-            formatted_results["item_performance"][item_name] = {
-                "daily_metrics": item_results["metrics"]["daily"],
-                "weekly_metrics": item_results["metrics"]["weekly"],
-                "monthly_metrics": item_results["metrics"]["monthly"],
-                "overall_metrics": item_results["metrics"]["overall"]
-            }
+            formatted_results["item_performance"][item_name] = format_item_metrics(item_results["metrics"])
             
-        return formatted_results, results[list(results.keys())[0]]['plots']
+        # Only the requested item (default: the first) gets a figure
+        if not plot_item:
+            plot_item = next(iter(results))
+        elif plot_item not in results:
+            return {"error": f"No holdout results for item: {plot_item}"}, None
+        return formatted_results, analyzer.plot_item(results, plot_item)
         
     except Exception as e:
         return {"error": str(e)}, None
 
-# Gradio Interface
-iface = gr.Interface(
-    fn=analyze_sales_performance,
-    inputs=[
-        gr.File(label="Upload Sales Data CSV")
-    ],
-    outputs=[
-        gr.JSON(label="Performance Metrics"),
-        gr.Plot(label="Performance Visualization")
-    ],
-    title="Enhanced Sales Prediction Performance Analysis",
-    description="Upload your sales data CSV to get comprehensive performance metrics and visualizations."
-)
+@instrumented('score')
+def stream_sales_performance(csv_path, mode='per_item', data_digest=None):
+    """Yield the scorecard as NDJSON lines, one per item as soon as it is scored
+
+    Plots are not streamed; the last line carries the item count. Errors are
+    reported as an {"error": ...} line so the client can stop reading.
+    """
+    try:
+        if mode not in EnhancedSalesPrediction.MODES:
+            yield ndjson_line({"error": f"Model mode must be one of: {', '.join(EnhancedSalesPrediction.MODES)}"})
+            return
+        
+        header = pd.read_csv(csv_path, nrows=0).columns
+        if not all(col in header for col in REQUIRED_COLUMNS):
+            yield ndjson_line({"error": f"CSV must contain columns: {', '.join(REQUIRED_COLUMNS)}"})
+            return
+        
+        analyzer = EnhancedSalesPrediction(mode=mode)
+        processed_data = analyzer.load_data(csv_path, data_digest)
+        
+        items = 0
+        for item_name, y_test, y_pred, test_dates in analyzer.iter_item_holdouts(processed_data):
+            with stage('evaluate'):
+                metrics = analyzer.calculate_time_based_metrics(y_test, y_pred, test_dates)
+            yield ndjson_line({"item": str(item_name), **format_item_metrics(metrics)})
+            items += 1
+        
+        yield ndjson_line({
+            "done": True,
+            "items": items,
+            "analysis_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+    except Exception as e:
+        yield ndjson_line({"error": str(e)})
+
+@instrumented('score')
+def performance_plot(csv_path, item_name, mode='per_item', data_digest=None):
+    """
+    Plotly JSON spec of one item's scorecard plots, built on first request
+
+    Specs are cached per dataset contents, mode and item, so repeated views
+    of an item (or switching back to it) do not rebuild the figure.
+    """
+    try:
+        if mode not in EnhancedSalesPrediction.MODES:
+            return {"error": f"Model mode must be one of: {', '.join(EnhancedSalesPrediction.MODES)}"}
+        
+        header = pd.read_csv(csv_path, nrows=0).columns
+        if not all(col in header for col in REQUIRED_COLUMNS):
+            return {"error": f"CSV must contain columns: {', '.join(REQUIRED_COLUMNS)}"}
+        
+        analyzer = EnhancedSalesPrediction(mode=mode)
+        processed_data = analyzer.load_data(csv_path, data_digest)
+        key = (analyzer.pipeline.data_digest, mode, item_name)
+        with _plot_specs_lock:
+            if key in _plot_specs:
+                _plot_specs.move_to_end(key)
+                return _plot_specs[key]
+        
+        for name, y_test, y_pred, test_dates in analyzer.iter_item_holdouts(processed_data):
+            if str(name) != item_name:
+                continue
+            with stage('plot'):
+                fig = analyzer.create_performance_plots(y_test, y_pred, test_dates)
+            spec = figure_spec(fig)
+            with _plot_specs_lock:
+                _plot_specs[key] = spec
+                while len(_plot_specs) > PLOT_CACHE_ENTRIES:
+                    _plot_specs.popitem(last=False)
+            return spec
+        
+        return {"error": f"No holdout results for item: {item_name}"}
+    except Exception as e:
+        return {"error": str(e)}
+
+def build_interface():
+    """Build the Gradio UI (scorecard and backtest tabs); gradio is imported here so the module imports fast"""
+    import gradio as gr
+    
+    scorecard = gr.Interface(
+        fn=analyze_sales_performance,
+        inputs=[
+            gr.File(label="Upload Sales Data CSV"),
+            gr.Radio(choices=list(EnhancedSalesPrediction.MODES),
+                     value='per_item',
+                     label="Model Mode",
+                     info="per_item trains one forest per item; global trains a single forest across all items"),
+            gr.Textbox(label="Plot Item",
+                       info="Item to visualize; leave empty for the first item"),
+            gr.Textbox(label="Dataset ID",
+                       info="ID of a dataset stored with POST /datasets; used instead of the upload")
+        ],
+        outputs=[
+            gr.JSON(label="Performance Metrics"),
+            gr.Plot(label="Performance Visualization")
+        ],
+        title="Enhanced Sales Prediction Performance Analysis",
+        description="Upload your sales data CSV to get comprehensive performance metrics and visualizations."
+    )
+    
+    backtest = gr.Interface(
+        fn=backtest_sales_performance,
+        inputs=[
+            gr.File(label="Upload Sales Data CSV"),
+            gr.Radio(choices=list(EnhancedSalesPrediction.MODES),
+                     value='per_item',
+                     label="Model Mode"),
+            gr.Slider(minimum=1, maximum=28, step=1, value=7, label="Horizon (days)"),
+            gr.Slider(minimum=1, maximum=52, step=1, value=8, label="Folds",
+                      info="Weekly origins, each trained on all earlier sales"),
+            gr.Textbox(label="Dataset ID",
+                       info="ID of a dataset stored with POST /datasets; used instead of the upload")
+        ],
+        outputs=gr.JSON(label="Backtest Metrics by Horizon"),
+        title="Rolling-Origin Backtest",
+        description="Time-ordered backtest: every fold trains on the past only and is scored on the days that follow.",
+        api_name="backtest"
+    )
+    
+    return gr.TabbedInterface([scorecard, backtest], ["Scorecard", "Backtest"])
+
+def __getattr__(name):
+    # Keep `from score import iface` working without building the UI on import
+    if name == 'iface':
+        globals()['iface'] = build_interface()
+        return globals()['iface']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
-    iface.launch()
\ No newline at end of file
+    launch_with_metrics(build_interface())
@@ -1,63 +1,160 @@
-import gradio as gr
-import pandas as pd
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import nltk
 import json
+import os
+
+import orjson
+import pandas as pd
 
-# Download VADER lexicon
-nltk.download("vader_lexicon")
+from sentiment import SentimentCounter, get_engine, get_store, summarize
+from streaming import ndjson_line
+from telemetry import instrumented, launch_with_metrics, stage
 
-# Initialize the VADER sentiment analyzer
-sid = SentimentIntensityAnalyzer()
+# summary: counts per sentiment overall and per 'Food Name'
+# columns: every input column plus Predicted_Sentiment, one list per column
+OUTPUT_FORMATS = ("summary", "columns")
 
+# Reviews scored per streamed batch
+STREAM_CHUNK_ROWS = int(os.environ.get("CULIFLOW_SENTIMENT_STREAM_ROWS", "50000"))
 
-def analyze_sentiments(file):
+
+@instrumented("senti")
+def analyze_sentiments(file, output="summary"):
     """
     Process uploaded CSV file and return sentiment analysis results as JSON
     """
     try:
-        # Read the CSV file
-        df = pd.read_csv(file.name)
+        if output not in OUTPUT_FORMATS:
+            return json.dumps({"error": f"Output must be one of: {', '.join(OUTPUT_FORMATS)}"})
 
-        # Verify if 'Review' column exists
-        if "Review" not in df.columns:
+        # Verify if 'Review' column exists before reading the whole file
+        header = pd.read_csv(file.name, nrows=0).columns
+        if "Review" not in header:
             return json.dumps({"error": "CSV file must contain a 'Review' column"})
 
-        # Define sentiment analysis function
-        def get_sentiment(review_text):
-            if pd.isna(review_text):
-                return "Unknown"
-            sentiment_scores = sid.polarity_scores(str(review_text))
-            compound_score = sentiment_scores["compound"]
-            if compound_score >= 0.05:
-                return "Positive"
-            elif compound_score <= -0.05:
-                return "Negative"
-            else:
-                return "Neutral"
+        # The summary only needs the review text and dish name
+        usecols = None if output == "columns" else [c for c in ("Food Name", "Review") if c in header]
+        with stage("parse"):
+            df = pd.read_csv(file.name, usecols=usecols)
 
-        # Apply sentiment analysis
-        df["Predicted_Sentiment"] = df["Review"].apply(get_sentiment)
+        # Dedupe, cache and (for large files) parallel scoring happen in the engine
+        with stage("sentiment"):
+            labels = get_engine().label(df["Review"])
 
-        # Convert to JSON
-        output_data = df.to_dict(orient="records")
-        return json.dumps(output_data, indent=4)
+        if output == "columns":
+            df["Predicted_Sentiment"] = labels
+            result = {column: df[column].tolist() for column in df.columns}
+        else:
+            groups = df["Food Name"] if "Food Name" in df.columns else None
+            result = summarize(labels, groups, group_key="by_food")
+
+        with stage("serialize"):
+            return orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY).decode()
 
     except Exception as e:
         return json.dumps({"error": f"An error occurred: {str(e)}"})
 
 
-# Create Gradio interface
-iface = gr.Interface(
-    fn=analyze_sentiments,
-    inputs=gr.File(label="Upload CSV file with 'Review' column"),
-    outputs=gr.JSON(label="Sentiment Analysis Results"),
-    title="Review Sentiment Analyzer",
-    description="Upload a CSV file containing a 'Review' column to analyze sentiments. Results will be provided in JSON format.",
-    examples=[],
-    cache_examples=False,
-)
+@instrumented("senti")
+def stream_sentiments(csv_path, output="summary", chunksize=STREAM_CHUNK_ROWS):
+    """
+    Yield sentiment results as NDJSON lines while the file is being read
+
+    Each batch of ``chunksize`` reviews produces one line: its per-dish counts
+    for ``output="summary"``, or its columns plus Predicted_Sentiment for
+    ``output="columns"``. A final line carries the totals for the whole file.
+    """
+    try:
+        if output not in OUTPUT_FORMATS:
+            yield ndjson_line({"error": f"Output must be one of: {', '.join(OUTPUT_FORMATS)}"})
+            return
+
+        header = pd.read_csv(csv_path, nrows=0).columns
+        if "Review" not in header:
+            yield ndjson_line({"error": "CSV file must contain a 'Review' column"})
+            return
+
+        usecols = None if output == "columns" else [c for c in ("Food Name", "Review") if c in header]
+        engine = get_engine()
+        totals = SentimentCounter()
+
+        for batch, chunk in enumerate(pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize)):
+            with stage("sentiment"):
+                labels = engine.label(chunk["Review"])
+            groups = chunk["Food Name"] if "Food Name" in chunk.columns else None
+            totals.add(labels, groups)
+
+            if output == "columns":
+                chunk["Predicted_Sentiment"] = labels
+                data = {column: chunk[column].tolist() for column in chunk.columns}
+                yield ndjson_line({"batch": batch, "rows": len(chunk), "data": data})
+            else:
+                yield ndjson_line({"batch": batch, **summarize(labels, groups, group_key="by_food")})
+
+        yield ndjson_line({"done": True, **totals.as_dict(group_key="by_food")})
+
+    except Exception as e:
+        yield ndjson_line({"error": f"An error occurred: {str(e)}"})
+
+
+@instrumented("senti")
+def append_reviews(csv_path, batch_id=None):
+    """
+    Add a CSV of new reviews to the sentiment store and return the batch receipt
+
+    Only texts the store has not seen before are scored. Re-sending a batch
+    (same ``batch_id``, or the same contents when no id is given) is a no-op.
+    """
+    try:
+        header = pd.read_csv(csv_path, nrows=0).columns
+        if not all(col in header for col in ("Food Name", "Review")):
+            return {"error": "CSV file must contain 'Food Name' and 'Review' columns"}
+
+        with stage("parse"):
+            df = pd.read_csv(csv_path, usecols=["Food Name", "Review"])
+        with stage("sentiment"):
+            return get_store().add_batch(df["Review"], df["Food Name"], batch_id=batch_id)
+
+    except Exception as e:
+        return {"error": f"An error occurred: {str(e)}"}
+
+
+@instrumented("senti")
+def sentiment_dashboard():
+    """Running sentiment counts and mean compound score per dish from the store"""
+    try:
+        return get_store().summary()
+    except Exception as e:
+        return {"error": f"An error occurred: {str(e)}"}
+
+
+def build_interface():
+    """Create the Gradio interface; gradio is imported here so the module imports fast"""
+    import gradio as gr
+
+    return gr.Interface(
+        fn=analyze_sentiments,
+        inputs=[
+            gr.File(label="Upload CSV file with 'Review' column"),
+            gr.Radio(choices=list(OUTPUT_FORMATS),
+                     value="summary",
+                     label="Output",
+                     info="summary counts sentiments per 'Food Name'; columns returns a label for every review"),
+        ],
+        outputs=gr.JSON(label="Sentiment Analysis Results"),
+        title="Review Sentiment Analyzer",
+        description="Upload a CSV file containing a 'Review' column to analyze sentiments. Results will be provided in JSON format.",
+        examples=[],
+        cache_examples=False,
+    )
+
+
+def __getattr__(name):
+    # Keep `from senti import iface` working without building the UI on import
+    if name == "iface":
+        globals()["iface"] = build_interface()
+        return globals()["iface"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Launch the app
 if __name__ == "__main__":
-    iface.launch()
+    launch_with_metrics(build_interface())
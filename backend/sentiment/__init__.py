@@ -0,0 +1,16 @@
+"""Review sentiment scoring used by the senti service"""
+from .engine import (LABELS, SentimentCounter, SentimentEngine, get_analyzer, get_engine,
+                     label_scores, summarize)
+from .store import SentimentStore, get_store
+
+__all__ = [
+    'LABELS',
+    'SentimentCounter',
+    'SentimentEngine',
+    'SentimentStore',
+    'get_analyzer',
+    'get_engine',
+    'get_store',
+    'label_scores',
+    'summarize',
+]
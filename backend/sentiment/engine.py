@@ -0,0 +1,189 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# VADER lexicon vendored with the repo (MIT, from vaderSentiment) so that
+# startup never tries to download it
+NLTK_DATA_DIR = os.path.join(BACKEND_DIR, 'nltk_data')
+
+LABELS = ('Positive', 'Negative', 'Neutral', 'Unknown')
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+DEFAULT_CACHE_ENTRIES = int(os.environ.get('CULIFLOW_SENTIMENT_CACHE', '200000'))
+# Below this many unscored texts the pool start-up costs more than it saves
+DEFAULT_PARALLEL_MIN_TEXTS = int(os.environ.get('CULIFLOW_SENTIMENT_PARALLEL_MIN', '20000'))
+
+_analyzer = None
+
+
+def get_analyzer():
+    """Return the VADER sentiment analyzer, loading nltk and the lexicon on first use"""
+    global _analyzer
+    if _analyzer is None:
+        import nltk
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+        if NLTK_DATA_DIR not in nltk.data.path:
+            nltk.data.path.insert(0, NLTK_DATA_DIR)
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def score_chunk(texts: Sequence[str]) -> np.ndarray:
+    """Compound VADER scores for a batch of texts (runs in pool workers)"""
+    polarity_scores = get_analyzer().polarity_scores
+    return np.fromiter((polarity_scores(text)['compound'] for text in texts),
+                       dtype=np.float64, count=len(texts))
+
+
+def default_workers() -> int:
+    configured = os.environ.get('CULIFLOW_SENTIMENT_WORKERS')
+    if configured:
+        return max(1, int(configured))
+    return os.cpu_count() or 1
+
+
+def label_scores(compound: np.ndarray) -> np.ndarray:
+    """Map compound scores to labels; NaN (missing review) becomes Unknown"""
+    return np.select(
+        [compound >= POSITIVE_THRESHOLD, compound <= NEGATIVE_THRESHOLD, np.isnan(compound)],
+        ['Positive', 'Negative', 'Unknown'],
+        default='Neutral'
+    )
+
+
+class SentimentEngine:
+    """Batch VADER scorer for large review files
+
+    Identical review texts are scored once per batch, scores are memoized in
+    a bounded LRU shared across requests, and large batches of unseen texts
+    are sharded over a joblib process pool. VADER itself is pure Python per
+    text, so dedupe and the cache are where most of the time is saved.
+    """
+
+    def __init__(self, n_workers: Optional[int] = None,
+                 cache_entries: int = DEFAULT_CACHE_ENTRIES,
+                 parallel_min_texts: int = DEFAULT_PARALLEL_MIN_TEXTS):
+        self.n_workers = n_workers or default_workers()
+        self.cache_entries = cache_entries
+        self.parallel_min_texts = parallel_min_texts
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, texts: Iterable[str]) -> Dict[str, float]:
+        found = {}
+        with self._lock:
+            for text in texts:
+                score = self._cache.get(text)
+                if score is not None:
+                    self._cache.move_to_end(text)
+                    found[text] = score
+        return found
+
+    def _remember(self, texts: Sequence[str], scores: np.ndarray) -> None:
+        with self._lock:
+            for text, score in zip(texts, scores):
+                self._cache[text] = float(score)
+                self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+    def _score_uncached(self, texts: List[str]) -> np.ndarray:
+        if self.n_workers == 1 or len(texts) < self.parallel_min_texts:
+            return score_chunk(texts)
+
+        from joblib import Parallel, delayed
+
+        chunks = np.array_split(np.asarray(texts, dtype=object), self.n_workers * 4)
+        results = Parallel(n_jobs=self.n_workers, backend='loky')(
+            delayed(score_chunk)(list(chunk)) for chunk in chunks if len(chunk)
+        )
+        return np.concatenate(results)
+
+    def score(self, texts) -> np.ndarray:
+        """Compound score per input text, NaN where the text is missing"""
+        texts = pd.Series(texts, dtype=object)
+        missing = texts.isna().to_numpy()
+        codes, uniques = pd.factorize(texts[~missing].astype(str), sort=False)
+        uniques = list(uniques)
+
+        cached = self._lookup(uniques)
+        unseen = [text for text in uniques if text not in cached]
+        unique_scores = np.empty(len(uniques), dtype=np.float64)
+        if unseen:
+            fresh = self._score_uncached(unseen)
+            self._remember(unseen, fresh)
+            cached.update(zip(unseen, fresh.tolist()))
+        for position, text in enumerate(uniques):
+            unique_scores[position] = cached[text]
+
+        compound = np.full(len(texts), np.nan)
+        compound[~missing] = unique_scores[codes]
+        return compound
+
+    def label(self, texts) -> np.ndarray:
+        """Positive/Negative/Neutral/Unknown label per input text"""
+        return label_scores(self.score(texts))
+
+
+class SentimentCounter:
+    """Running sentiment counts overall and per group, fed one batch at a time"""
+
+    def __init__(self):
+        self.totals = np.zeros(len(LABELS), dtype=np.int64)
+        self.groups = {}
+
+    def add(self, labels, groups=None) -> 'SentimentCounter':
+        labels = pd.Categorical(labels, categories=LABELS)
+        self.totals += np.bincount(labels.codes, minlength=len(LABELS))
+        if groups is not None:
+            group_codes, group_values = pd.factorize(
+                pd.Series(groups, dtype=object).fillna('Unknown').astype(str), sort=True
+            )
+            # One bincount over (group, label) pairs instead of a groupby per dish
+            counts = np.bincount(
+                group_codes * len(LABELS) + labels.codes,
+                minlength=len(group_values) * len(LABELS)
+            ).reshape(-1, len(LABELS))
+            for group, row in zip(group_values, counts):
+                if group in self.groups:
+                    self.groups[group] += row
+                else:
+                    self.groups[group] = row
+        return self
+
+    def as_dict(self, group_key: Optional[str] = 'by_group') -> Dict[str, object]:
+        summary = {
+            'total_reviews': int(self.totals.sum()),
+            'sentiment_counts': dict(zip(LABELS, self.totals.tolist()))
+        }
+        if group_key and self.groups:
+            summary[group_key] = {
+                group: dict(zip(LABELS, self.groups[group].tolist())) for group in sorted(self.groups)
+            }
+        return summary
+
+
+def summarize(labels, groups=None, group_key: str = 'by_group') -> Dict[str, object]:
+    """Sentiment counts overall and, if ``groups`` is given, per group value"""
+    return SentimentCounter().add(labels, groups).as_dict(group_key)
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_engine() -> SentimentEngine:
+    """Return the process-wide engine so the score cache is shared across requests"""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = SentimentEngine()
+        return _default_engine
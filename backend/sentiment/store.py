@@ -0,0 +1,207 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .engine import LABELS, get_engine, label_scores
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STORE_PATH = os.environ.get(
+    'CULIFLOW_SENTIMENT_DB',
+    os.path.join(BACKEND_DIR, '.cache', 'sentiment.sqlite3')
+)
+
+# SQLite caps the number of bound parameters per statement
+LOOKUP_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    text_hash BLOB PRIMARY KEY,
+    compound REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dish_sentiment (
+    dish TEXT PRIMARY KEY,
+    positive INTEGER NOT NULL DEFAULT 0,
+    negative INTEGER NOT NULL DEFAULT 0,
+    neutral INTEGER NOT NULL DEFAULT 0,
+    unknown INTEGER NOT NULL DEFAULT 0,
+    compound_sum REAL NOT NULL DEFAULT 0,
+    scored INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    received_at REAL NOT NULL
+);
+"""
+
+UPSERT_DISH = """
+INSERT INTO dish_sentiment (dish, positive, negative, neutral, unknown, compound_sum, scored)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (dish) DO UPDATE SET
+    positive = positive + excluded.positive,
+    negative = negative + excluded.negative,
+    neutral = neutral + excluded.neutral,
+    unknown = unknown + excluded.unknown,
+    compound_sum = compound_sum + excluded.compound_sum,
+    scored = scored + excluded.scored
+"""
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class SentimentStore:
+    """Persistent review scores and running per-dish sentiment aggregates
+
+    Compound scores are stored once per distinct review text (keyed by its
+    hash), so a text seen in an earlier batch is never rescored. Batches are
+    append-only: each one adds its label counts and compound sums to the
+    per-dish rows in a single transaction, and a batch id already applied is
+    ignored so retried uploads are not double counted. Dashboard reads only
+    touch the per-dish rows.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, engine=None):
+        self.path = path
+        self.engine = engine or get_engine()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; writes open their own BEGIN IMMEDIATE transaction
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _stored_scores(self, conn: sqlite3.Connection, hashes) -> Dict[bytes, float]:
+        found = {}
+        for start in range(0, len(hashes), LOOKUP_CHUNK):
+            chunk = hashes[start:start + LOOKUP_CHUNK]
+            rows = conn.execute(
+                f"SELECT text_hash, compound FROM reviews WHERE text_hash IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            found.update(rows)
+        return found
+
+    def has_batch(self, batch_id: str) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT 1 FROM batches WHERE batch_id = ?', (batch_id,)).fetchone() is not None
+
+    def add_batch(self, reviews, dishes, batch_id: Optional[str] = None) -> Dict[str, Any]:
+        """Score a batch of new reviews and fold it into the per-dish aggregates
+
+        ``batch_id`` defaults to a digest of the batch contents.
+        """
+        reviews = pd.Series(reviews, dtype=object).reset_index(drop=True)
+        dishes = pd.Series(dishes, dtype=object).reset_index(drop=True).fillna('Unknown').astype(str)
+        if len(reviews) != len(dishes):
+            raise ValueError("reviews and dishes must have the same length")
+
+        missing = reviews.isna().to_numpy()
+        codes, texts = pd.factorize(reviews[~missing].astype(str), sort=False)
+        hashes = [text_hash(text) for text in texts]
+        if batch_id is None:
+            row_codes = np.full(len(reviews), -1)
+            row_codes[~missing] = codes
+            digest = hashlib.sha256()
+            for code, dish in zip(row_codes, dishes):
+                digest.update(hashes[code] if code >= 0 else bytes(16))
+                digest.update(dish.encode('utf-8') + b'\0')
+            batch_id = digest.hexdigest()
+
+        result = {'batch_id': batch_id, 'rows': len(reviews), 'new_texts': 0, 'duplicate': False}
+        if self.has_batch(batch_id):
+            result['duplicate'] = True
+            return result
+
+        with closing(self._connect()) as conn:
+            stored = self._stored_scores(conn, hashes)
+        unseen = [position for position, digest in enumerate(hashes) if digest not in stored]
+        unique_scores = np.array([stored.get(digest, np.nan) for digest in hashes], dtype=np.float64)
+        if unseen:
+            unique_scores[unseen] = self.engine.score([texts[position] for position in unseen])
+
+        compound = np.full(len(reviews), np.nan)
+        compound[~missing] = unique_scores[codes]
+        labels = pd.Categorical(label_scores(compound), categories=LABELS)
+
+        dish_codes, dish_values = pd.factorize(dishes, sort=True)
+        counts = np.bincount(
+            dish_codes * len(LABELS) + labels.codes,
+            minlength=len(dish_values) * len(LABELS)
+        ).reshape(-1, len(LABELS))
+        scored = ~np.isnan(compound)
+        compound_sums = np.bincount(dish_codes, weights=np.where(scored, compound, 0.0),
+                                    minlength=len(dish_values))
+        scored_counts = np.bincount(dish_codes, weights=scored, minlength=len(dish_values))
+
+        with self._lock, closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if conn.execute('SELECT 1 FROM batches WHERE batch_id = ?', (batch_id,)).fetchone():
+                    conn.execute('ROLLBACK')
+                    result['duplicate'] = True
+                    return result
+                conn.executemany(
+                    'INSERT OR IGNORE INTO reviews (text_hash, compound) VALUES (?, ?)',
+                    [(hashes[position], float(unique_scores[position])) for position in unseen]
+                )
+                conn.executemany(UPSERT_DISH, [
+                    (dish, *map(int, row), float(total), int(n))
+                    for dish, row, total, n in zip(dish_values, counts, compound_sums, scored_counts)
+                ])
+                conn.execute('INSERT INTO batches (batch_id, rows, received_at) VALUES (?, ?, ?)',
+                             (batch_id, len(reviews), time.time()))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        result['new_texts'] = len(unseen)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        """Sentiment counts overall and per dish, plus each dish's mean compound score"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT dish, positive, negative, neutral, unknown, compound_sum, scored '
+                'FROM dish_sentiment ORDER BY dish'
+            ).fetchall()
+            batches = conn.execute('SELECT COUNT(*) FROM batches').fetchone()[0]
+
+        totals = np.zeros(len(LABELS), dtype=np.int64)
+        by_food = {}
+        for dish, *label_counts, compound_sum, scored in rows:
+            totals += label_counts
+            by_food[dish] = dict(zip(LABELS, label_counts))
+            by_food[dish]['mean_compound'] = round(compound_sum / scored, 4) if scored else None
+
+        return {
+            'total_reviews': int(totals.sum()),
+            'sentiment_counts': dict(zip(LABELS, totals.tolist())),
+            'by_food': by_food,
+            'batches': batches
+        }
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store() -> SentimentStore:
+    """Return the process-wide store backed by CULIFLOW_SENTIMENT_DB"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = SentimentStore()
+        return _default_store
@@ -0,0 +1,14 @@
+"""Newline-delimited JSON helpers for the streaming endpoints"""
+import orjson
+
+from telemetry import stage
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+_NDJSON_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def ndjson_line(record) -> bytes:
+    """Serialize one record as a single NDJSON line"""
+    with stage('serialize'):
+        return orjson.dumps(record, option=_NDJSON_OPTIONS)
@@ -0,0 +1,288 @@
+"""Per-stage latency metrics and per-request timing logs for the backend services
+
+Work inside a request is wrapped in ``stage(name)`` blocks (parse,
+preprocess, features, train, train_item, predict, weather_api,
+holiday_api, serialize, ...). Each block's wall time goes into a
+histogram labelled with the stage and the service handling the current
+request, and blocks that raise are counted. Service entry points are
+wrapped with ``instrumented(service)``, which times the whole request,
+counts it by outcome and, with CULIFLOW_TIMING_LOG=1, prints one JSON
+line per request with the time spent in each stage. ``render_metrics()``
+returns everything in the Prometheus text format: GET /metrics on the
+gateway, and on a service run standalone (``python demanda.py`` or
+``app.py --legacy``) through ``launch_with_metrics``.
+
+Metrics live in process memory, so each gateway worker serves its own.
+CULIFLOW_METRICS=0 turns it all off: ``stage`` returns one shared no-op
+context manager and ``instrumented`` returns the function unwrapped.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+METRICS_ENABLED = os.environ.get('CULIFLOW_METRICS', '1') != '0'
+TIMING_LOG = os.environ.get('CULIFLOW_TIMING_LOG', '0') == '1'
+
+PROMETHEUS_MEDIA_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Stages run outside any instrumented request (warm start, benchmarks)
+NO_SERVICE = 'none'
+
+METRIC_HELP = {
+    'culiflow_stage_seconds': ('histogram', "Wall time of one pipeline stage"),
+    'culiflow_stage_errors_total': ('counter', "Stage runs that raised"),
+    'culiflow_request_seconds': ('histogram', "Wall time of a service request"),
+    'culiflow_requests_total': ('counter', "Service requests by outcome"),
+}
+
+_NO_STAGE = nullcontext()
+_current_request = contextvars.ContextVar('culiflow_request', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus sense"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Histograms and counters keyed by metric name and label values"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self, service: Optional[str] = None) -> str:
+        """Prometheus text exposition, optionally only one service's series"""
+        with self._lock:
+            series = [(key, 'histogram', self._copy(histogram)) for key, histogram in self._histograms.items()]
+            series += [(key, 'counter', value) for key, value in self._counters.items()]
+        if service is not None:
+            series = [s for s in series if dict(s[0][1]).get('service') == service]
+
+        lines = []
+        for name in sorted({name for (name, _), _, _ in series}):
+            kind, help_text = METRIC_HELP.get(name, ('untyped', name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (_, labels), kind, value in sorted((s for s in series if s[0][0] == name), key=lambda s: s[0]):
+                if kind == 'counter':
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), value.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _format_value(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value.sum)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value.count}")
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    @staticmethod
+    def _copy(histogram: Histogram) -> Histogram:
+        copy = Histogram()
+        copy.counts, copy.sum, copy.count = list(histogram.counts), histogram.sum, histogram.count
+        return copy
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
+
+
+class RequestTiming:
+    """Stage times of one service request, for the per-request timing log"""
+
+    def __init__(self, service: str, endpoint: str):
+        self.service = service
+        self.endpoint = endpoint
+        self.stages: Dict[str, float] = {}
+        self.start = time.perf_counter()
+
+    def add(self, stage_name: str, seconds: float) -> None:
+        self.stages[stage_name] = self.stages.get(stage_name, 0.0) + seconds
+
+    def finish(self, status: str) -> None:
+        seconds = time.perf_counter() - self.start
+        metrics.observe('culiflow_request_seconds', seconds, service=self.service, endpoint=self.endpoint)
+        metrics.inc('culiflow_requests_total', service=self.service, endpoint=self.endpoint, status=status)
+        if TIMING_LOG:
+            # One JSON object per line on stdout, next to the services' other output
+            print(json.dumps({
+                'service': self.service,
+                'endpoint': self.endpoint,
+                'status': status,
+                'duration_ms': round(seconds * 1000, 3),
+                'stages_ms': {name: round(value * 1000, 3) for name, value in self.stages.items()}
+            }), flush=True)
+
+
+def record_stage(name: str, seconds: float, failed: bool = False) -> None:
+    """Record a stage timed elsewhere (e.g. in a training worker process)"""
+    if not METRICS_ENABLED:
+        return
+    request = _current_request.get()
+    service = request.service if request is not None else NO_SERVICE
+    metrics.observe('culiflow_stage_seconds', seconds, service=service, stage=name)
+    if failed:
+        metrics.inc('culiflow_stage_errors_total', service=service, stage=name)
+    if request is not None:
+        request.add(name, seconds)
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_stage(self.name, time.perf_counter() - self.start, failed=exc_type is not None)
+        return False
+
+
+def stage(name: str):
+    """Context manager timing one stage of the current request"""
+    if not METRICS_ENABLED:
+        return _NO_STAGE
+    return _Stage(name)
+
+
+def _status(result) -> str:
+    # Services report failures as {"error": ...} (or a tuple starting with one);
+    # streams as an NDJSON line holding just that object
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if isinstance(result, bytes):
+        return 'error' if result.startswith(b'{"error":') else 'ok'
+    return 'error' if isinstance(result, dict) and 'error' in result else 'ok'
+
+
+def instrumented(service: str, endpoint: Optional[str] = None):
+    """Decorator timing a service entry point and attributing its stages to ``service``
+
+    Generator functions are timed until exhausted or closed; the request is
+    made current around each step, since a streaming response may resume
+    the generator on a different thread. A stream that yields an error item
+    counts as an error.
+    """
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+        name = endpoint or fn.__name__
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def stream_wrapper(*args, **kwargs):
+                request = RequestTiming(service, name)
+                generator = fn(*args, **kwargs)
+                status = 'ok'
+                try:
+                    while True:
+                        token = _current_request.set(request)
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            break
+                        finally:
+                            _current_request.reset(token)
+                        if _status(item) == 'error':
+                            status = 'error'
+                        yield item
+                except BaseException:
+                    status = 'error'
+                    raise
+                finally:
+                    generator.close()
+                    request.finish(status)
+            return stream_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            request = RequestTiming(service, name)
+            token = _current_request.set(request)
+            status = 'error'
+            try:
+                result = fn(*args, **kwargs)
+                status = _status(result)
+                return result
+            finally:
+                _current_request.reset(token)
+                request.finish(status)
+        return wrapper
+    return decorate
+
+
+def render_metrics(service: Optional[str] = None) -> str:
+    return metrics.render(service)
+
+
+def launch_with_metrics(blocks, **launch_kwargs) -> None:
+    """Launch a standalone Gradio app with GET /metrics beside it and block until it stops"""
+    if not METRICS_ENABLED:
+        blocks.launch(**launch_kwargs)
+        return
+
+    from fastapi.responses import PlainTextResponse
+
+    def prometheus_metrics(service: Optional[str] = None):
+        return PlainTextResponse(render_metrics(service), media_type=PROMETHEUS_MEDIA_TYPE)
+
+    blocks.launch(prevent_thread_lock=True, **launch_kwargs)
+    router = blocks.app.router
+    router.add_api_route('/metrics', prometheus_metrics, methods=['GET'])
+    # Ahead of Gradio's own routes, which would otherwise match first
+    router.routes.insert(0, router.routes.pop())
+    blocks.block_thread()
@@ -13,6 +13,7 @@ import {
   XAxis,
   YAxis,
 } from "recharts";
+import { SERVICE_URLS } from "../services";
 
 const STORAGE_PREFIX = "inventory_csv_";
 
@@ -84,7 +85,7 @@ const EnhancedDemandForecast = () => {
     setError(null);
 
     try {
-      const client = await Client.connect("http://127.0.0.1:7861/");
+      const client = await Client.connect(SERVICE_URLS.demanda);
       const csvBlob = new Blob([storedData.csvContent], { type: "text/csv" });
       const result = await client.predict("/predict", {
         csv_file: csvBlob,
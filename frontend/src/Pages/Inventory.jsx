@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from "react";
 import { Upload, X, FileText } from "lucide-react";
+import { SERVICE_URLS } from "../services";
 
 // Utility functions for storage
 const STORAGE_PREFIX = "inventory_csv_";
@@ -378,7 +379,7 @@ const Inventory = () => {
 
     setIsLoading(true);
     try {
-      const response = await fetch("http://localhost:7860/api/predict", {
+      const response = await fetch(`${SERVICE_URLS.datedem}api/predict`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
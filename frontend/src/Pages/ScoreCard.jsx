@@ -17,6 +17,7 @@ import {
   XAxis,
   YAxis,
 } from "recharts";
+import { SERVICE_URLS } from "../services";
 
 const STORAGE_PREFIX = "inventory_csv_";
 
@@ -92,7 +93,7 @@ const ScoreCard = () => {
     setError(null);
 
     try {
-      const client = await Client.connect("http://127.0.0.1:7863/");
+      const client = await Client.connect(SERVICE_URLS.score);
 
       // Create a Blob from the CSV string
       const csvBlob = new Blob([storedData.csvContent], { type: "text/csv" });
@@ -11,6 +11,7 @@ import {
   XAxis,
   YAxis,
 } from "recharts";
+import { SERVICE_URLS, ensureDataset } from "../services";
 
 const STORAGE_PREFIX = "inventory_csv_";
 const DEFAULT_DAYS = 30;
@@ -40,7 +41,10 @@ const loadFromStorage = () => {
         // Check if the data is less than 24 hours old
         const oneDay = 24 * 60 * 60 * 1000;
         if (new Date().getTime() - fileData.timestamp < oneDay) {
-          return parseCSV(fileData.csvContent);
+          return {
+            rows: parseCSV(fileData.csvContent),
+            csvContent: fileData.csvContent,
+          };
         }
       }
     }
@@ -63,19 +67,13 @@ const DemandForecast = () => {
     setError(null);
 
     try {
-      const client = await Client.connect("http://127.0.0.1:7861/");
-
-      // Convert local data to CSV string
-      const headers = Object.keys(data[0]).join(",");
-      const rows = data.map((row) => Object.values(row).join(","));
-      const csvString = [headers, ...rows].join("\n");
-
-      // Create a Blob from the CSV string
-      const csvBlob = new Blob([csvString], { type: "text/csv" });
+      const client = await Client.connect(SERVICE_URLS.demanda);
+      const datasetId = await ensureDataset(data.csvContent);
 
       const result = await client.predict("/predict", {
-        csv_file: csvBlob,
+        csv_file: null,
         num_days: days,
+        dataset_id: datasetId,
       });
 
       if (result.error) {
@@ -125,7 +123,7 @@ const DemandForecast = () => {
           <h1 className="text-2xl font-bold">Sales Forecast</h1>
           {localData && (
             <p className="text-sm text-gray-600 mt-2">
-              Using locally stored inventory data with {localData.length} records
+              Using locally stored inventory data with {localData.rows.length} records
             </p>
           )}
         </div>
@@ -10,6 +10,7 @@ import {
   XAxis,
   YAxis
 } from "recharts";
+import { SERVICE_URLS, ensureDataset } from "../services";
 
 const STORAGE_PREFIX = "inventory_csv_";
 
@@ -78,12 +79,13 @@ const FutureSales = () => {
     setError(null);
 
     try {
-      const client = await Client.connect("http://127.0.0.1:7860/");
-      
-      const csvBlob = new Blob([data.csvContent], { type: "text/csv" });
+      const client = await Client.connect(SERVICE_URLS.datedem);
+      const datasetId = await ensureDataset(data.csvContent);
+
       const result = await client.predict("/predict", {
-        csv_file: csvBlob,
+        csv_file: null,
         prediction_date: date,
+        dataset_id: datasetId,
       });
 
       if (result.error) {
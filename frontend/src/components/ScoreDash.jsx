@@ -9,6 +9,7 @@ import {
   ResponsiveContainer,
   Tooltip,
 } from "recharts";
+import { SERVICE_URLS, ensureDataset } from "../services";
 
 const STORAGE_PREFIX = "inventory_csv_";
 
@@ -58,11 +59,12 @@ const EnhancedScoreDash = () => {
       setLoading(true);
       setError(null);
 
-      const client = await Client.connect("http://127.0.0.1:7863/");
-      const csvBlob = new Blob([storedData.csvContent], { type: "text/csv" });
+      const client = await Client.connect(SERVICE_URLS.score);
+      const datasetId = await ensureDataset(storedData.csvContent);
 
       const result = await client.predict("/predict", {
-        csv_file: csvBlob,
+        csv_file: null,
+        dataset_id: datasetId,
       });
 
       setData(result.data[0]);
@@ -8,9 +8,9 @@ import {
   ResponsiveContainer,
   Tooltip,
 } from "recharts";
+import { SENTIMENT_URLS } from "../services";
 
 const SentimentAnalysis = () => {
-  const [data, setData] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [result, setResult] = useState(null);
@@ -19,94 +19,63 @@ const SentimentAnalysis = () => {
     fetchData();
   }, []);
 
-  const fetchData = async () => {
-    setLoading(true);
-    setError(null);
-
+  // Gateway errors carry {"error": ...} with a non-2xx status
+  const errorMessage = async (response, fallback) => {
     try {
-      const response = await fetch("/food_reviews.csv");
-      if (!response.ok) {
-        throw new Error("Failed to fetch CSV file");
-      }
-
-      const text = await response.text();
-      const parsedData = parseCSV(text);
-      setData(parsedData);
-
-      const analyzedData = analyzeSentiment(parsedData);
-      setResult(analyzedData);
-    } catch (err) {
-      setError(`Error loading data: ${err.message}`);
-    } finally {
-      setLoading(false);
+      return (await response.json()).error || fallback;
+    } catch {
+      return fallback;
     }
   };
 
-  const parseCSV = (text) => {
-    const lines = text.split("\n");
-    const headers = lines[0].split(",");
-
-    return lines
-      .slice(1)
-      .map((line) => {
-        const values = line.split(",");
-        const row = {};
-        headers.forEach((header, index) => {
-          row[header.trim()] = values[index]?.trim();
-        });
-        return row;
-      })
-      .filter((row) => Object.values(row).some((value) => value));
+  const fetchSummary = async () => {
+    const response = await fetch(SENTIMENT_URLS.summary);
+    if (!response.ok) {
+      throw new Error(await errorMessage(response, "Failed to fetch sentiment summary"));
+    }
+    return response.json();
   };
 
-  const analyzeSentiment = (data) => {
-    const keywords = {
-      positive: ["good", "great", "excellent", "delicious", "love", "amazing"],
-      negative: [
-        "bad",
-        "poor",
-        "terrible",
-        "horrible",
-        "hate",
-        "disappointing",
-      ],
-    };
-
-    return data.map((row) => {
-      const text = row.Review?.toLowerCase() || "";
-      const positiveCount = keywords.positive.filter((word) =>
-        text.includes(word)
-      ).length;
-      const negativeCount = keywords.negative.filter((word) =>
-        text.includes(word)
-      ).length;
-
-      let sentiment;
-      if (positiveCount > negativeCount) {
-        sentiment = "Positive";
-      } else if (negativeCount > positiveCount) {
-        sentiment = "Negative";
-      } else {
-        sentiment = "Neutral";
-      }
+  // The backend keeps running per-dish aggregates, so a refresh only reads
+  // those; the sample reviews are uploaded once to seed an empty store
+  const seedStore = async () => {
+    const response = await fetch("/food_reviews.csv");
+    if (!response.ok) {
+      throw new Error("Failed to fetch CSV file");
+    }
 
-      return {
-        ...row,
-        Predicted_Sentiment: sentiment,
-      };
+    const formData = new FormData();
+    formData.append("file", await response.blob(), "food_reviews.csv");
+    const upload = await fetch(SENTIMENT_URLS.reviews, {
+      method: "POST",
+      body: formData,
     });
+    if (!upload.ok) {
+      throw new Error(await errorMessage(upload, "Failed to upload reviews"));
+    }
   };
 
-  const getSentimentCounts = () => {
-    if (!result) return { Positive: 0, Negative: 0, Neutral: 0 };
-
-    const sentimentCounts = { Positive: 0, Negative: 0, Neutral: 0 };
-    result.forEach((item) => sentimentCounts[item.Predicted_Sentiment]++);
+  const fetchData = async () => {
+    setLoading(true);
+    setError(null);
 
-    return sentimentCounts;
+    try {
+      let summary = await fetchSummary();
+      if (summary.total_reviews === 0) {
+        await seedStore();
+        summary = await fetchSummary();
+      }
+      setResult(summary);
+    } catch (err) {
+      setError(`Error loading data: ${err.message}`);
+    } finally {
+      setLoading(false);
+    }
   };
 
-  const sentimentCounts = getSentimentCounts();
+  const sentimentCounts = result
+    ? result.sentiment_counts
+    : { Positive: 0, Negative: 0, Neutral: 0 };
 
   const getPieChartData = () => {
     return [
@@ -167,6 +136,31 @@ const SentimentAnalysis = () => {
               </tbody>
             </table>
 
+            <table className="min-w-full mb-6">
+              <thead>
+                <tr className="bg-gray-100">
+                  <th className="px-4 py-2 text-left">Dish</th>
+                  <th className="px-4 py-2 text-left">Positive</th>
+                  <th className="px-4 py-2 text-left">Negative</th>
+                  <th className="px-4 py-2 text-left">Neutral</th>
+                  <th className="px-4 py-2 text-left">Mean Score</th>
+                </tr>
+              </thead>
+              <tbody>
+                {Object.entries(result.by_food).map(([dish, counts]) => (
+                  <tr key={dish}>
+                    <td className="border px-4 py-2">{dish}</td>
+                    <td className="border px-4 py-2">{counts.Positive}</td>
+                    <td className="border px-4 py-2">{counts.Negative}</td>
+                    <td className="border px-4 py-2">{counts.Neutral}</td>
+                    <td className="border px-4 py-2">
+                      {counts.mean_compound ?? "-"}
+                    </td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+
             {pieChartData.length > 0 && (
               <div className="w-full">
                 <ResponsiveContainer width="100%" height={400}>
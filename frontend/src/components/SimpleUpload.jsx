@@ -1,4 +1,5 @@
 import React, { useState } from "react";
+import { SERVICE_URLS } from "../services";
 
 const SimpleUpload = () => {
   const [file, setFile] = useState(null);
@@ -48,7 +49,7 @@ const SimpleUpload = () => {
       const jsonData = csvToJson(text);
       console.log("Converted JSON:", jsonData); // Log the JSON data
 
-      const response = await fetch("http://127.0.0.1:7861/predict", {
+      const response = await fetch(`${SERVICE_URLS.demanda}predict`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
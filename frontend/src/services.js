@@ -0,0 +1,44 @@
+// Every backend service is mounted on the single gateway (backend/gateway.py)
+export const GATEWAY_URL =
+  import.meta.env.VITE_GATEWAY_URL || "http://127.0.0.1:7860";
+
+export const SERVICE_URLS = {
+  datedem: `${GATEWAY_URL}/datedem/`,
+  demanda: `${GATEWAY_URL}/demanda/`,
+  senti: `${GATEWAY_URL}/senti/`,
+  score: `${GATEWAY_URL}/score/`,
+};
+
+// Incremental sentiment store: append review batches, read per-dish aggregates
+export const SENTIMENT_URLS = {
+  reviews: `${GATEWAY_URL}/sentiment/reviews`,
+  summary: `${GATEWAY_URL}/sentiment/summary`,
+};
+
+// Content-addressed sales datasets: the id is the SHA-256 of the CSV bytes,
+// so the history is uploaded once and later requests send only the id
+export const DATASETS_URL = `${GATEWAY_URL}/datasets`;
+
+const sha256Hex = async (bytes) => {
+  const digest = await crypto.subtle.digest("SHA-256", bytes);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+};
+
+export const ensureDataset = async (csvContent) => {
+  const bytes = new TextEncoder().encode(csvContent);
+  const datasetId = await sha256Hex(bytes);
+  const existing = await fetch(`${DATASETS_URL}/${datasetId}`);
+  if (existing.ok) {
+    return datasetId;
+  }
+
+  const form = new FormData();
+  form.append("file", new Blob([bytes], { type: "text/csv" }), "sales.csv");
+  const response = await fetch(DATASETS_URL, { method: "POST", body: form });
+  if (!response.ok) {
+    throw new Error(`Dataset upload failed (${response.status})`);
+  }
+  return (await response.json()).dataset_id;
+};